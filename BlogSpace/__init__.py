@@ -2,14 +2,38 @@ from flask import Flask, render_template, request
 from .auth import auth_bp
 from .user import user_bp
 from .database import init_database
-from .static.uploads import upload_bp
+from .database.engine import database_config_from_env
+from .static.uploads import upload_bp, image_pipeline
 from .main import main_bp
+from .cache import feed_cache, page_cache
+from .database.search import search_index
+from .database.counters import counter_buffer
+from .database.trending import trending
+from .database.likes import like_cache
+from .streams import comment_broker
+from .cli import blogspace_cli, worker
+from .jobs import job_queue
+from .security import password_hasher, login_throttle
+from .metrics import request_metrics
+from . import tasks  # đăng ký các job handler
 from datetime import timedelta
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 import os
 
+# BLOGSPACE_PROFILE chọn bộ config ghi đè mặc định (config truyền vào create_app vẫn thắng)
+PROFILES = {
+    'default': {},
+    'production': {
+        # schema chỉ đổi qua `flask db upgrade`, worker khởi động không chạy DDL
+        'DATABASE_CREATE_ALL': False,
+        # schema chưa upgrade tới revision mới nhất thì không khởi động
+        'DATABASE_REQUIRE_HEAD': True,
+    },
+}
 
-def create_app():
+
+def create_app(config: dict | None = None):
     app = Flask(__name__)
     app.config["SECRET_KEY"] = "hahadungroiday726"
     app.permanent_session_lifetime = timedelta(days=7)
@@ -25,10 +49,115 @@ def create_app():
     app.register_blueprint(user_bp)
     app.register_blueprint(upload_bp)
 
-    # cấu hình database
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+    # cấu hình database: DATABASE_URL, DB_POOL_* và SQLITE_* lấy từ biến môi trường
+    app.config.update(database_config_from_env())
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DATABASE_CREATE_ALL'] = True
+    app.config['DATABASE_REQUIRE_HEAD'] = False
+
+    # feed (keyset pagination)
+    app.config['FEED_PAGE_SIZE'] = 12
+    app.config['FEED_MAX_PAGE_SIZE'] = 50
+    app.config['FEED_CACHE_MAX_ENTRIES'] = 256
+    # counter (view/like/comment) không làm mất cache feed: trang cũ tối đa chừng này giây
+    app.config['FEED_CACHE_MAX_AGE'] = 30.0
+    # dashboard tác giả: số bài mỗi trang (đã đăng / nháp)
+    app.config['DASHBOARD_PAGE_SIZE'] = 20
+    # trang chi tiết bài viết đã render (mỗi entry ~ vài chục KB HTML)
+    app.config['PAGE_CACHE_MAX_ENTRIES'] = 512
+
+    # view/like counters được buffer trong worker, flush theo chu kỳ hoặc ngưỡng
+    app.config['STATS_FLUSH_INTERVAL'] = 5.0
+    app.config['STATS_FLUSH_THRESHOLD'] = 500
+    # trending: số bài giữ trong top-K của mỗi worker, chu kỳ nạp lại từ DB (giây)
+    app.config['TRENDING_SIZE'] = 200
+    app.config['TRENDING_RESYNC_INTERVAL'] = 60.0
+    # set bài đã like của mỗi user (đánh dấu "liked" trên feed): số user, số like tối đa để cache cả set
+    app.config['LIKE_CACHE_MAX_USERS'] = 10000
+    app.config['LIKE_CACHE_MAX_LIKES'] = 5000
+    app.config['LIKE_CACHE_TTL'] = 300.0
+
+    # read replica (DATABASE_REPLICA_URL): lag tối đa, chu kỳ kiểm tra, thời gian
+    # nghỉ khi replica lỗi, và số giây user vừa ghi được đọc từ primary
+    app.config['REPLICA_MAX_LAG_SECONDS'] = 5.0
+    app.config['REPLICA_CHECK_INTERVAL'] = 5.0
+    app.config['REPLICA_RETRY_SECONDS'] = 30.0
+    app.config['READ_YOUR_WRITES_SECONDS'] = 5.0
+
+    # SSE comment realtime: số stream tối đa mỗi worker (mỗi stream giữ một thread/greenlet),
+    # heartbeat, thời gian tối đa một stream trước khi client nối lại, số comment replay tối đa
+    app.config['COMMENT_STREAM_MAX_PER_WORKER'] = 100
+    app.config['COMMENT_STREAM_HEARTBEAT'] = 15.0
+    app.config['COMMENT_STREAM_MAX_SECONDS'] = 300.0
+    app.config['COMMENT_STREAM_QUEUE_SIZE'] = 100
+    app.config['COMMENT_STREAM_REPLAY_LIMIT'] = 100
+    app.config['COMMENT_STREAM_POLL_INTERVAL'] = 1.0
+    # comment tạo trong chừng này giây được đọc lại khi poll/replay (commit muộn, id không theo thứ tự)
+    app.config['COMMENT_STREAM_LOOKBACK_SECONDS'] = 30.0
+
+    # ảnh upload: số process tạo variant (0 = chạy ngay trong request)
+    app.config['IMAGE_PIPELINE_WORKERS'] = 2
+    app.config['IMAGE_QUALITY'] = 80
+
+    # phục vụ /media/...: None | 'x-accel-redirect' (nginx) | 'x-sendfile'
+    app.config['UPLOAD_OFFLOAD'] = None
+    app.config['UPLOAD_ACCEL_PREFIX'] = '/_uploads'
+    app.config['UPLOAD_MAX_AGE'] = 3600
+
+    # background jobs: 'threads' (chạy trong worker web) | 'external' (flask worker) | 'inline'
+    app.config['JOBS_MODE'] = 'threads'
+    app.config['JOBS_QUEUES'] = {'default': 2, 'images': 2, 'stats': 1}
+
+    # hash mật khẩu: method đầy đủ tham số như werkzeug lưu (đổi -> rehash khi login)
+    app.config['AUTH_PASSWORD_METHOD'] = 'scrypt:32768:8:1'
+    app.config['AUTH_HASH_WORKERS'] = 2
+    app.config['AUTH_HASH_MAX_PENDING'] = 16
+    app.config['AUTH_HASH_QUEUE_TIMEOUT'] = 2.0
+    # throttle đăng nhập (token bucket): số lần thử tối đa liên tiếp / mỗi phút
+    app.config['LOGIN_IP_BURST'] = 20
+    app.config['LOGIN_IP_PER_MINUTE'] = 20
+    app.config['LOGIN_EMAIL_BURST'] = 5
+    app.config['LOGIN_EMAIL_PER_MINUTE'] = 5
+
+    # instrumentation: header Server-Timing, log query chậm, /metrics (Prometheus)
+    app.config['SERVER_TIMING'] = True
+    app.config['SLOW_QUERY_MS'] = 200
+
+    # số reverse proxy tin cậy phía trước (nginx, load balancer): >0 thì remote_addr/scheme
+    # lấy từ X-Forwarded-For/-Proto (ProxyFix). Để 0 khi client gọi thẳng app, vì header
+    # đó client tự đặt được
+    app.config['TRUSTED_PROXY_HOPS'] = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+
+    # warmup mỗi worker gunicorn (BlogSpace.server): các trang gọi thử để nạp cache
+    app.config['WARMUP_PATHS'] = ['/', '/database/get_all_blogs', '/database/trending', '/database/tags']
+
+    app.config['PROFILE'] = os.environ.get('BLOGSPACE_PROFILE', 'default')
+    if app.config['PROFILE'] not in PROFILES:
+        raise ValueError(f"Unknown BLOGSPACE_PROFILE {app.config['PROFILE']!r}")
+    app.config.update(PROFILES[app.config['PROFILE']])
+
+    if config:
+        app.config.update(config)
 
     init_database(app)
+    request_metrics.init_app(app)
+    feed_cache.init_app(app)
+    page_cache.init_app(app)
+    search_index.init_app(app)
+    counter_buffer.init_app(app)
+    trending.init_app(app)
+    like_cache.init_app(app)
+    comment_broker.init_app(app)
+    image_pipeline.init_app(app)
+    job_queue.init_app(app)
+    password_hasher.init_app(app)
+    login_throttle.init_app(app)
+
+    app.cli.add_command(blogspace_cli)
+    app.cli.add_command(worker)
+
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
     
     return app; 
@@ -1,5 +1,7 @@
 from flask import Blueprint, render_template, request, session, redirect, url_for
 from ..database.repository.user_repo import UserService, UserRepository
+from ..security import HashingBusy, login_throttle
+import math
 
 user_service = UserService()
 auth_bp = Blueprint('auth', __name__, template_folder = 'templates', 
@@ -42,11 +44,14 @@ def signup_post():
         errors['confirm'] = 'Mật khẩu xác nhận không khớp!'
 
     if not errors:
-        success, message = user_service.register_user(
-            username=username,
-            email=email,
-            password=password
-        )
+        try:
+            success, message = user_service.register_user(
+                username=username,
+                email=email,
+                password=password
+            )
+        except HashingBusy:
+            success, message = False, "Máy chủ đang bận, vui lòng thử lại sau!"
         if not success:
             errors['email'] = message
 
@@ -64,10 +69,19 @@ def login_post():
     email = request.form['email']
     password = request.form['password']
 
-    user = user_service.authenticate_user(email, password)
+    retry_after = login_throttle.check(request.remote_addr or '', email)
+    if retry_after:
+        response = render_template('login.html', error="Bạn đăng nhập sai quá nhiều lần, vui lòng thử lại sau!")
+        return response, 429, {'Retry-After': str(math.ceil(retry_after))}
+
+    try:
+        user = user_service.authenticate_user(email, password)
+    except HashingBusy:
+        return render_template('login.html', error="Máy chủ đang bận, vui lòng thử lại sau!"), 503, {'Retry-After': '1'}
 
 
     if user is None:
+        login_throttle.failed(email)
         return render_template('login.html', error="Email hoặc mật khẩu không đúng!")
     
     session.clear()
@@ -0,0 +1,242 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by entry count, with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ContentVersion:
+    """Content version shared by every worker process.
+
+    The file holds a random 16-hex-digit token; each bump writes a new token to
+    a temp file and os.replace()s it over the old one, so concurrent bumps from
+    different processes never produce a torn read and the file never grows.
+    Versions are only compared for equality: a lost file (fresh container,
+    another host) gets a new random token instead of restarting a counter at
+    a value some worker or client may still hold. Without a path (no app
+    configured) the version lives in memory.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self._local = _token()
+
+    def get(self) -> str:
+        if self.path is None:
+            return self._local
+        try:
+            with open(self.path, 'rb') as f:
+                token = f.read(32).decode('ascii', 'replace')
+        except FileNotFoundError:
+            token = ''
+        if len(token) != 16:
+            # chưa có file (hoặc file hỏng): tạo version mới, không quay về giá trị cũ
+            self.bump()
+            return self.get()
+        return token
+
+    def bump(self):
+        if self.path is None:
+            self._local = _token()
+            return
+        tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(_token().encode('ascii'))
+        for attempt in range(5):
+            try:
+                os.replace(tmp, self.path)
+                return
+            except PermissionError:
+                # Windows: không replace được khi process khác đang mở file để đọc
+                if attempt == 4:
+                    os.remove(tmp)
+                    raise
+                time.sleep(0.01)
+
+
+def _token() -> str:
+    return os.urandom(8).hex()
+
+
+class FeedCache:
+    """Serialized feed pages keyed by (content version, page key).
+
+    The version is bumped only when posts themselves change (create, edit,
+    delete, new images). Counters (views, likes, comments) change on almost
+    every request, so they do not bump it; instead a page is rebuilt once it
+    is older than `max_age` seconds, bounding how stale its counters can be.
+    """
+
+    def __init__(self, maxsize: int = 256, max_age: float = 30.0):
+        self.version = ContentVersion()
+        self.pages = LRUCache(maxsize)
+        self.max_age = max_age
+        self.not_modified = 0
+        self.expired = 0
+        self.rebuilds = 0
+        self.rebuild_seconds = 0.0
+        self.last_rebuild_seconds = 0.0
+
+    def init_app(self, app):
+        os.makedirs(app.instance_path, exist_ok=True)
+        self.version = ContentVersion(os.path.join(app.instance_path, 'feed.version'))
+        self.pages = LRUCache(app.config.get('FEED_CACHE_MAX_ENTRIES', 256))
+        self.max_age = app.config.get('FEED_CACHE_MAX_AGE', self.max_age)
+        app.extensions['feed_cache'] = self
+
+    def current_version(self) -> str:
+        return self.version.get()
+
+    def bump(self):
+        self.version.bump()
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        # theo nội dung: cùng body là cùng ETag ở mọi worker/host, khác body thì khác,
+        # không phụ thuộc version (version mất/khởi tạo lại không làm 304 sai)
+        return "feed-" + hashlib.blake2b(body, digest_size=12).hexdigest()
+
+    def get_or_build(self, version: str, key: tuple, builder):
+        """(body, etag) của trang; None nếu builder trả về None (không có trang)."""
+        cache_key = (version,) + key
+        entry = self.pages.get(cache_key)
+        if entry is not None and time.monotonic() - entry[2] > self.max_age:
+            # counter trong trang đã cũ quá max_age: dựng lại (ETag giữ nguyên nếu body không đổi)
+            self.expired += 1
+            entry = None
+        if entry is None:
+            start = time.perf_counter()
+            body = builder()
+            elapsed = time.perf_counter() - start
+            self.rebuilds += 1
+            self.rebuild_seconds += elapsed
+            self.last_rebuild_seconds = elapsed
+            if body is None:
+                return None
+            entry = (body, self.etag(body), time.monotonic())
+            self.pages.set(cache_key, entry)
+        return entry[:2]
+
+    def stats(self) -> dict:
+        data = self.pages.stats()
+        data.update({
+            'version': self.current_version(),
+            'max_age': self.max_age,
+            'not_modified': self.not_modified,
+            'expired': self.expired,
+            'rebuilds': self.rebuilds,
+            'avg_rebuild_ms': round(self.rebuild_seconds * 1000 / self.rebuilds, 3) if self.rebuilds else 0.0,
+            'last_rebuild_ms': round(self.last_rebuild_seconds * 1000, 3),
+        })
+        return data
+
+
+class PageCache:
+    """Rendered blog detail pages keyed by (blog_id, updated_at, viewer).
+
+    The updated_at of each post is remembered per worker until the shared
+    version file is bumped (post updated or deleted), so a hit costs one stat()
+    and no database round-trip. The version only picks which updated_at to
+    trust: pages of posts that did not change stay valid across bumps.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        self.version = ContentVersion()
+        self.pages = LRUCache(maxsize)
+        self.updated = LRUCache(maxsize * 4)
+        self.renders = 0
+        self.render_seconds = 0.0
+
+    def init_app(self, app):
+        os.makedirs(app.instance_path, exist_ok=True)
+        maxsize = app.config.get('PAGE_CACHE_MAX_ENTRIES', 512)
+        self.version = ContentVersion(os.path.join(app.instance_path, 'posts.version'))
+        self.pages = LRUCache(maxsize)
+        self.updated = LRUCache(maxsize * 4)
+        app.extensions['page_cache'] = self
+
+    def bump(self):
+        self.version.bump()
+
+    def updated_at(self, blog_id: int, loader):
+        version = self.version.get()
+        entry = self.updated.get(blog_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = loader()
+        if value is not None:
+            self.updated.set(blog_id, (version, value))
+        return value
+
+    def get_or_render(self, key: tuple, renderer):
+        """renderer() trả về (html, cacheable); html None nghĩa là không có trang."""
+        page = self.pages.get(key)
+        if page is None:
+            start = time.perf_counter()
+            page, cacheable = renderer()
+            self.renders += 1
+            self.render_seconds += time.perf_counter() - start
+            if page is not None and cacheable:
+                self.pages.set(key, page)
+        return page
+
+    def stats(self) -> dict:
+        data = self.pages.stats()
+        data.update({
+            'version': self.version.get(),
+            'updated_at_lookups': self.updated.stats(),
+            'renders': self.renders,
+            'avg_render_ms': round(self.render_seconds * 1000 / self.renders, 3) if self.renders else 0.0,
+        })
+        return data
+
+
+feed_cache = FeedCache()
+page_cache = PageCache()
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from .jobs import job_queue
+from .database import db
+from .database.query_plans import check_query_plans
+from .database.reconcile import reconcile_stats
+from .database.search import search_index
+from .database.seed import seed_database
+from .database.transfer import TransferError, export_ndjson, import_ndjson, open_ndjson
+from .static.uploads import IMAGE_VARIANTS, allowed_file, image_pipeline
+
+blogspace_cli = AppGroup('blogspace', help='BlogSpace maintenance commands.')
+
+
+@blogspace_cli.command('reindex-search')
+def reindex_search():
+    """Rebuild the full-text search index from the blog table."""
+    count = search_index.rebuild()
+    click.echo(f"Indexed {count} blogs ({search_index.backend.name}).")
+
+
+@blogspace_cli.command('check-query-plans')
+@click.option('--verbose', '-v', is_flag=True, help='Print every plan, not only failures.')
+def check_query_plans_command(verbose):
+    """EXPLAIN every repository query; exit 1 if any does a full scan or filesort."""
+    failed = 0
+    for name, plan, problems in check_query_plans():
+        if problems:
+            failed += 1
+            click.echo(f"FAIL {name}: {'; '.join(problems)}")
+        elif verbose:
+            click.echo(f"ok   {name}")
+        if verbose or problems:
+            for line in plan:
+                click.echo(f"       {line}")
+    if failed:
+        raise click.ClickException(f"{failed} query plan(s) regressed")
+    click.echo("All query plans use indexes.")
+
+
+@blogspace_cli.command('seed')
+@click.option('--users', default=100, show_default=True)
+@click.option('--blogs', default=1000, show_default=True)
+@click.option('--comments-per-blog', default=8.0, show_default=True, help='Mean; log-normal distributed.')
+@click.option('--max-depth', default=8, show_default=True, help='Deepest reply chain.')
+@click.option('--words-per-blog', default=600, show_default=True, help='Mean post length.')
+@click.option('--seed', default=42, show_default=True, help='Random seed; same seed, same dataset.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per INSERT batch.')
+def seed(users, blogs, comments_per_blog, max_depth, words_per_blog, seed, chunk_size):
+    """Generate synthetic users, blogs, stats and comment threads for benchmarking."""
+    result = seed_database(users=users, blogs=blogs, comments_per_blog=comments_per_blog,
+                           max_depth=max_depth, words_per_blog=words_per_blog, seed=seed,
+                           chunk_size=chunk_size)
+    click.echo(f"Seeded {result['users']} users, {result['blogs']} blogs, {result['comments']} comments "
+               f"(deepest thread {result['max_depth']}); password: {result['password']}")
+
+
+@blogspace_cli.command('export')
+@click.argument('path', default='-')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows fetched per cursor round trip.')
+def export_command(path, chunk_size):
+    """Stream users, blogs, stats and comments to NDJSON (PATH '-' = stdout, *.gz = gzip)."""
+    with open_ndjson(path, 'w') as out:
+        report = export_ndjson(out, chunk_size=chunk_size)
+    _echo_transfer('Exported', report, err=path == '-')
+
+
+@blogspace_cli.command('import')
+@click.argument('path')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per INSERT batch.')
+def import_command(path, chunk_size):
+    """Load an NDJSON export into an empty database, keeping ids (PATH '-' = stdin)."""
+    try:
+        with open_ndjson(path, 'r') as lines:
+            report = import_ndjson(lines, chunk_size=chunk_size)
+    except TransferError as e:
+        raise click.ClickException(str(e))
+    _echo_transfer('Imported', report)
+
+
+def _echo_transfer(verb, report, err=False):
+    for table, result in report.items():
+        click.echo(f"{verb} {result['rows']} {table} rows in {result['seconds']}s "
+                   f"({result['rows_per_second']} rows/s)", err=err)
+
+
+@blogspace_cli.command('reconcile-stats')
+@click.option('--chunk-size', default=1000, show_default=True, help='Ids per transaction.')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between chunks.')
+@click.option('--dry-run', is_flag=True, help='Only count drifted rows.')
+@click.option('--queue', 'enqueue', is_flag=True, help='Run it on the stats job queue instead.')
+def reconcile_stats_command(chunk_size, pause, dry_run, enqueue):
+    """Recompute comment counters and create missing blog_stats rows."""
+    if enqueue:
+        job_queue.enqueue('stats.reconcile', chunk_size=chunk_size)
+        click.echo("Queued stats reconciliation.")
+        return
+    report = reconcile_stats(chunk_size=chunk_size, dry_run=dry_run, pause=pause)
+    verb = "would fix" if dry_run else "fixed"
+    click.echo(f"{report['chunks']} chunks, {verb}: " + ", ".join(
+        f"{key}={value}" for key, value in report.items() if key != 'chunks'))
+
+
+@blogspace_cli.command('image-variants')
+def image_variants():
+    """Queue variant generation for every uploaded image missing them."""
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    suffixes = tuple(f"_{size}" for size in IMAGE_VARIANTS)
+    queued = 0
+    for root, _, files in os.walk(upload_folder):
+        for filename in files:
+            stem = filename.rsplit(".", 1)[0]
+            if not allowed_file(filename) or stem.endswith(suffixes):
+                continue
+            if all(os.path.exists(os.path.join(root, f"{stem}_{size}.webp")) for size in IMAGE_VARIANTS):
+                continue
+            image_pipeline.submit(os.path.join(root, filename))
+            queued += 1
+    click.echo(f"Queued {queued} images for variant generation.")
+
+
+@blogspace_cli.command('purge-jobs')
+@click.option('--days', default=7, show_default=True, help='Delete finished jobs older than this.')
+def purge_jobs(days):
+    """Delete finished jobs from the job queue database."""
+    click.echo(f"Deleted {job_queue.purge(days * 24 * 3600)} finished jobs.")
+
+
+@click.command('worker')
+@click.option('--queues', '-q', default=None, help='Comma-separated queues (default: all configured).')
+@click.option('--processes', '-p', default=1, show_default=True, help='Worker processes to fork.')
+@click.option('--burst', is_flag=True, help='Exit once the queues are empty.')
+@with_appcontext
+def worker(queues, processes, burst):
+    """Process background jobs outside the web workers."""
+    queues = queues.split(',') if queues else None
+    if burst:
+        click.echo(f"Processed {job_queue.work(queues, burst=True)} jobs.")
+        return
+
+    click.echo(f"Worker started: queues={queues or list(job_queue.queues)}, processes={processes}")
+    if processes <= 1:
+        job_queue.work(queues)
+        return
+
+    children = [multiprocessing.Process(target=_work_in_child, args=(queues,)) for _ in range(processes)]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+
+
+def _work_in_child(queues):
+    # Không dùng lại connection DB kế thừa từ process cha sau fork
+    with job_queue.app.app_context():
+        db.engine.dispose(close=False)
+    job_queue.work(queues)
@@ -1,13 +1,105 @@
+import os
+import sys
+import click
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import inspect
+from .engine import engine_options, install_sqlite_pragmas
+from .replica import REPLICA_BIND, RoutingSession, replica_router
+
+
+def _include_object(object, name, type_, reflected, compare_to):
+    # blog_fts* là bảng ảo FTS5 (và shadow tables) do search index tự quản lý
+    return not (type_ == "table" and name.startswith("blog_fts"))
+
+
+# migrations/ nằm cạnh package: `flask db ...` chạy được từ thư mục nào cũng vậy
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                              'migrations')
+# option của lệnh `flask` có nhận giá trị (đứng trước tên lệnh con)
+_FLASK_VALUE_OPTIONS = {'--app', '-A', '--env-file', '-e'}
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrate(include_object=_include_object, directory=MIGRATIONS_DIR)
+
+
+def _running_flask_db() -> bool:
+    """App đang được nạp cho `flask db ...`: Alembic quản lý schema, create_all sẽ
+    tạo trước các bảng mà upgrade định tạo (và autogenerate không thấy thay đổi)."""
+    if click.get_current_context(silent=True) is None:
+        return False
+    args = iter(sys.argv[1:])
+    for arg in args:
+        if arg in _FLASK_VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith('-'):
+            return arg == 'db'
+    return False
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def _check_schema():
+    """Revision của DB phải là head của migrations/: tránh worker chạy với schema cũ
+    (hoặc DB chưa từng upgrade) rồi lỗi ở request đầu tiên."""
+    from alembic.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    expected = set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+    with db.engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != expected:
+        raise SchemaOutOfDate(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(expected)}; "
+            "run `flask db upgrade` first")
+
+
+def _upgrade():
+    """`flask db upgrade` trong tiến trình (không cấu hình lại logging của app)."""
+    from alembic import command
+    config = migrate.get_config(MIGRATIONS_DIR)
+    config.attributes['configure_logger'] = False
+    command.upgrade(config, 'heads')
+
+
+def _create_all(app):
+    """Schema cho dev/test. DB trống: create_all rồi đánh dấu revision mới nhất.
+
+    DB đã có bảng (kể cả DB tạo bằng create_all trước khi có migration, chưa có
+    alembic_version) thì chạy các migration còn thiếu: create_all chỉ tạo bảng
+    mới, không thêm cột mới vào bảng cũ.
+    """
+    engine = db.engine
+    if inspect(engine).get_table_names():
+        _upgrade()
+        return
+    db.create_all()
+    if os.path.isdir(MIGRATIONS_DIR):
+        from alembic.migration import MigrationContext
+        from alembic.script import ScriptDirectory
+        with engine.begin() as connection:
+            MigrationContext.configure(connection).stamp(ScriptDirectory(MIGRATIONS_DIR), 'heads')
 
-db = SQLAlchemy()
-migrate = Migrate()
 
 def init_database(app):
+    replica_url = app.config.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        # bind không có model nào -> create_all/migrate không đụng tới replica
+        app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = {
+            'url': replica_url, **engine_options(app.config, replica_url)}
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     db.init_app(app)
     migrate.init_app(app, db)
+    replica_router.init_app(app, db)
     
     with app.app_context():
-        db.create_all()
-
+        for engine in db.engines.values():
+            install_sqlite_pragmas(engine, app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000),
+                                   app.config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+        # production: schema do migration quản lý (flask db upgrade)
+        if not _running_flask_db():
+            if app.config.get('DATABASE_CREATE_ALL', True):
+                _create_all(app)
+            if app.config.get('DATABASE_REQUIRE_HEAD', False):
+                _check_schema()
@@ -0,0 +1,173 @@
+import atexit
+import os
+import threading
+from datetime import datetime
+from collections import defaultdict
+from sqlalchemy import bindparam, func, insert, select, update
+from . import db
+from .hll import HyperLogLog, hash64
+from .models.blog_model import BlogStats, BlogViewerSketch
+from .trending import trending
+
+COUNTER_COLUMNS = ('total_views', 'total_likes', 'total_comments')
+
+
+class CounterBuffer:
+    """Write-behind buffer cho các counter của BlogStats.
+
+    Các lượt tăng được cộng dồn theo blog_id trong bộ nhớ của worker, rồi flush
+    bằng một UPDATE ... SET col = col + :n (executemany, một transaction) mỗi
+    `interval` giây hoặc khi số blog chờ flush vượt `threshold`. Phép cộng làm
+    ở phía database nên nhiều worker cùng flush cũng không mất lượt đếm.
+
+    Người xem khác nhau đếm bằng HyperLogLog: mỗi blog một sketch trong worker,
+    flush gộp (max từng register) vào blog_viewer_sketch rồi ghi count() vào
+    blog_stats.unique_viewers, cùng transaction với counter.
+    """
+
+    def __init__(self, interval: float = 5.0, threshold: int = 500):
+        self.interval = interval
+        self.threshold = threshold
+        self.app = None
+        self.flushes = 0
+        self.flushed_rows = 0
+        self._pending = defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+        self._sketches = {}
+        self._salt = b""
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('STATS_FLUSH_INTERVAL', self.interval)
+        self.threshold = app.config.get('STATS_FLUSH_THRESHOLD', self.threshold)
+        # định danh người xem chỉ lưu dạng hash có salt, không đảo ngược được từ sketch
+        self._salt = str(app.config['SECRET_KEY']).encode()
+        app.extensions['counter_buffer'] = self
+        atexit.register(self.flush)
+
+    def add(self, blog_id: int, viewer: str | None = None, **deltas):
+        h = hash64(viewer, self._salt) if viewer is not None else None
+        with self._lock:
+            row = self._pending[blog_id]
+            for column, n in deltas.items():
+                row[column] += n
+            if h is not None:
+                sketch = self._sketches.get(blog_id)
+                if sketch is None:
+                    sketch = self._sketches[blog_id] = HyperLogLog()
+                sketch.add_hash(h)
+            pending = len(self._pending)
+        self._ensure_thread()
+        if pending >= self.threshold:
+            self._wakeup.set()
+
+    def pending(self, blog_id: int) -> dict:
+        with self._lock:
+            row = self._pending.get(blog_id)
+            return dict(row) if row else dict.fromkeys(COUNTER_COLUMNS, 0)
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, defaultdict(lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+                sketches, self._sketches = self._sketches, {}
+            if not batch:
+                return 0
+
+            table = BlogStats.__table__
+            stmt = (
+                update(table)
+                .where(table.c.blog_id == bindparam('b_blog_id'))
+                .values({column: func.coalesce(table.c[column], 0) + bindparam(f'b_{column}')
+                         for column in COUNTER_COLUMNS})
+            )
+            params = [{'b_blog_id': blog_id, **{f'b_{c}': row[c] for c in COUNTER_COLUMNS}}
+                      for blog_id, row in batch.items()]
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(stmt, params)
+                        if sketches:
+                            self._merge_sketches(connection, sketches)
+                        entries = trending.rescore(connection, batch)
+            except Exception:
+                self._requeue(batch, sketches)
+                raise
+
+            self.flushes += 1
+            self.flushed_rows += len(params)
+            trending.offer(entries)
+            # không bump feed_cache: counter trong feed được làm mới theo FEED_CACHE_MAX_AGE
+            return len(params)
+
+    @staticmethod
+    def _merge_sketches(connection, sketches):
+        # UPDATE blog_stats ở trên đã khóa row của các blog này (SQLite: khóa ghi cả DB)
+        # nên flush của worker khác chờ tới khi commit, đọc-gộp-ghi không mất register
+        table, stats = BlogViewerSketch.__table__, BlogStats.__table__
+        rows = connection.execute(
+            select(stats.c.blog_id, table.c.registers)
+            .outerjoin(table, table.c.blog_id == stats.c.blog_id)
+            .where(stats.c.blog_id.in_(sorted(sketches)))
+        ).all()
+        inserts, updates, counts = [], [], []
+        for blog_id, stored in rows:  # blog đã xóa không còn blog_stats: bỏ sketch
+            sketch = sketches[blog_id]
+            if stored is not None:
+                sketch.merge(HyperLogLog.from_bytes(stored))
+            params = {'b_blog_id': blog_id, 'b_registers': sketch.to_bytes()}
+            (updates if stored is not None else inserts).append(params)
+            counts.append({'b_blog_id': blog_id, 'b_unique_viewers': sketch.count()})
+        now = datetime.now()
+        if inserts:
+            connection.execute(insert(table).values(blog_id=bindparam('b_blog_id'),
+                                                    registers=bindparam('b_registers'), updated_at=now), inserts)
+        if updates:
+            connection.execute(update(table).where(table.c.blog_id == bindparam('b_blog_id'))
+                               .values(registers=bindparam('b_registers'), updated_at=now), updates)
+        if counts:
+            connection.execute(update(stats).where(stats.c.blog_id == bindparam('b_blog_id'))
+                               .values(unique_viewers=bindparam('b_unique_viewers')), counts)
+
+    def _requeue(self, batch, sketches):
+        with self._lock:
+            for blog_id, row in batch.items():
+                for column, n in row.items():
+                    self._pending[blog_id][column] += n
+            for blog_id, sketch in sketches.items():
+                if blog_id in self._sketches:
+                    sketch.merge(self._sketches[blog_id])
+                self._sketches[blog_id] = sketch
+
+    def _ensure_thread(self):
+        # Thread không sống sót qua fork (gunicorn preload) nên kiểm tra theo pid
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='stats-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Flushing buffered blog stats failed")
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+            sketches = len(self._sketches)
+        return {'pending_blogs': pending, 'pending_sketches': sketches, 'flushes': self.flushes, 'flushed_rows': self.flushed_rows}
+
+
+counter_buffer = CounterBuffer()
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+def _env_int(environ, name, default):
+    value = environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(environ, name, default):
+    value = environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _normalize_url(url):
+    # Heroku/Render vẫn cấp "postgres://", SQLAlchemy 2 chỉ nhận "postgresql://"
+    if url and url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def database_config_from_env(environ=os.environ) -> dict:
+    """Đọc URL database và tham số pool từ biến môi trường.
+
+    DATABASE_URL (mặc định sqlite:///users.db), DATABASE_REPLICA_URL (tuỳ chọn),
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE.
+    """
+    return {
+        "SQLALCHEMY_DATABASE_URI": _normalize_url(environ.get("DATABASE_URL", "sqlite:///users.db")),
+        "DATABASE_REPLICA_URL": _normalize_url(environ.get("DATABASE_REPLICA_URL") or None),
+        "DB_POOL_SIZE": _env_int(environ, "DB_POOL_SIZE", 5),
+        "DB_MAX_OVERFLOW": _env_int(environ, "DB_MAX_OVERFLOW", 10),
+        "DB_POOL_TIMEOUT": _env_int(environ, "DB_POOL_TIMEOUT", 30),
+        "DB_POOL_RECYCLE": _env_int(environ, "DB_POOL_RECYCLE", 1800),
+        "DB_POOL_PRE_PING": _env_bool(environ, "DB_POOL_PRE_PING", True),
+        "SQLITE_BUSY_TIMEOUT_MS": _env_int(environ, "SQLITE_BUSY_TIMEOUT_MS", 5000),
+        "SQLITE_MMAP_SIZE": _env_int(environ, "SQLITE_MMAP_SIZE", 256 * 1024 * 1024),
+    }
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(config, url: str | None = None) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS cho URL (mặc định URL chính; option do app tự đặt được giữ nguyên)."""
+    url = make_url(url or config["SQLALCHEMY_DATABASE_URI"])
+    options = {}
+    # SQLite in-memory dùng StaticPool của Flask-SQLAlchemy, không có khái niệm pool size
+    if not _is_memory_sqlite(url):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=config.get("DB_POOL_SIZE", 5),
+            max_overflow=config.get("DB_MAX_OVERFLOW", 10),
+            pool_timeout=config.get("DB_POOL_TIMEOUT", 30),
+            pool_recycle=config.get("DB_POOL_RECYCLE", 1800),
+            pool_pre_ping=config.get("DB_POOL_PRE_PING", True),
+        )
+    options.update(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    return options
+
+
+def install_sqlite_pragmas(engine, busy_timeout_ms: int = 5000, mmap_size: int = 256 * 1024 * 1024):
+    """Bật WAL + synchronous=NORMAL cho mỗi connection SQLite mới.
+
+    Với rollback journal mặc định, một writer khóa cả file với mọi reader; WAL cho
+    reader chạy song song với một writer, busy_timeout để writer khác chờ thay vì
+    ném "database is locked" ngay lập tức.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    memory = _is_memory_sqlite(engine.url)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not memory:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        finally:
+            cursor.close()
+
+
+class PoolStats:
+    """Thời gian chờ lấy connection từ pool (checkout), dùng chung cho mọi engine của process."""
+
+    def __init__(self, window: int = 1000):
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.failures = 0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, wait: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._recent.append(wait)
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            checkouts, total_wait, max_wait, failures = (self.checkouts, self.total_wait,
+                                                         self.max_wait, self.failures)
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(len(recent) * p))] * 1000, 3) if recent else 0.0
+
+        return {
+            'checkouts': checkouts,
+            'failures': failures,
+            'avg_wait_ms': round(total_wait / checkouts * 1000, 3) if checkouts else 0.0,
+            'p95_wait_ms': percentile(0.95),
+            'p99_wait_ms': percentile(0.99),
+            'max_wait_ms': round(max_wait * 1000, 3),
+        }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool đo thời gian chờ lấy connection (gồm cả mở connection mới)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            # hết pool_timeout hoặc không mở được connection
+            pool_stats.record_failure()
+            raise
+        pool_stats.record(time.perf_counter() - started)
+        return connection
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {'engine': engine.url.render_as_string(hide_password=True), 'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(),
+                      overflow=max(pool.overflow(), 0), checked_in=pool.checkedin())
+    return status
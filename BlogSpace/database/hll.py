@@ -0,0 +1,63 @@
+"""HyperLogLog: ước lượng số phần tử khác nhau với bộ nhớ cố định.
+
+2**PRECISION register, mỗi register một byte (bytearray). Sai số chuẩn
+~1.04 / sqrt(2**PRECISION): PRECISION = 12 là 4 KB mỗi sketch, sai số ~1.6%.
+Hai sketch gộp bằng max từng register, nên gộp theo thứ tự nào, bao nhiêu lần
+cũng ra cùng kết quả (gộp sketch của nhiều worker vào bản trong DB an toàn khi
+flush lại). Bản lưu DB nén zlib: sketch của bài ít người xem gần như toàn 0.
+"""
+import hashlib
+import math
+import zlib
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+_VALUE_BITS = 64 - PRECISION
+_ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+_INVERSE_POWERS = [2.0 ** -k for k in range(_VALUE_BITS + 2)]
+
+
+def hash64(value: str, salt: bytes = b"") -> int:
+    """Hash 64 bit của định danh người xem (salt = secret của app, không lưu giá trị gốc)."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8, key=salt[:64]).digest(), "big")
+
+
+class HyperLogLog:
+    __slots__ = ("registers",)
+
+    def __init__(self, registers: bytes | bytearray | None = None):
+        self.registers = bytearray(registers) if registers is not None else bytearray(REGISTERS)
+        if len(self.registers) != REGISTERS:
+            raise ValueError(f"Expected {REGISTERS} registers, got {len(self.registers)}")
+
+    def add_hash(self, h: int):
+        index = h >> _VALUE_BITS
+        # vị trí bit 1 đầu tiên trong phần còn lại (1 = bit cao nhất)
+        rank = _VALUE_BITS - (h & ((1 << _VALUE_BITS) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        registers = self.registers
+        top = max(registers)
+        total = sum(registers.count(k) * _INVERSE_POWERS[k] for k in range(top + 1))
+        estimate = _ALPHA * REGISTERS * REGISTERS / total
+        zeros = registers.count(0)
+        if zeros:
+            # ít phần tử: linear counting chính xác hơn. Chọn theo chính ước lượng
+            # linear (<= 3m) thay vì ước lượng thô (<= 2.5m): quanh 2.5m ước lượng
+            # thô lệch dương ~1-2%
+            linear = REGISTERS * math.log(REGISTERS / zeros)
+            if linear <= 3 * REGISTERS:
+                estimate = linear
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(bytes(self.registers), 1)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        return cls(zlib.decompress(data))
@@ -0,0 +1,55 @@
+"""Cache "user đã like những bài nào", để feed/detail đánh dấu liked không cần query mỗi card.
+
+Mỗi user một frozenset blog_id, nạp bằng một query chỉ đọc khóa chính
+(user_id, blog_id). Entry gắn với một stamp lưu trong session của user: like/unlike
+đổi stamp, nên request sau của chính user đó, ở worker nào cũng vậy, thấy entry
+cũ không khớp và nạp lại. Like từ thiết bị khác (session khác) thấy sau tối đa
+LIKE_CACHE_TTL giây. User có hơn LIKE_CACHE_MAX_LIKES like không cache cả set:
+mỗi trang hỏi bằng một query IN (...).
+"""
+import time
+from ..cache import LRUCache
+
+_TOO_MANY = None
+
+
+class LikeCache:
+    def __init__(self, max_users: int = 10000, max_likes: int = 5000, ttl: float = 300.0):
+        self.max_likes = max_likes
+        self.ttl = ttl
+        self.users = LRUCache(max_users)
+        self.loads = 0
+
+    def init_app(self, app):
+        self.max_likes = app.config.get('LIKE_CACHE_MAX_LIKES', self.max_likes)
+        self.ttl = app.config.get('LIKE_CACHE_TTL', self.ttl)
+        self.users = LRUCache(app.config.get('LIKE_CACHE_MAX_USERS', 10000))
+        app.extensions['like_cache'] = self
+
+    def liked(self, user_id: int, stamp, blog_ids, load_all, load_some) -> set:
+        """blog_ids mà user đã like. load_all(limit) -> list id; load_some(blog_ids) -> list id."""
+        entry = self.users.get(user_id)
+        if entry is None or entry[0] != stamp or time.monotonic() - entry[1] > self.ttl:
+            ids = load_all(self.max_likes + 1)
+            self.loads += 1
+            entry = (stamp, time.monotonic(), frozenset(ids) if len(ids) <= self.max_likes else _TOO_MANY)
+            self.users.set(user_id, entry)
+        if entry[2] is _TOO_MANY:
+            return set(load_some(blog_ids))
+        return entry[2].intersection(blog_ids)
+
+    def record(self, user_id: int, stamp, new_stamp, blog_id: int, liked: bool):
+        """Áp thay đổi của chính worker này vào entry (nếu còn khớp stamp cũ) thay vì nạp lại."""
+        entry = self.users.get(user_id)
+        if entry is None or entry[0] != stamp or entry[2] is _TOO_MANY:
+            return  # entry (nếu có) mang stamp cũ -> lần đọc sau tự nạp lại
+        ids = entry[2] | {blog_id} if liked else entry[2] - {blog_id}
+        self.users.set(user_id, (new_stamp, entry[1], ids))
+
+    def stats(self) -> dict:
+        data = self.users.stats()
+        data['loads'] = self.loads
+        return data
+
+
+like_cache = LikeCache()
@@ -3,11 +3,26 @@ from datetime import datetime
 
 class Blog(db.Model):
     __tablename__ = "blog"
+    __table_args__ = (
+        # feed (keyset theo created_at, id), bài của tác giả, lọc theo category
+        db.Index("ix_blog_created_at_id", "created_at", "id"),
+        db.Index("ix_blog_user_created_at", "user_id", "created_at"),
+        # dashboard: bài của tác giả theo status (keyset) và tổng theo status
+        db.Index("ix_blog_user_status_created", "user_id", "status", "created_at", "id"),
+        db.Index("ix_blog_category_created_at", "category", "created_at"),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
 
     title = db.Column(db.String(255), nullable = False)
-    content = db.Column(db.Text, nullable = False)
+    # thân bài chỉ load khi truy cập (deferred): các query danh sách không kéo theo
+    content = db.deferred(db.Column(db.Text, nullable = False))
+    # HTML đã render + sanitize từ content (Markdown), tính lúc create/update
+    content_html = db.deferred(db.Column(db.Text, nullable=True))
+    # tóm tắt cho trang danh sách, tính cùng content_html (rendering.summarize)
+    excerpt = db.Column(db.String(300), nullable=True)
+    word_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    reading_time = db.Column(db.Integer, nullable=False, default=1, server_default="1")
     category = db.Column(db.String(100), nullable=True) 
     tags = db.Column(db.String(255), nullable=True)
 
@@ -34,16 +49,79 @@ class Blog(db.Model):
 
 class BlogStats(db.Model):
     __tablename__ = "blog_stats"
+    __table_args__ = (
+        # top-K trending: ORDER BY hot_score DESC LIMIT K
+        db.Index("ix_blog_stats_hot_score", "hot_score"),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     blog_id = db.Column(db.Integer, db.ForeignKey('blog.id'), nullable=False, unique = True)
 
     total_views = db.Column(db.Integer, default = 0)
     total_likes = db.Column(db.Integer, default = 0)
     total_comments = db.Column(db.Integer, default = 0)
+    # xem database/trending.py; tính lại mỗi khi counter của bài đổi
+    hot_score = db.Column(db.Float, nullable=False, default=0, server_default="0")
+    # ước lượng số người xem khác nhau, từ BlogViewerSketch (database/hll.py)
+    unique_viewers = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+class BlogViewerSketch(db.Model):
+    __tablename__ = "blog_viewer_sketch"
+
+    blog_id = db.Column(db.Integer, db.ForeignKey('blog.id'), primary_key=True)
+    # register HyperLogLog (nén zlib); counter_buffer gộp sketch của worker vào khi flush
+    registers = db.Column(db.LargeBinary, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+
+class Tag(db.Model):
+    __tablename__ = "tag"
+    __table_args__ = (
+        # tag cloud: sort theo số bài, không GROUP BY mỗi request
+        db.Index("ix_tag_blog_count", "blog_count", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    # Số bài gắn tag, cập nhật cùng transaction với blog_tag
+    blog_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+class BlogTag(db.Model):
+    __tablename__ = "blog_tag"
+    __table_args__ = (
+        # bài theo tag, keyset theo (created_at, blog_id) giống feed
+        db.Index("ix_blog_tag_tag_created", "tag_id", "created_at", "blog_id"),
+    )
+
+    blog_id = db.Column(db.Integer, db.ForeignKey('blog.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+    # bản sao blog.created_at để phân trang không cần sort trên bảng blog
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    tag = db.relationship("Tag")
+
+
+class BlogLike(db.Model):
+    __tablename__ = "blog_like"
+    __table_args__ = (
+        # đếm lại / xóa like theo bài
+        db.Index("ix_blog_like_blog", "blog_id"),
+    )
+
+    # khóa chính (user_id, blog_id): mỗi user like một bài tối đa một lần
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    blog_id = db.Column(db.Integer, db.ForeignKey('blog.id'), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
 
 
 class BlogComment(db.Model):
     __tablename__ = "blog_comment"
+    __table_args__ = (
+        # comment gốc của blog (parent_id IS NULL) và reply theo parent, đều sort theo thời gian
+        db.Index("ix_blog_comment_blog_parent_created", "blog_id", "parent_id", "created_at"),
+        db.Index("ix_blog_comment_parent_created", "parent_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key = True)
     blog_id = db.Column(db.Integer, db.ForeignKey('blog.id'), nullable=False)
@@ -54,6 +132,8 @@ class BlogComment(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     total_likes = db.Column(db.Integer, nullable=False, default=0)
+    # Số reply trực tiếp, cập nhật khi thêm/xóa reply (thay cho COUNT mỗi lần đọc)
+    reply_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     user = db.relationship("User", backref="BlogComment")
     blog = db.relationship("Blog", backref="BlogComment")
     replies = db.relationship("BlogComment", backref=db.backref("parent", remote_side=[id]), lazy="dynamic")
@@ -0,0 +1,146 @@
+"""Kiểm tra query plan của các query trong repository (chống regress về full scan).
+
+Mỗi case gọi đúng hàm repository mà app dùng, bắt lại SQL thật qua engine event,
+rồi chạy EXPLAIN QUERY PLAN (SQLite) / EXPLAIN (FORMAT JSON) (Postgres) trên đó.
+Một case lỗi khi plan có full table scan, hoặc có sort tạm trong khi index lẽ ra
+phải trả đúng thứ tự (allow_sort=False).
+"""
+import json
+import re
+from datetime import datetime
+from typing import Callable, NamedTuple
+from sqlalchemy import event
+from . import db
+from .repository.blog_repo import (BlogRepository, BlogCommentRepository, BlogLikeRepository,
+                                   BlogStatsRepository, TagRepository)
+from .repository.user_repo import UserRepository
+from .trending import trending
+
+class PlanCase(NamedTuple):
+    name: str
+    run: Callable
+    # sort tạm trên tập kết quả đã được index giới hạn (vd. một thread comment)
+    allow_sort: bool = False
+    # duyệt toàn bộ index theo thứ tự, dừng sớm nhờ LIMIT (feed keyset)
+    allow_index_scan: bool = False
+
+
+PLAN_CASES = [
+    PlanCase("BlogRepository.get_feed_page", lambda: BlogRepository.get_feed_page(12),
+             allow_index_scan=True),
+    PlanCase("BlogRepository.get_feed_page (cursor)",
+             lambda: BlogRepository.get_feed_page(12, (datetime(2030, 1, 1), 2 ** 31)),
+             allow_index_scan=True),
+    PlanCase("BlogRepository.get_feed_page (category)",
+             lambda: BlogRepository.get_feed_page(12, (datetime(2030, 1, 1), 2 ** 31), "technology")),
+    PlanCase("BlogRepository.get_by_id", lambda: BlogRepository.get_by_id(1)),
+    PlanCase("BlogRepository.get_detail", lambda: BlogRepository.get_detail(1)),
+    PlanCase("BlogRepository.get_updated_at", lambda: BlogRepository.get_updated_at(1)),
+    PlanCase("BlogRepository.get_by_author", lambda: BlogRepository.get_by_author(1)),
+    PlanCase("BlogRepository.get_author_page",
+             lambda: BlogRepository.get_author_page(1, "published", 20)),
+    PlanCase("BlogRepository.get_author_page (cursor)",
+             lambda: BlogRepository.get_author_page(1, "draft", 20, (datetime(2030, 1, 1), 2 ** 31))),
+    PlanCase("BlogRepository.get_author_totals", lambda: BlogRepository.get_author_totals(1)),
+    PlanCase("BlogRepository.filter_by_category", lambda: BlogRepository.filter_by_category("technology")),
+    PlanCase("BlogRepository.search", lambda: BlogRepository.search("flask"), allow_sort=True),
+    PlanCase("TagRepository.get_by_name", lambda: TagRepository.get_by_name("flask")),
+    PlanCase("TagRepository.top", lambda: TagRepository.top(50)),
+    PlanCase("TagRepository.get_blog_page", lambda: TagRepository.get_blog_page(1, 12)),
+    PlanCase("TagRepository.get_blog_page (cursor)",
+             lambda: TagRepository.get_blog_page(1, 12, (datetime(2030, 1, 1), 2 ** 31))),
+    PlanCase("trending.resync", lambda: trending.resync(), allow_index_scan=True),
+    PlanCase("BlogStatsRepository.get_by_blog_id", lambda: BlogStatsRepository.get_by_blog_id(1)),
+    PlanCase("BlogLikeRepository.get_liked_ids", lambda: BlogLikeRepository.get_liked_ids(1, 5001)),
+    PlanCase("BlogLikeRepository.get_liked_among",
+             lambda: BlogLikeRepository.get_liked_among(1, list(range(1, 13)))),
+    PlanCase("BlogCommentRepository.get_root_comments_by_blog",
+             lambda: BlogCommentRepository.get_root_comments_by_blog(1)),
+    PlanCase("BlogCommentRepository.get_thread", lambda: BlogCommentRepository.get_thread(1, 3),
+             allow_sort=True),
+    PlanCase("BlogCommentRepository.get_replies", lambda: BlogCommentRepository.get_replies(1, 2),
+             allow_sort=True),
+    PlanCase("UserRepository.get_user_by_email", lambda: UserRepository.get_user_by_email("a@example.com")),
+    PlanCase("UserRepository.get_user_by_username", lambda: UserRepository.get_user_by_username("a")),
+    PlanCase("UserRepository.find_conflicts", lambda: UserRepository.find_conflicts("a@example.com", "a")),
+]
+
+
+def capture_statements(run):
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", before_execute)
+    try:
+        run()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_execute)
+    return statements
+
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\S+)(.*)$")
+
+
+def sqlite_problems(connection, statement, parameters, case):
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    plan = [row[3] for row in rows]
+    ctes = {line.split()[1] for line in plan if line.startswith("MATERIALIZE ")}
+    ctes |= set(re.findall(r"WITH (?:RECURSIVE )?(\w+)", statement))
+    problems = []
+    for line in plan:
+        match = _SQLITE_SCAN.match(line)
+        if match:
+            name, rest = match.groups()
+            if not (name in ctes or name.startswith("(") or name == "CONSTANT"
+                    or "VIRTUAL TABLE" in rest or ("INDEX" in rest and case.allow_index_scan)):
+                problems.append(line)
+        elif line.startswith("USE TEMP B-TREE") and not case.allow_sort:
+            problems.append(line)
+    return plan, problems
+
+
+def postgres_problems(connection, statement, parameters, case):
+    # Tắt seq scan để planner chỉ chọn nó khi không có index nào dùng được
+    connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    result = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    root = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+    plan, problems = [], []
+
+    def walk(node, depth=0):
+        line = "  " * depth + node["Node Type"] + (f" on {node['Relation Name']}" if "Relation Name" in node else "")
+        if "Index Name" in node:
+            line += f" using {node['Index Name']}"
+        plan.append(line)
+        if node["Node Type"] == "Seq Scan":
+            problems.append(line.strip())
+        elif (node["Node Type"] in ("Index Scan", "Index Only Scan") and "Index Cond" not in node
+              and not case.allow_index_scan):
+            problems.append(line.strip())
+        elif node["Node Type"] in ("Sort", "Incremental Sort") and not case.allow_sort:
+            problems.append(line.strip())
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(root)
+    return plan, problems
+
+
+def check_case(case: PlanCase):
+    """Trả về list (plan, problems) cho từng SQL mà case phát ra."""
+    explain = postgres_problems if db.engine.dialect.name == "postgresql" else sqlite_problems
+    statements = capture_statements(case.run)
+    db.session.rollback()
+    results = []
+    for statement, parameters in statements:
+        with db.engine.connect() as connection:
+            with connection.begin() as transaction:
+                results.append(explain(connection, statement, parameters, case))
+                transaction.rollback()
+    return results
+
+
+def check_query_plans():
+    """Trả về list (tên case, plan, problems) cho từng SQL mà các case phát ra."""
+    return [(case.name, plan, problems) for case in PLAN_CASES for plan, problems in check_case(case)]
@@ -0,0 +1,108 @@
+"""Đối soát counter của blog_stats / blog_comment với dữ liệu thật.
+
+Chạy theo từng khoảng id (`chunk_size` blog hoặc comment), mỗi khoảng một
+transaction ngắn, nên có thể chạy trên DB đang phục vụ mà không giữ lock lâu.
+Mọi phép sửa là câu lệnh set-based (INSERT ... SELECT, UPDATE ... = (SELECT count)),
+chỉ chạm các row thực sự lệch.
+"""
+import time
+from sqlalchemy import and_, func, insert, literal, select, update
+from . import db
+from .models.blog_model import Blog, BlogComment, BlogLike, BlogStats
+from ..cache import feed_cache
+
+
+def _ranges(column, chunk_size):
+    with db.engine.connect() as connection:
+        low, high = connection.execute(select(func.min(column), func.max(column))).one()
+    if low is None:
+        return []
+    return [(start, start + chunk_size - 1) for start in range(low, high + 1, chunk_size)]
+
+
+def _comment_count(blog_id_column):
+    return (select(func.count()).select_from(BlogComment)
+            .where(BlogComment.blog_id == blog_id_column).scalar_subquery())
+
+
+def _like_count(blog_id_column):
+    return (select(func.count()).select_from(BlogLike)
+            .where(BlogLike.blog_id == blog_id_column).scalar_subquery())
+
+
+def _reply_count():
+    child = BlogComment.__table__.alias("child")
+    return (select(func.count()).select_from(child)
+            .where(child.c.parent_id == BlogComment.id).scalar_subquery())
+
+
+def _missing_stats(low, high):
+    return (select(Blog.id).outerjoin(BlogStats, BlogStats.blog_id == Blog.id)
+            .where(Blog.id.between(low, high), BlogStats.id.is_(None)))
+
+
+def _apply(connection, statement, dry_run, count_query):
+    if dry_run:
+        return connection.execute(count_query).scalar()
+    return connection.execute(statement).rowcount
+
+
+def reconcile_stats(chunk_size: int = 1000, dry_run: bool = False, pause: float = 0.0) -> dict:
+    """Tạo blog_stats còn thiếu, tính lại total_comments, total_likes và reply_count.
+
+    Trả về số row đã sửa (hoặc sẽ sửa nếu dry_run) theo từng loại lệch.
+    """
+    report = {'missing_stats': 0, 'total_comments': 0, 'total_likes': 0, 'null_counters': 0,
+              'reply_count': 0, 'chunks': 0}
+    stats = BlogStats.__table__
+
+    for low, high in _ranges(Blog.id, chunk_size):
+        with db.engine.begin() as connection:
+            missing = _missing_stats(low, high)
+            report['missing_stats'] += _apply(
+                connection,
+                insert(stats).from_select(
+                    ['blog_id', 'total_views', 'total_likes', 'total_comments'],
+                    select(Blog.id, literal(0), _like_count(Blog.id), _comment_count(Blog.id))
+                    .where(Blog.id.in_(missing))
+                ),
+                dry_run, select(func.count()).select_from(missing.subquery()))
+
+            expected = _comment_count(stats.c.blog_id)
+            drifted = and_(stats.c.blog_id.between(low, high),
+                           stats.c.total_comments.is_distinct_from(expected))
+            report['total_comments'] += _apply(
+                connection, update(stats).where(drifted).values(total_comments=expected),
+                dry_run, select(func.count()).select_from(stats).where(drifted))
+
+            # total_likes = số row blog_like (like/unlike cập nhật cùng transaction)
+            expected = _like_count(stats.c.blog_id)
+            drifted = and_(stats.c.blog_id.between(low, high),
+                           stats.c.total_likes.is_distinct_from(expected))
+            report['total_likes'] += _apply(
+                connection, update(stats).where(drifted).values(total_likes=expected),
+                dry_run, select(func.count()).select_from(stats).where(drifted))
+
+            nulls = and_(stats.c.blog_id.between(low, high), stats.c.total_views.is_(None))
+            report['null_counters'] += _apply(
+                connection, update(stats).where(nulls).values(total_views=0),
+                dry_run, select(func.count()).select_from(stats).where(nulls))
+        report['chunks'] += 1
+        time.sleep(pause)
+
+    for low, high in _ranges(BlogComment.id, chunk_size):
+        with db.engine.begin() as connection:
+            expected = _reply_count()
+            drifted = and_(BlogComment.id.between(low, high), BlogComment.reply_count != expected)
+            report['reply_count'] += _apply(
+                connection,
+                update(BlogComment).where(drifted).values(reply_count=expected)
+                .execution_options(synchronize_session=False),
+                dry_run, select(func.count()).select_from(BlogComment).where(drifted))
+        report['chunks'] += 1
+        time.sleep(pause)
+
+    if not dry_run and any(report[key] for key in report if key != 'chunks'):
+        feed_cache.bump()
+    return report
+
@@ -0,0 +1,152 @@
+"""Định tuyến các hàm repository chỉ đọc sang read replica (bind 'replica').
+
+Hàm được đánh dấu @replica_read chạy với session trỏ sang replica, trừ khi:
+  - chưa cấu hình DATABASE_REPLICA_URL, hoặc replica đang bị đánh dấu down / lag
+    quá REPLICA_MAX_LAG_SECONDS (kiểm tra mỗi REPLICA_CHECK_INTERVAL giây),
+  - session còn thay đổi chưa flush (đọc phải thấy dữ liệu vừa ghi),
+  - người dùng vừa ghi trong READ_YOUR_WRITES_SECONDS giây (read-your-writes).
+Query lỗi kết nối trên replica thì replica bị đánh dấu down REPLICA_RETRY_SECONDS
+giây và hàm được chạy lại trên primary. Các hàm đọc để sửa (get_by_id, auth...)
+không đánh dấu, luôn đi primary.
+"""
+import contextvars
+import functools
+import threading
+import time
+from flask import g, has_request_context, session as user_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+REPLICA_BIND = 'replica'
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+# Postgres standby: lag = 0 khi đã replay hết WAL nhận được (primary rảnh thì
+# pg_last_xact_replay_timestamp() đứng yên, không phải lag thật)
+_PG_LAG = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _replica_reads.get() and not self._flushing and self._is_clean():
+            engine = replica_router.engine
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.enabled = False
+        self.engine = None
+        self.max_lag = 5.0
+        self.check_interval = 5.0
+        self.retry_interval = 30.0
+        self.read_your_writes = 5.0
+        self.reads = 0
+        self.fallbacks = 0
+        self.lag = None
+        self.last_error = None
+        self._down_until = 0.0
+        self._checked_at = 0.0
+        self._check_lock = threading.Lock()
+        self.db = None
+
+    def init_app(self, app, db):
+        self.db = db
+        self.max_lag = app.config.get('REPLICA_MAX_LAG_SECONDS', self.max_lag)
+        self.check_interval = app.config.get('REPLICA_CHECK_INTERVAL', self.check_interval)
+        self.retry_interval = app.config.get('REPLICA_RETRY_SECONDS', self.retry_interval)
+        self.read_your_writes = app.config.get('READ_YOUR_WRITES_SECONDS', self.read_your_writes)
+        with app.app_context():
+            self.engine = db.engines.get(REPLICA_BIND)
+        self.enabled = self.engine is not None
+        if self.enabled:
+            app.after_request(self._remember_write)
+        app.extensions['replica_router'] = self
+
+    # ---- chọn bind ----
+
+    def allowed(self) -> bool:
+        if not self.enabled:
+            return False
+        if has_request_context():
+            if g.get('db_wrote') or user_session.get('_primary_until', 0) > time.time():
+                return False
+        now = time.monotonic()
+        if now < self._down_until:
+            return False
+        if now - self._checked_at >= self.check_interval and self._check_lock.acquire(blocking=False):
+            try:
+                self._check(now)
+            finally:
+                self._check_lock.release()
+        return now >= self._down_until
+
+    def _check(self, now):
+        self._checked_at = now
+        try:
+            with self.engine.connect() as connection:
+                if connection.dialect.name == 'postgresql':
+                    self.lag = float(connection.execute(_PG_LAG).scalar() or 0)
+                else:
+                    # bản sao SQLite/khác: không đo được lag, chỉ kiểm tra kết nối
+                    connection.execute(text("SELECT 1"))
+                    self.lag = 0.0
+        except (OperationalError, InterfaceError) as e:
+            self.mark_down(e)
+            return
+        if self.lag > self.max_lag:
+            self.mark_down(f"replica lag {self.lag:.1f}s > {self.max_lag}s")
+
+    def mark_down(self, reason):
+        self.last_error = str(reason).splitlines()[0][:200]
+        self._down_until = time.monotonic() + self.retry_interval
+
+    def _remember_write(self, response):
+        # request có flush lên primary -> các request sau của user này đọc primary một lúc
+        if g.get('db_wrote'):
+            user_session['_primary_until'] = time.time() + self.read_your_writes
+        return response
+
+    def stats(self) -> dict:
+        down_for = self._down_until - time.monotonic()
+        return {'enabled': self.enabled, 'healthy': self.enabled and down_for <= 0,
+                'lag_seconds': self.lag, 'reads': self.reads, 'fallbacks': self.fallbacks,
+                'retry_in_seconds': round(down_for, 1) if down_for > 0 else 0,
+                'last_error': self.last_error}
+
+
+replica_router = ReplicaRouter()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _flag_write(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+def replica_read(fn):
+    """Cho hàm repository chỉ đọc chạy trên replica khi được phép, lỗi thì về primary."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not replica_router.allowed():
+            return fn(*args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            result = fn(*args, **kwargs)
+            replica_router.reads += 1
+            return result
+        except (OperationalError, InterfaceError) as e:
+            replica_router.mark_down(e)
+            replica_router.fallbacks += 1
+            replica_router.db.session.rollback()
+        finally:
+            _replica_reads.reset(token)
+        return fn(*args, **kwargs)
+    return wrapper
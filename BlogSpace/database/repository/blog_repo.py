@@ -1,49 +1,160 @@
+from sqlalchemy import and_, delete, func, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, joinedload, load_only, undefer
 from .. import db
-from ..models.blog_model import Blog , BlogStats, BlogComment
+from ..models.blog_model import Blog , BlogStats, BlogComment, BlogLike, BlogTag, BlogViewerSketch, Tag
+from ..models.user_model import User
+from ..pagination import decode_cursor, encode_cursor
+from ..tags import normalize_tags
+from ..search import search_index
+from ..trending import hot_score, trending
+from ..counters import counter_buffer
+from ..likes import like_cache
+from ..replica import replica_read
+from ...cache import feed_cache, page_cache
+from ...rendering import render_markdown, summarize
+from ...jobs import job_queue
+from ...streams import comment_broker
 
 
 class BlogRepository:
     @staticmethod
     def create_blog(data: dict) -> Blog:
         blog = Blog(**data)
+        BlogRepository._render(blog)
         db.session.add(blog)
+        db.session.flush()
+        # stats tạo cùng transaction: counter buffer chỉ UPDATE, row thiếu thì mất lượt xem
+        db.session.add(BlogStats(blog_id=blog.id, total_views=0, total_likes=0, total_comments=0,
+                                 hot_score=hot_score(0, 0, 0, blog.created_at)))
+        TagRepository.sync_blog_tags(blog)
         db.session.commit()
         return blog
 
+    @staticmethod
+    def _render(blog: Blog):
+        blog.content_html = render_markdown(blog.content)
+        for key, value in summarize(blog.content).items():
+            setattr(blog, key, value)
+
     @staticmethod
     def get_by_id(blog_id: int) -> Blog | None:
         return Blog.query.get(blog_id)
 
     @staticmethod
+    @replica_read
+    def get_detail(blog_id: int) -> Blog | None:
+        return Blog.query.options(
+            undefer(Blog.content_html),
+            joinedload(Blog.author).load_only(User.id, User.username)
+        ).filter(Blog.id == blog_id).first()
+
+    @staticmethod
+    def get_updated_at(blog_id: int):
+        return db.session.execute(select(Blog.updated_at).where(Blog.id == blog_id)).scalar()
+
+    @staticmethod
+    @replica_read
     def get_all():
         return Blog.query.order_by(Blog.created_at.desc()).all()
 
     @staticmethod
+    @replica_read
+    def get_feed_page(limit: int, after: tuple | None = None, category: str | None = None):
+        """Keyset page ordered by (created_at, id) desc, author and stats joined.
+
+        Fetches limit + 1 rows so the caller can tell whether a next page exists.
+        With `category`, walks ix_blog_category_created_at instead.
+        """
+        query = Blog.query.options(
+            load_only(Blog.id, Blog.user_id, Blog.title, Blog.seo_description, Blog.excerpt,
+                      Blog.reading_time, Blog.category, Blog.tags, Blog.featured_image_path,
+                      Blog.created_at),
+            joinedload(Blog.author).load_only(User.id, User.username),
+            joinedload(Blog.stats),
+        )
+        if category is not None:
+            query = query.filter(Blog.category == category)
+        if after is not None:
+            created_at, blog_id = after
+            query = query.filter(or_(
+                Blog.created_at < created_at,
+                and_(Blog.created_at == created_at, Blog.id < blog_id)
+            ))
+        return query.order_by(Blog.created_at.desc(), Blog.id.desc()).limit(limit + 1).all()
+
+    @staticmethod
+    @replica_read
     def get_by_author(user_id: int):
         return Blog.query.filter_by(user_id=user_id).order_by(Blog.created_at.desc()).all()
 
+    @staticmethod
+    @replica_read
+    def get_author_page(user_id: int, status: str, limit: int, after: tuple | None = None):
+        """Trang bài của một tác giả theo status, keyset (created_at, id) desc.
+
+        Chỉ lấy các cột dashboard hiển thị (excerpt lưu sẵn, không đọc content), stats
+        join cùng câu lệnh. Lấy limit + 1 row để biết còn trang sau.
+        """
+        query = (
+            select(Blog.id, Blog.title, Blog.status, Blog.created_at, Blog.updated_at,
+                   Blog.excerpt, Blog.reading_time, BlogStats.total_views, BlogStats.unique_viewers,
+                   BlogStats.total_likes, BlogStats.total_comments)
+            .outerjoin(BlogStats, BlogStats.blog_id == Blog.id)
+            .where(Blog.user_id == user_id, Blog.status == status)
+        )
+        if after is not None:
+            created_at, blog_id = after
+            query = query.where(or_(
+                Blog.created_at < created_at,
+                and_(Blog.created_at == created_at, Blog.id < blog_id)
+            ))
+        return db.session.execute(
+            query.order_by(Blog.created_at.desc(), Blog.id.desc()).limit(limit + 1)
+        ).all()
+
+    @staticmethod
+    @replica_read
+    def get_author_totals(user_id: int):
+        """Số bài và tổng views/likes/comments của tác giả, tách theo status (một query)."""
+        return db.session.execute(
+            select(Blog.status, func.count(Blog.id).label('blogs'),
+                   func.coalesce(func.sum(BlogStats.total_views), 0).label('views'),
+                   func.coalesce(func.sum(BlogStats.total_likes), 0).label('likes'),
+                   func.coalesce(func.sum(BlogStats.total_comments), 0).label('comments'))
+            .outerjoin(BlogStats, BlogStats.blog_id == Blog.id)
+            .where(Blog.user_id == user_id)
+            .group_by(Blog.status)
+        ).all()
+
     @staticmethod
     def update_blog(blog: Blog, data: dict):
         for key, value in data.items():
             setattr(blog, key, value)
+        if 'content' in data:
+            BlogRepository._render(blog)
+        if 'tags' in data or 'status' in data:
+            TagRepository.sync_blog_tags(blog)
         db.session.commit()
         return blog
 
     @staticmethod
     def delete_blog(blog: Blog):
+        TagRepository.sync_blog_tags(blog, names=[])
+        db.session.execute(delete(BlogLike).where(BlogLike.blog_id == blog.id))
+        db.session.execute(delete(BlogViewerSketch).where(BlogViewerSketch.blog_id == blog.id))
         db.session.delete(blog)
         db.session.commit()
 
     @staticmethod
-    def search(keyword: str):
-        return Blog.query.filter(
-            Blog.title.ilike(f"%{keyword}%") |
-            Blog.content.ilike(f"%{keyword}%")
-        ).all()
+    @replica_read
+    def search(keyword: str, limit: int = 10, offset: int = 0):
+        return search_index.search(keyword, limit, offset)
 
     @staticmethod
+    @replica_read
     def filter_by_category(category: str):
-        return Blog.query.filter_by(category=category).all()
+        return Blog.query.filter_by(category=category).order_by(Blog.created_at.desc()).all()
 
 
 class BlogService:
@@ -51,36 +162,180 @@ class BlogService:
         self.repository = repository
 
     def create(self, data: dict):
-        return self.repository.create_blog(data)
+        blog = self.repository.create_blog(data)
+        # bài mới có điểm độ mới cao nhất -> vào top-K ngay, không chờ resync
+        trending.offer(trending.load(db.session.connection(), [blog.id]))
+        feed_cache.bump()
+        return blog
 
     def get(self, blog_id: int):
         return self.repository.get_by_id(blog_id)
 
+    def get_detail(self, blog_id: int):
+        return self.repository.get_detail(blog_id)
+
+    def updated_at(self, blog_id: int):
+        """updated_at của bài (None nếu không tồn tại), nhớ theo version của page cache."""
+        return page_cache.updated_at(blog_id, lambda: self.repository.get_updated_at(blog_id))
+
     def list_all(self):
         return self.repository.get_all()
 
+    def feed_page(self, limit: int, cursor: str | None = None, category: str | None = None):
+        after = decode_cursor(cursor) if cursor else None
+        rows = self.repository.get_feed_page(limit, after, category)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+
     def list_by_author(self, user_id: int):
         return self.repository.get_by_author(user_id)
 
+    def author_page(self, user_id: int, status: str, limit: int, cursor: str | None = None):
+        after = decode_cursor(cursor) if cursor else None
+        rows = self.repository.get_author_page(user_id, status, limit, after)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+
+    def author_totals(self, user_id: int) -> dict:
+        """{status: {'blogs', 'views', 'likes', 'comments'}} của tác giả."""
+        return {row.status: {'blogs': row.blogs, 'views': row.views, 'likes': row.likes,
+                             'comments': row.comments}
+                for row in self.repository.get_author_totals(user_id)}
+
     def update(self, blog_id: int, data: dict):
         blog = self.repository.get_by_id(blog_id)
         if not blog:
             return None
-        return self.repository.update_blog(blog, data)
+        blog = self.repository.update_blog(blog, data)
+        # card trong top-K giữ title/ảnh/tags -> nạp lại bài này
+        trending.offer(trending.load(db.session.connection(), [blog_id]))
+        feed_cache.bump()
+        page_cache.bump()
+        return blog
 
     def delete(self, blog_id: int):
         blog = self.repository.get_by_id(blog_id)
         if blog:
             self.repository.delete_blog(blog)
+            trending.discard(blog_id)
+            feed_cache.bump()
+            page_cache.bump()
             return True
         return False
 
-    def search(self, keyword: str):
-        return self.repository.search(keyword)
+    def search(self, keyword: str, page: int = 1, per_page: int = 10):
+        hits, total = self.repository.search(keyword, per_page, (page - 1) * per_page)
+        return {'hits': hits, 'total': total, 'page': page, 'per_page': per_page}
 
     def filter_by_category(self, category: str):
         return self.repository.filter_by_category(category)
 
+    def tag_page(self, name: str, limit: int, cursor: str | None = None):
+        """(rows, next_cursor) của các bài gắn tag `name`, hoặc None nếu tag không tồn tại."""
+        tag = TagRepository.get_by_name(name.strip().lower())
+        if tag is None:
+            return None
+        after = decode_cursor(cursor) if cursor else None
+        rows = TagRepository.get_blog_page(tag.id, limit, after)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+
+    def top_tags(self, limit: int):
+        return [{'name': tag.name, 'count': tag.blog_count} for tag in TagRepository.top(limit)]
+
+
+class TagRepository:
+    @staticmethod
+    def sync_blog_tags(blog: Blog, names: list[str] | None = None):
+        """Đồng bộ blog_tag với chuỗi blog.tags và cộng/trừ tag.blog_count (chưa commit).
+
+        Chỉ bài published có blog_tag; bài chuyển sang draft bị gỡ khỏi mọi tag.
+        """
+        if names is None:
+            names = normalize_tags(blog.tags) if blog.status == 'published' else []
+        current = dict(db.session.execute(
+            select(Tag.name, Tag.id).join(BlogTag, BlogTag.tag_id == Tag.id)
+            .where(BlogTag.blog_id == blog.id)
+        ).all())
+
+        added = TagRepository._get_or_create([name for name in names if name not in current])
+        removed = [tag_id for name, tag_id in current.items() if name not in names]
+
+        if added:
+            db.session.add_all(BlogTag(blog_id=blog.id, tag_id=tag_id, created_at=blog.created_at)
+                               for tag_id in added)
+            TagRepository._adjust_counts(added, 1)
+        if removed:
+            db.session.execute(delete(BlogTag).where(BlogTag.blog_id == blog.id,
+                                                     BlogTag.tag_id.in_(removed)))
+            TagRepository._adjust_counts(removed, -1)
+
+    @staticmethod
+    def _get_or_create(names: list[str]) -> list[int]:
+        if not names:
+            return []
+        ids = dict(db.session.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names))).all())
+        for name in names:
+            if name in ids:
+                continue
+            try:
+                # savepoint: request khác có thể vừa tạo cùng tag (unique name)
+                with db.session.begin_nested():
+                    tag = Tag(name=name, blog_count=0)
+                    db.session.add(tag)
+                ids[name] = tag.id
+            except IntegrityError:
+                ids[name] = db.session.execute(select(Tag.id).where(Tag.name == name)).scalar_one()
+        return [ids[name] for name in names]
+
+    @staticmethod
+    def _adjust_counts(tag_ids: list[int], delta: int):
+        db.session.execute(
+            update(Tag).where(Tag.id.in_(tag_ids))
+            .values(blog_count=Tag.blog_count + delta)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    @replica_read
+    def get_by_name(name: str) -> Tag | None:
+        return Tag.query.filter_by(name=name).first()
+
+    @staticmethod
+    @replica_read
+    def top(limit: int):
+        return (Tag.query.filter(Tag.blog_count > 0)
+                .order_by(Tag.blog_count.desc(), Tag.id.desc()).limit(limit).all())
+
+    @staticmethod
+    @replica_read
+    def get_blog_page(tag_id: int, limit: int, after: tuple | None = None):
+        """Giống BlogRepository.get_feed_page nhưng lọc theo tag qua index của blog_tag."""
+        query = Blog.query.join(BlogTag, BlogTag.blog_id == Blog.id).options(
+            load_only(Blog.id, Blog.user_id, Blog.title, Blog.seo_description, Blog.excerpt,
+                      Blog.reading_time, Blog.category, Blog.tags, Blog.featured_image_path,
+                      Blog.created_at),
+            joinedload(Blog.author).load_only(User.id, User.username),
+            joinedload(Blog.stats),
+        ).filter(BlogTag.tag_id == tag_id, Blog.status == 'published')
+        if after is not None:
+            created_at, blog_id = after
+            query = query.filter(or_(
+                BlogTag.created_at < created_at,
+                and_(BlogTag.created_at == created_at, BlogTag.blog_id < blog_id)
+            ))
+        return (query.order_by(BlogTag.created_at.desc(), BlogTag.blog_id.desc())
+                .limit(limit + 1).all())
+
 
 class BlogStatsRepository:
     @staticmethod
@@ -99,11 +354,59 @@ class BlogStatsRepository:
         db.session.commit()
 
 
+class BlogLikeRepository:
+    @staticmethod
+    def set_liked(user_id: int, blog_id: int, liked: bool) -> tuple[bool, int | None]:
+        """Like/unlike idempotent; đổi total_likes trong cùng transaction với blog_like.
+
+        Trả về (có thay đổi không, total_likes sau thay đổi).
+        """
+        if liked:
+            try:
+                # savepoint: request song song của cùng user có thể vừa like (trùng khóa chính)
+                with db.session.begin_nested():
+                    db.session.add(BlogLike(user_id=user_id, blog_id=blog_id))
+                changed = True
+            except IntegrityError:
+                changed = False
+        else:
+            changed = db.session.execute(
+                delete(BlogLike).where(BlogLike.user_id == user_id, BlogLike.blog_id == blog_id)
+            ).rowcount > 0
+
+        if changed:
+            db.session.execute(
+                update(BlogStats).where(BlogStats.blog_id == blog_id)
+                .values(total_likes=func.coalesce(BlogStats.total_likes, 0) + (1 if liked else -1))
+                .execution_options(synchronize_session=False)
+            )
+            entries = trending.rescore(db.session.connection(), [blog_id])
+        else:
+            entries = trending.load(db.session.connection(), [blog_id])
+        db.session.commit()
+        if changed:
+            trending.offer(entries)
+        return changed, (entries[0]['total_likes'] if entries else None)
+
+    @staticmethod
+    def get_liked_ids(user_id: int, limit: int) -> list[int]:
+        return list(db.session.execute(
+            select(BlogLike.blog_id).where(BlogLike.user_id == user_id).limit(limit)).scalars())
+
+    @staticmethod
+    def get_liked_among(user_id: int, blog_ids) -> list[int]:
+        return list(db.session.execute(
+            select(BlogLike.blog_id).where(BlogLike.user_id == user_id,
+                                           BlogLike.blog_id.in_(blog_ids))).scalars())
+
+
 class BlogCommentRepository:
     @staticmethod
     def create(data : dict) -> BlogComment:
         comment = BlogComment(**data)
         db.session.add(comment)
+        if comment.parent_id is not None:
+            BlogCommentRepository._adjust_reply_count(comment.parent_id, 1)
         db.session.commit()
 
         return comment
@@ -112,12 +415,65 @@ class BlogCommentRepository:
     def get_by_id(comment_id):
         return BlogComment.query.get(comment_id)
 
-    @staticmethod    
+    @staticmethod
+    @replica_read
     def get_root_comments_by_blog(blog_id):
         return BlogComment.query.filter_by(blog_id=blog_id, parent_id=None)\
                                 .order_by(BlogComment.created_at.desc()).all()
+
+    @staticmethod
+    @replica_read
+    def get_thread(blog_id: int, depth: int = 1):
+        """Lấy `depth` tầng comment của một blog (tầng 1 = comment gốc) trong một query.
+
+        Dùng recursive CTE để lấy id theo từng tầng rồi join ngược về blog_comment,
+        author được joinedload trong cùng câu lệnh. Trả về list (comment, level),
+        sắp theo tầng rồi theo thời gian tăng dần.
+        """
+        anchor = BlogComment.parent_id.is_(None)
+        return BlogCommentRepository._load_tree(
+            BlogComment.blog_id == blog_id, anchor, depth
+        )
+
+    @staticmethod
+    @replica_read
+    def get_replies(parent_id: int, depth: int = 1):
+        return BlogCommentRepository._load_tree(
+            None, BlogComment.parent_id == parent_id, depth
+        )
+
+    @staticmethod
+    def _load_tree(scope, anchor, depth: int):
+        roots = select(BlogComment.id, literal(1).label('level')).where(anchor)
+        if scope is not None:
+            roots = roots.where(scope)
+        tree = roots.cte('comment_tree', recursive=True)
+
+        children = aliased(BlogComment)
+        tree = tree.union_all(
+            select(children.id, (tree.c.level + 1).label('level'))
+            .join(tree, children.parent_id == tree.c.id)
+            .where(tree.c.level < depth)
+        )
+
+        return db.session.query(BlogComment, tree.c.level)\
+            .join(tree, BlogComment.id == tree.c.id)\
+            .options(joinedload(BlogComment.user).load_only(User.id, User.username))\
+            .order_by(tree.c.level, BlogComment.created_at, BlogComment.id)\
+            .all()
+
+    @staticmethod
+    def _adjust_reply_count(comment_id, delta: int):
+        db.session.execute(
+            update(BlogComment)
+            .where(BlogComment.id == comment_id)
+            .values(reply_count=BlogComment.reply_count + delta)
+            .execution_options(synchronize_session=False)
+        )
     
     def delete(self, comment):
+        if comment.parent_id is not None:
+            self._adjust_reply_count(comment.parent_id, -1)
         db.session.delete(comment)
         db.session.commit() 
 
@@ -125,24 +481,35 @@ class BlogCommentRepository:
 class BlogStatsService:
     def __init__(self):
         self.stats_repo = BlogStatsRepository()
+        self.like_repo = BlogLikeRepository()
 
     def init_stats_for_blog(self, blog_id):
-        return self.stats_repo.create(blog_id)
-
-    def increment_view(self, blog_id):
-        stats = self.stats_repo.get_by_blog_id(blog_id)
-        if stats:
-            stats.total_views += 1
-            self.stats_repo.save()
-            return stats.total_views
-        return 0
-
-    def increment_like(self, blog_id):
-        stats = self.stats_repo.get_by_blog_id(blog_id)
-        if stats:
-            stats.total_likes += 1
-            self.stats_repo.save()
-            return stats.total_likes
+        stats = self.stats_repo.create(blog_id)
+        feed_cache.bump()
+        return stats
+
+    def increment_view(self, blog_id, viewer: str | None = None):
+        # Không ghi DB ngay: counter_buffer gom lại và flush theo lô.
+        # viewer: định danh người xem cho unique_viewers (HyperLogLog), None = chỉ đếm lượt xem
+        counter_buffer.add(blog_id, viewer=viewer, total_views=1)
+
+    def set_liked(self, user_id, blog_id, liked: bool, stamp=None, new_stamp=None):
+        """Like/unlike của user; trả về (changed, total_likes). stamp: xem database/likes.py."""
+        changed, total_likes = self.like_repo.set_liked(user_id, blog_id, liked)
+        if changed:
+            like_cache.record(user_id, stamp, new_stamp, blog_id, liked)
+        return changed, total_likes
+
+    def liked_among(self, user_id, blog_ids, stamp=None) -> set:
+        """Các bài trong blog_ids user đã like: tối đa một query cho cả trang (0 nếu cache còn)."""
+        if not blog_ids:
+            return set()
+        return like_cache.liked(user_id, stamp, blog_ids,
+                                lambda limit: self.like_repo.get_liked_ids(user_id, limit),
+                                lambda ids: self.like_repo.get_liked_among(user_id, ids))
+
+    def flush(self):
+        return counter_buffer.flush()
 
 class BlogCommentService:
     def __init__(self):
@@ -155,10 +522,9 @@ class BlogCommentService:
             'content': content, 'parent_id': parent_id
         })        
 
-        stats = self.stats_repo.get_by_blog_id(blog_id)
-        if stats:
-            stats.total_comments += 1
-            self.stats_repo.save()
+        # Cập nhật counter của blog_stats chạy ở job worker, không chặn request
+        job_queue.enqueue('stats.comment_added', blog_id=blog_id)
+        comment_broker.publish_comment(blog_id, new_comment.id)
             
         return new_comment
     
@@ -166,4 +532,25 @@ class BlogCommentService:
         return self.comment_repo.get_by_id(comment_id)
 
     def get_blog_comments(self, blog_id):
-        return self.comment_repo.get_root_comments_by_blog(blog_id)
\ No newline at end of file
+        return self.comment_repo.get_root_comments_by_blog(blog_id)
+
+    def get_comment_tree(self, blog_id, depth=1):
+        # Comment gốc mới nhất lên đầu, reply giữ thứ tự thời gian
+        return self._nest(self.comment_repo.get_thread(blog_id, depth))[::-1]
+
+    def get_reply_tree(self, parent_id, depth=1):
+        return self._nest(self.comment_repo.get_replies(parent_id, depth))
+
+    @staticmethod
+    def _nest(rows):
+        """(comment, level) -> list [(comment, children)] của tầng đầu, giữ nguyên thứ tự."""
+        nodes = {}
+        top = []
+        for comment, level in rows:
+            node = (comment, [])
+            nodes[comment.id] = node
+            if level == 1:
+                top.append(node)
+            else:
+                nodes[comment.parent_id][1].append(node)
+        return top
\ No newline at end of file
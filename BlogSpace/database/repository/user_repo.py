@@ -1,8 +1,12 @@
+from sqlalchemy import or_
 from .. import db
+from ..replica import replica_read
 from ..models.user_model import User
+from ...security import password_hasher
 
 class UserRepository:
     @staticmethod
+    @replica_read
     def get_all_users():
         """Lấy tất cả người dùng."""
         return User.query.all()
@@ -13,6 +17,7 @@ class UserRepository:
         return User.query.get(user_id)
 
     @staticmethod
+    @replica_read
     def get_user_by_username(username):
         """Lấy người dùng theo tên đăng nhập."""
         return User.query.filter_by(username=username).first()
@@ -22,6 +27,14 @@ class UserRepository:
         """Lấy người dùng theo email."""
         return User.query.filter_by(email=email).first()
     
+    @staticmethod
+    def find_conflicts(email, username):
+        """Email/username đã tồn tại (một query cho cả hai)."""
+        rows = db.session.query(User.email, User.username)\
+            .filter(or_(User.email == email, User.username == username)).all()
+        return (any(row.email == email for row in rows),
+                any(row.username == username for row in rows))
+
     @staticmethod
     def add_user(username, email, password_hash):
         """Thêm người dùng mới."""
@@ -51,8 +64,7 @@ class UserRepository:
     
     @staticmethod
     def verify_password(user, password):
-        from werkzeug.security import check_password_hash
-        return check_password_hash(user.password_hash, password)
+        return password_hasher.verify(user.password_hash, password)
     
 
 class UserService:
@@ -60,14 +72,14 @@ class UserService:
         self.repo = repository
 
     def register_user(self, username, email, password):        
-        if self.repo.get_user_by_email(email):
+        email_taken, username_taken = self.repo.find_conflicts(email, username)
+        if email_taken:
             return False, "Email đã tồn tại!"
         
-        if self.repo.get_user_by_username(username):
+        if username_taken:
             return False, "Tên đăng nhập đã tồn tại!"
         
-        from werkzeug.security import generate_password_hash
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         
         new_user = self.repo.add_user(
             username=username,
@@ -91,4 +103,12 @@ class UserService:
         if not self.repo.verify_password(user, password):
             return None
 
+        # Cost/method hash trong config đã đổi -> hash lại khi có mật khẩu gốc
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = password_hasher.hash(password)
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+
         return user
\ No newline at end of file
@@ -0,0 +1,216 @@
+from markupsafe import escape
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import load_only
+from . import db
+from .models.blog_model import Blog
+
+# Marker thay cho <mark> trong lúc lấy snippet, để escape nội dung người dùng trước
+# rồi mới chèn thẻ highlight thật
+_START, _STOP = "\x02", "\x03"
+
+
+def _highlight(fragment: str | None) -> str:
+    return str(escape(fragment or "")).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+class LikeSearchBackend:
+    """Fallback khi database không có full-text index: ILIKE, sort theo ngày."""
+    name = "like"
+
+    def ensure_schema(self, connection):
+        pass
+
+    def index(self, connection, blog):
+        pass
+
+    def remove(self, connection, blog_id):
+        pass
+
+    def rebuild(self, connection) -> int:
+        return 0
+
+    def search(self, keyword: str, limit: int, offset: int):
+        query = Blog.query.filter(
+            Blog.title.ilike(f"%{keyword}%") |
+            Blog.content.ilike(f"%{keyword}%")
+        )
+        total = query.count()
+        rows = (query.options(load_only(Blog.id, Blog.user_id, Blog.title, Blog.excerpt, Blog.created_at))
+                .order_by(Blog.created_at.desc()).limit(limit).offset(offset).all())
+        hits = [{
+            'id': blog.id,
+            'title': str(escape(blog.title)),
+            'snippet': str(escape(blog.excerpt or "")),
+            'author': blog.author.username if blog.author else "Unknown",
+            'created_at': blog.created_at,
+            'rank': None,
+        } for blog in rows]
+        return hits, total
+
+
+class SqliteFtsBackend:
+    """Inverted index trong bảng ảo FTS5 `blog_fts` (rowid = blog.id), xếp hạng bằng bm25."""
+    name = "sqlite-fts5"
+
+    def ensure_schema(self, connection):
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS blog_fts USING fts5("
+            "title, content, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+
+    def index(self, connection, blog):
+        connection.execute(text("DELETE FROM blog_fts WHERE rowid = :id"), {'id': blog.id})
+        connection.execute(
+            text("INSERT INTO blog_fts (rowid, title, content) VALUES (:id, :title, :content)"),
+            {'id': blog.id, 'title': blog.title, 'content': blog.content}
+        )
+
+    def remove(self, connection, blog_id):
+        connection.execute(text("DELETE FROM blog_fts WHERE rowid = :id"), {'id': blog_id})
+
+    def rebuild(self, connection) -> int:
+        connection.execute(text("DELETE FROM blog_fts"))
+        result = connection.execute(text(
+            "INSERT INTO blog_fts (rowid, title, content) SELECT id, title, content FROM blog"
+        ))
+        return result.rowcount
+
+    @staticmethod
+    def to_match_query(keyword: str) -> str:
+        # Mỗi từ là một phrase trong ngoặc kép (tránh cú pháp FTS5 từ input), từ cuối match theo prefix
+        terms = ['"%s"' % term.replace('"', '""') for term in keyword.split()]
+        if terms:
+            terms[-1] += "*"
+        return " ".join(terms)
+
+    def search(self, keyword: str, limit: int, offset: int):
+        match = self.to_match_query(keyword)
+        if not match:
+            return [], 0
+        total = db.session.execute(
+            text("SELECT count(*) FROM blog_fts WHERE blog_fts MATCH :q"), {'q': match}
+        ).scalar()
+        rows = db.session.execute(text(
+            "SELECT b.id, b.created_at, u.username, "
+            "highlight(blog_fts, 0, :start, :stop) AS title_hl, "
+            "snippet(blog_fts, 1, :start, :stop, '…', 24) AS snippet, "
+            "bm25(blog_fts, 10.0, 1.0) AS rank "
+            "FROM blog_fts JOIN blog b ON b.id = blog_fts.rowid "
+            'LEFT JOIN "user" u ON u.id = b.user_id '
+            "WHERE blog_fts MATCH :q ORDER BY rank LIMIT :limit OFFSET :offset"
+        ).columns(created_at=db.DateTime), {'q': match, 'start': _START, 'stop': _STOP, 'limit': limit, 'offset': offset})
+        return [self._hit(row) for row in rows], total
+
+    @staticmethod
+    def _hit(row):
+        return {
+            'id': row.id,
+            'title': _highlight(row.title_hl),
+            'snippet': _highlight(row.snippet),
+            'author': row.username or "Unknown",
+            'created_at': row.created_at,
+            'rank': row.rank,
+        }
+
+
+class PostgresFtsBackend(SqliteFtsBackend):
+    """tsvector + GIN expression index trên bảng blog; Postgres tự cập nhật index khi ghi."""
+    name = "postgres-tsvector"
+
+    def __init__(self, ts_config: str = "simple"):
+        self.ts_config = ts_config
+
+    def document(self, alias: str = "") -> str:
+        # Phải trùng khớp với biểu thức của index thì planner mới dùng được GIN
+        prefix = f"{alias}." if alias else ""
+        return (f"(setweight(to_tsvector('{self.ts_config}'::regconfig, coalesce({prefix}title, '')), 'A') || "
+                f"setweight(to_tsvector('{self.ts_config}'::regconfig, coalesce({prefix}content, '')), 'B'))")
+
+    def ensure_schema(self, connection):
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_blog_fts ON blog USING gin ({self.document()})"
+        ))
+
+    def index(self, connection, blog):
+        pass
+
+    def remove(self, connection, blog_id):
+        pass
+
+    def rebuild(self, connection) -> int:
+        connection.execute(text("REINDEX INDEX ix_blog_fts"))
+        return connection.execute(text("SELECT count(*) FROM blog")).scalar()
+
+    def search(self, keyword: str, limit: int, offset: int):
+        if not keyword.strip():
+            return [], 0
+        params = {'q': keyword, 'limit': limit, 'offset': offset,
+                  'title_opts': f"StartSel={_START}, StopSel={_STOP}, HighlightAll=true",
+                  'snippet_opts': f"StartSel={_START}, StopSel={_STOP}, MaxWords=35, MinWords=15"}
+        tsquery = f"websearch_to_tsquery('{self.ts_config}'::regconfig, :q)"
+        total = db.session.execute(
+            text(f"SELECT count(*) FROM blog WHERE {self.document()} @@ {tsquery}"), params
+        ).scalar()
+        rows = db.session.execute(text(
+            "SELECT b.id, b.created_at, u.username, "
+            f"ts_headline('{self.ts_config}'::regconfig, b.title, q, :title_opts) AS title_hl, "
+            f"ts_headline('{self.ts_config}'::regconfig, b.content, q, :snippet_opts) AS snippet, "
+            f"-ts_rank_cd({self.document('b')}, q) AS rank "
+            f"FROM blog b CROSS JOIN {tsquery} AS q "
+            'LEFT JOIN "user" u ON u.id = b.user_id '
+            f"WHERE {self.document('b')} @@ q "
+            "ORDER BY rank LIMIT :limit OFFSET :offset"
+        ).columns(created_at=db.DateTime), params)
+        return [self._hit(row) for row in rows], total
+
+
+class SearchIndex:
+    def __init__(self):
+        self.backend = LikeSearchBackend()
+
+    def init_app(self, app):
+        with app.app_context():
+            dialect = db.engine.dialect.name
+            if dialect == "sqlite":
+                backend = SqliteFtsBackend()
+            elif dialect == "postgresql":
+                backend = PostgresFtsBackend(app.config.get('SEARCH_TS_CONFIG', 'simple'))
+            else:
+                backend = LikeSearchBackend()
+            try:
+                with db.engine.begin() as connection:
+                    backend.ensure_schema(connection)
+            except Exception as e:
+                app.logger.warning("Full-text search unavailable (%s), falling back to LIKE", e)
+                backend = LikeSearchBackend()
+        self.backend = backend
+        app.extensions['search_index'] = self
+
+    def search(self, keyword: str, limit: int, offset: int):
+        return self.backend.search(keyword, limit, offset)
+
+    def rebuild(self) -> int:
+        with db.engine.begin() as connection:
+            self.backend.ensure_schema(connection)
+            return self.backend.rebuild(connection)
+
+
+search_index = SearchIndex()
+
+
+# Đồng bộ index trong cùng transaction với thao tác ghi blog
+@event.listens_for(Blog, "after_insert")
+def _index_new_blog(mapper, connection, target):
+    search_index.backend.index(connection, target)
+
+
+@event.listens_for(Blog, "after_update")
+def _reindex_blog(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.title.history.has_changes() or state.attrs.content.history.has_changes():
+        search_index.backend.index(connection, target)
+
+
+@event.listens_for(Blog, "after_delete")
+def _unindex_blog(mapper, connection, target):
+    search_index.backend.remove(connection, target.id)
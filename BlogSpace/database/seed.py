@@ -0,0 +1,185 @@
+"""Sinh dữ liệu giả có phân phối gần thực tế để đo hiệu năng (lệnh `flask blogspace seed`).
+
+Cùng `seed` (random seed) thì ra cùng một dataset. Số comment mỗi bài theo phân
+phối log-normal (vài bài rất hot, đa số ít comment), reply ưu tiên nối vào
+comment mới nhất nên có các thread sâu tới `max_depth` tầng.
+"""
+import math
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, text
+from . import db
+from .models.blog_model import Blog, BlogComment, BlogLike, BlogStats
+from .models.user_model import User
+from .search import search_index
+from .tags import backfill_tags
+from .trending import hot_score
+from ..cache import feed_cache
+from ..rendering import summarize
+from ..security import password_hasher
+
+SEED_PASSWORD = "benchmark-password"
+
+CATEGORIES = ["technology", "lifestyle", "travel", "food", "education", "business", "health"]
+
+WORDS = (
+    "flask python database index query cache latency throughput worker thread process "
+    "request response session cookie template render stream upload image resize queue "
+    "job retry backoff search ranking token cursor page feed comment reply thread tree "
+    "design pattern service repository model schema migration backup replica primary "
+    "travel mountain river coffee breakfast recipe garden morning weekend market city "
+    "health running sleep habit budget startup product team meeting release deploy "
+    "server client browser mobile network socket proxy nginx gunicorn postgres sqlite "
+    "learning student teacher course exam notebook library history culture music film"
+).split()
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _paragraphs(rng, words):
+    sentences, remaining = [], words
+    while remaining > 0:
+        n = min(remaining, rng.randint(8, 20))
+        sentences.append(_sentence(rng, n))
+        remaining -= n
+    return "\n\n".join(" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5))
+
+
+def _lognormal(rng, mean, sigma):
+    # mean của log-normal = exp(mu + sigma^2 / 2)
+    return rng.lognormvariate(math.log(max(mean, 1e-9)) - sigma ** 2 / 2, sigma)
+
+
+def _next_id(connection, model):
+    return (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def insert_chunks(connection, table, rows, chunk_size):
+    for start in range(0, len(rows), chunk_size):
+        connection.execute(insert(table), rows[start:start + chunk_size])
+
+
+def sync_sequences(connection, *models):
+    """Postgres: đẩy sequence của cột id lên max(id) sau khi insert id tường minh."""
+    if connection.dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__table__.name
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+            f"coalesce((SELECT max(id) FROM \"{table}\"), 0) + 1, false)"
+        ))
+
+
+def seed_database(users: int = 100, blogs: int = 1000, comments_per_blog: float = 8.0,
+                  max_depth: int = 8, words_per_blog: int = 600, seed: int = 42,
+                  chunk_size: int = 1000) -> dict:
+    rng = random.Random(seed)
+    # like dùng rng riêng: cùng seed vẫn cho ra đúng các blog/comment như trước
+    like_rng = random.Random(seed + 1)
+    now = datetime.now()
+    # Hash một lần rồi dùng chung: scrypt cho hàng nghìn user sẽ mất vài phút
+    password_hash = password_hasher.hash(SEED_PASSWORD)
+
+    with db.engine.begin() as connection:
+        user_id, blog_id, comment_id = (_next_id(connection, m) for m in (User, Blog, BlogComment))
+
+        user_rows = [{'id': user_id + i, 'username': f"seed_{seed}_{user_id + i}",
+                      'email': f"seed_{seed}_{user_id + i}@example.com",
+                      'password_hash': password_hash} for i in range(users)]
+        insert_chunks(connection, User.__table__, user_rows, chunk_size)
+        user_ids = [row['id'] for row in user_rows]
+
+        blog_rows, stats_rows, comment_rows, like_rows = [], [], [], []
+        counts = {'users': len(user_rows), 'blogs': 0, 'comments': 0, 'likes': 0}
+        deepest = 0
+        for i in range(blogs):
+            created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+            title_words = rng.randint(3, 9)
+            content = _paragraphs(rng, max(20, int(_lognormal(rng, words_per_blog, 0.6))))
+            blog_rows.append({
+                'id': blog_id + i,
+                # vài tác giả viết rất nhiều (Pareto), đa số viết ít
+                'user_id': user_ids[min(int(rng.paretovariate(1.2)) - 1, users - 1)
+                                    if rng.random() < 0.5 else rng.randrange(users)],
+                'title': _sentence(rng, title_words)[:-1],
+                'content': content,
+                **summarize(content),
+                'category': rng.choice(CATEGORIES),
+                'tags': ",".join(rng.sample(WORDS, rng.randint(0, 5))),
+                'featured_image_path': None,
+                'seo_description': _sentence(rng, 20),
+                'status': 'published' if rng.random() < 0.9 else 'draft',
+                'created_at': created_at,
+                'updated_at': created_at,
+            })
+
+            thread, depth = _comment_thread(rng, blog_id + i, comment_id,
+                                            int(_lognormal(rng, comments_per_blog, 1.2)),
+                                            user_ids, created_at, now, max_depth)
+            comment_rows.extend(thread)
+            comment_id += len(thread)
+            deepest = max(deepest, depth)
+            views, likes = int(_lognormal(rng, 500, 1.5)), int(_lognormal(rng, 20, 1.5))
+            # total_likes = số row blog_like (mỗi user like một bài tối đa một lần)
+            likes = min(likes, users)
+            span = max((now - created_at).total_seconds(), 1)
+            like_rows.extend({'user_id': liker, 'blog_id': blog_id + i,
+                              'created_at': created_at + timedelta(seconds=like_rng.uniform(0, span))}
+                             for liker in like_rng.sample(user_ids, likes))
+            stats_rows.append({'blog_id': blog_id + i,
+                               'total_views': views,
+                               'total_likes': likes,
+                               'total_comments': len(thread),
+                               'hot_score': hot_score(views, likes, len(thread), created_at)})
+
+            # ghi theo lô để RAM không tăng theo kích thước dataset
+            if len(blog_rows) >= chunk_size or i == blogs - 1:
+                insert_chunks(connection, Blog.__table__, blog_rows, chunk_size)
+                insert_chunks(connection, BlogStats.__table__, stats_rows, chunk_size)
+                insert_chunks(connection, BlogComment.__table__, comment_rows, chunk_size)
+                insert_chunks(connection, BlogLike.__table__, like_rows, chunk_size)
+                counts['blogs'] += len(blog_rows)
+                counts['comments'] += len(comment_rows)
+                counts['likes'] += len(like_rows)
+                blog_rows, stats_rows, comment_rows, like_rows = [], [], [], []
+
+        sync_sequences(connection, User, Blog, BlogComment)
+        backfill_tags(connection, min_blog_id=blog_id, batch_size=chunk_size)
+
+    # insert bằng Core không qua mapper event -> index lại một lượt
+    search_index.rebuild()
+    feed_cache.bump()
+    return {**counts, 'max_depth': deepest, 'password': SEED_PASSWORD}
+
+
+def _comment_thread(rng, blog_id, first_id, count, user_ids, since, now, max_depth):
+    rows = []
+    span = max((now - since).total_seconds(), 1)
+    for n in range(count):
+        parent = None
+        if rows and rng.random() < 0.7:
+            # nối vào comment mới nhất (chuỗi hội thoại) hoặc một comment bất kỳ
+            parent = rows[-1] if rng.random() < 0.6 else rng.choice(rows)
+            if parent['_depth'] >= max_depth:
+                parent = None
+        created_at = (parent['created_at'] if parent else since) + timedelta(
+            seconds=rng.uniform(0, span) / (n + 1))
+        row = {
+            'id': first_id + n,
+            'blog_id': blog_id,
+            'user_id': rng.choice(user_ids),
+            'parent_id': parent['id'] if parent else None,
+            'content': _sentence(rng, rng.randint(4, 40)),
+            'created_at': min(created_at, now),
+            'total_likes': int(_lognormal(rng, 2, 1.0)),
+            'reply_count': 0,
+            '_depth': parent['_depth'] + 1 if parent else 1,
+        }
+        if parent:
+            parent['reply_count'] += 1
+        rows.append(row)
+    depth = max((row.pop('_depth') for row in rows), default=0)
+    return rows, depth
@@ -0,0 +1,62 @@
+import re
+
+MAX_TAG_LENGTH = 50
+MAX_TAGS_PER_BLOG = 20
+
+
+def normalize_tags(raw: str | None) -> list[str]:
+    """"Python, #flask ,python" -> ["python", "flask"] (giữ thứ tự, bỏ trùng/rỗng)."""
+    names = []
+    for part in (raw or "").split(","):
+        name = re.sub(r"\s+", " ", part).strip().lstrip("#").strip().lower()[:MAX_TAG_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names[:MAX_TAGS_PER_BLOG]
+
+
+def backfill_tags(connection, min_blog_id: int = 0, batch_size: int = 1000) -> int:
+    """Tạo tag/blog_tag từ chuỗi blog.tags (bài published, blog.id >= min_blog_id) rồi tính lại tag.blog_count.
+
+    Bản nháp không có blog_tag: trang tag và số đếm chỉ tính bài công khai.
+
+    Dùng Core + bảng khai báo tối giản (chạy trên connection của seed/import).
+    """
+    import sqlalchemy as sa
+
+    blog = sa.table("blog", sa.column("id", sa.Integer), sa.column("tags", sa.String),
+                    sa.column("status", sa.String), sa.column("created_at", sa.DateTime))
+    tag = sa.table("tag", sa.column("id", sa.Integer), sa.column("name", sa.String),
+                   sa.column("blog_count", sa.Integer))
+    blog_tag = sa.table("blog_tag", sa.column("blog_id", sa.Integer), sa.column("tag_id", sa.Integer),
+                        sa.column("created_at", sa.DateTime))
+
+    tag_ids = dict(connection.execute(sa.select(tag.c.name, tag.c.id)).all())
+    links, last_id = 0, min_blog_id - 1
+    while True:
+        rows = connection.execute(
+            sa.select(blog.c.id, blog.c.tags, blog.c.created_at)
+            .where(blog.c.id > last_id, blog.c.tags.is_not(None), blog.c.status == "published")
+            .order_by(blog.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        parsed = [(row, normalize_tags(row.tags)) for row in rows]
+        new_names = sorted({name for _, names in parsed for name in names} - tag_ids.keys())
+        if new_names:
+            connection.execute(sa.insert(tag), [{"name": name, "blog_count": 0} for name in new_names])
+            tag_ids.update(connection.execute(
+                sa.select(tag.c.name, tag.c.id).where(tag.c.name.in_(new_names))).all())
+
+        values = [{"blog_id": row.id, "tag_id": tag_ids[name], "created_at": row.created_at}
+                  for row, names in parsed for name in names]
+        if values:
+            connection.execute(sa.insert(blog_tag), values)
+            links += len(values)
+
+    connection.execute(tag.update().values(blog_count=(
+        sa.select(sa.func.count()).select_from(blog_tag)
+        .where(blog_tag.c.tag_id == tag.c.id).scalar_subquery()
+    )))
+    return links
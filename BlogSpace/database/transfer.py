@@ -0,0 +1,167 @@
+"""Export/import nội dung dạng NDJSON (lệnh `flask blogspace export` / `import`).
+
+Dòng đầu là header, mỗi dòng sau là một row: {"table": "blog", "row": {...}}, các
+bảng theo thứ tự khoá ngoại và trong mỗi bảng theo khóa chính. Export đọc bằng server-side
+cursor (stream_results + yield_per) nên RAM không tăng theo kích thước dữ liệu;
+import gom `chunk_size` row thành một executemany INSERT, giữ nguyên id và
+parent_id của comment. tag/blog_tag và index tìm kiếm dựng lại sau khi import.
+"""
+import base64
+import contextlib
+import gzip
+import json
+import sys
+import time
+from datetime import datetime
+from sqlalchemy import DateTime, LargeBinary, bindparam, func, select, update
+from . import db
+from .models.blog_model import Blog, BlogComment, BlogLike, BlogStats, BlogViewerSketch
+from .models.user_model import User
+from .search import search_index
+from .seed import insert_chunks, sync_sequences
+from .tags import backfill_tags
+from ..cache import feed_cache, page_cache
+
+FORMAT = "blogspace-ndjson"
+VERSION = 1
+# bảng cha đứng trước: import đọc tuần tự
+MODELS = (User, Blog, BlogStats, BlogViewerSketch, BlogLike, BlogComment)
+
+
+class TransferError(ValueError):
+    pass
+
+
+def open_ndjson(path: str, mode: str):
+    """File text cho NDJSON: '-' là stdin/stdout, đuôi .gz thì nén gzip."""
+    if path == "-":
+        return contextlib.nullcontext(sys.stdout if mode == "w" else sys.stdin)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        # register HyperLogLog của blog_viewer_sketch
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+# một encoder dùng chung: json.dumps(default=...) tạo encoder mới cho mỗi dòng
+_encoder = json.JSONEncoder(default=_encode, separators=(",", ":"))
+
+
+class _Timer:
+    def __init__(self):
+        self.report = {}
+        self._table, self._started, self._rows = None, None, 0
+
+    def row(self, table: str):
+        if table != self._table:
+            self.stop()
+            self._table, self._started, self._rows = table, time.perf_counter(), 0
+        self._rows += 1
+
+    def stop(self):
+        if self._table is not None:
+            seconds = time.perf_counter() - self._started
+            self.report[self._table] = {'rows': self._rows, 'seconds': round(seconds, 3),
+                                        'rows_per_second': round(self._rows / seconds) if seconds else None}
+            self._table = None
+        return self.report
+
+
+def export_ndjson(out, chunk_size: int = 1000) -> dict:
+    """Ghi users, blogs, blog_stats, viewer sketch, likes, comments ra `out`; trả về số row/thời gian theo bảng."""
+    timer = _Timer()
+    out.write(json.dumps({'format': FORMAT, 'version': VERSION,
+                          'tables': [model.__table__.name for model in MODELS],
+                          'exported_at': datetime.now().isoformat()}) + "\n")
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True, yield_per=chunk_size)
+        for model in MODELS:
+            table = model.__table__
+            result = connection.execute(select(table).order_by(*table.primary_key.columns))
+            columns = list(result.keys())
+            for row in result:
+                out.write(_encoder.encode({'table': table.name, 'row': dict(zip(columns, row))}) + "\n")
+                timer.row(table.name)
+    return timer.stop()
+
+
+def import_ndjson(lines, chunk_size: int = 1000) -> dict:
+    """Đọc NDJSON do export_ndjson tạo vào database rỗng, trong một transaction."""
+    tables = {model.__table__.name: model.__table__ for model in MODELS}
+    decoders = {name: {c.name: datetime.fromisoformat if isinstance(c.type, DateTime) else base64.b64decode
+                       for c in table.columns if isinstance(c.type, (DateTime, LargeBinary))}
+                for name, table in tables.items()}
+    lines = iter(lines)
+    try:
+        header = json.loads(next(lines))
+    except (StopIteration, ValueError) as e:
+        raise TransferError("Missing NDJSON header") from e
+    if header.get('format') != FORMAT or header.get('version') != VERSION:
+        raise TransferError(f"Unsupported export format: {header.get('format')} v{header.get('version')}")
+
+    timer = _Timer()
+    comments = tables['blog_comment']
+    # reply có id nhỏ hơn comment cha (hiếm): insert parent_id NULL rồi nối lại ở cuối
+    late_parents = []
+    min_blog_id = None
+
+    with db.engine.begin() as connection:
+        for name, table in tables.items():
+            if connection.execute(select(func.count()).select_from(table)).scalar():
+                raise TransferError(f"Table {name} is not empty; import needs an empty database")
+
+        batch, current = [], None
+        for number, line in enumerate(lines, start=2):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                name, data = record['table'], record['row']
+                table = tables[name]
+            except (ValueError, KeyError, TypeError) as e:
+                raise TransferError(f"Line {number}: not a known table row") from e
+
+            if name != current:
+                if batch:
+                    insert_chunks(connection, tables[current], batch, chunk_size)
+                batch, current = [], name
+            # cột không còn trong schema bị bỏ qua, cột mới lấy giá trị mặc định
+            row = {key: value for key, value in data.items() if key in table.c}
+            for column, decode in decoders[name].items():
+                if row.get(column) is not None:
+                    row[column] = decode(row[column])
+            if table is comments and row.get('parent_id') is not None and row['parent_id'] > row['id']:
+                late_parents.append({'b_id': row['id'], 'b_parent_id': row['parent_id']})
+                row['parent_id'] = None
+            if name == 'blog':
+                min_blog_id = row['id'] if min_blog_id is None else min(min_blog_id, row['id'])
+
+            batch.append(row)
+            timer.row(name)
+            if len(batch) >= chunk_size:
+                insert_chunks(connection, table, batch, chunk_size)
+                batch = []
+        if batch:
+            insert_chunks(connection, tables[current], batch, chunk_size)
+        report = timer.stop()
+
+        if late_parents:
+            connection.execute(
+                update(comments).where(comments.c.id == bindparam('b_id'))
+                .values(parent_id=bindparam('b_parent_id')), late_parents)
+        if min_blog_id is not None:
+            backfill_tags(connection, min_blog_id=min_blog_id, batch_size=chunk_size)
+        sync_sequences(connection, *(model for model in MODELS if 'id' in model.__table__.c))
+
+    # insert bằng Core không qua mapper event -> index lại một lượt
+    search_index.rebuild()
+    feed_cache.bump()
+    page_cache.bump()
+    return report
@@ -0,0 +1,183 @@
+"""Bảng xếp hạng bài "hot" (lượt xem, like, comment, độ mới).
+
+Điểm dạng Reddit: log10(tương tác) + tuổi bài / HOT_DECAY_SECONDS. Thời gian nằm
+trong điểm dưới dạng hằng số cộng thêm nên điểm không phải tính lại theo giờ, chỉ
+tính lại khi counter của bài đó đổi (flush counter buffer, job comment). Điểm lưu ở
+blog_stats.hot_score (có index) để đồng bộ top-K bằng một query ngắn.
+
+Mỗi worker giữ top-K trong RAM (dict + heap) kèm dữ liệu card, nên
+/database/trending không chạm DB; mỗi `resync_interval` giây nạp lại từ DB để
+thấy thay đổi của worker khác. Chỉ bài published được vào top-K; hot_score của
+bản nháp vẫn được tính để khi publish có ngay điểm đúng.
+"""
+import heapq
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from operator import itemgetter
+from sqlalchemy import bindparam, select, update
+from . import db
+from .models.blog_model import Blog, BlogStats
+from .models.user_model import User
+
+HOT_WEIGHTS = {'total_views': 1, 'total_likes': 5, 'total_comments': 10}
+HOT_EPOCH = datetime(2024, 1, 1)
+# 12.5 giờ mới hơn ~ gấp 10 lần tương tác
+HOT_DECAY_SECONDS = 45000
+
+
+def hot_score(views, likes, comments, created_at: datetime) -> float:
+    engagement = (HOT_WEIGHTS['total_views'] * (views or 0)
+                  + HOT_WEIGHTS['total_likes'] * (likes or 0)
+                  + HOT_WEIGHTS['total_comments'] * (comments or 0))
+    age = (created_at - HOT_EPOCH).total_seconds()
+    return round(math.log10(max(engagement, 1)) + age / HOT_DECAY_SECONDS, 7)
+
+
+def _card_query():
+    return (
+        select(BlogStats.blog_id.label('id'), BlogStats.total_views, BlogStats.unique_viewers,
+               BlogStats.total_likes, BlogStats.total_comments, Blog.title, Blog.seo_description, Blog.excerpt,
+               Blog.reading_time, Blog.category, Blog.tags,
+               Blog.featured_image_path, Blog.created_at, Blog.status, User.username)
+        .join(Blog, Blog.id == BlogStats.blog_id)
+        .outerjoin(User, User.id == Blog.user_id)
+    )
+
+
+def _entry(row) -> dict:
+    entry = dict(row)
+    entry['score'] = hot_score(entry['total_views'], entry['total_likes'],
+                               entry['total_comments'], entry['created_at'])
+    return entry
+
+
+class TrendingIndex:
+    def __init__(self, size: int = 200, resync_interval: float = 60.0):
+        self.size = size
+        self.resync_interval = resync_interval
+        self.app = None
+        self.resyncs = 0
+        self.offers = 0
+        self._entries = {}
+        self._heap = []  # (score, blog_id), có thể chứa bản ghi cũ (lazy delete)
+        self._lock = threading.Lock()
+        self._resync_lock = threading.Lock()
+        self._synced_at = None
+        self._pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.size = app.config.get('TRENDING_SIZE', self.size)
+        self.resync_interval = app.config.get('TRENDING_RESYNC_INTERVAL', self.resync_interval)
+        app.extensions['trending'] = self
+
+    # ---- ghi ----
+
+    @staticmethod
+    def load(connection, blog_ids) -> list[dict]:
+        """Entry (card + điểm) của các bài, đọc qua connection của caller."""
+        blog_ids = list(blog_ids)
+        if not blog_ids:
+            return []
+        rows = connection.execute(_card_query().where(BlogStats.blog_id.in_(blog_ids))).mappings()
+        return [_entry(row) for row in rows]
+
+    def rescore(self, connection, blog_ids) -> list[dict]:
+        """Tính lại hot_score của các bài trong transaction của caller.
+
+        Trả về các entry mới; gọi `offer` sau khi commit để cập nhật top-K.
+        """
+        entries = self.load(connection, blog_ids)
+        if entries:
+            table = BlogStats.__table__
+            connection.execute(
+                update(table).where(table.c.blog_id == bindparam('b_blog_id'))
+                .values(hot_score=bindparam('b_hot_score')),
+                [{'b_blog_id': e['id'], 'b_hot_score': e['score']} for e in entries]
+            )
+        return entries
+
+    def offer(self, entries):
+        with self._lock:
+            for entry in entries:
+                self.offers += 1
+                blog_id, score = entry['id'], entry['score']
+                if entry['status'] != 'published':
+                    # bản nháp (hoặc bài vừa bỏ publish) không nằm trong top-K
+                    self._entries.pop(blog_id, None)
+                    continue
+                if blog_id not in self._entries and len(self._entries) >= self.size:
+                    lowest = self._lowest()
+                    if lowest is None or score <= lowest[0]:
+                        continue
+                    heapq.heappop(self._heap)
+                    del self._entries[lowest[1]]
+                self._entries[blog_id] = entry
+                heapq.heappush(self._heap, (score, blog_id))
+            if len(self._heap) > 2 * self.size + 64:
+                self._rebuild_heap()
+
+    def discard(self, blog_id: int):
+        with self._lock:
+            self._entries.pop(blog_id, None)
+
+    def _lowest(self):
+        # bỏ các bản ghi heap đã cũ (bài bị đẩy ra/đổi điểm)
+        while self._heap:
+            score, blog_id = self._heap[0]
+            entry = self._entries.get(blog_id)
+            if entry is not None and entry['score'] == score:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def _rebuild_heap(self):
+        self._heap = [(entry['score'], blog_id) for blog_id, entry in self._entries.items()]
+        heapq.heapify(self._heap)
+
+    # ---- đọc ----
+
+    def top(self, limit: int) -> list[dict]:
+        self._maybe_resync()
+        with self._lock:
+            return heapq.nlargest(min(limit, self.size), self._entries.values(), key=itemgetter('score'))
+
+    def resync(self):
+        with self.app.app_context():
+            with db.engine.connect() as connection:
+                rows = connection.execute(
+                    _card_query().where(Blog.status == 'published')
+                    .order_by(BlogStats.hot_score.desc()).limit(self.size)
+                ).mappings().all()
+        entries = {row['id']: _entry(row) for row in rows}
+        with self._lock:
+            self._entries = entries
+            self._rebuild_heap()
+            self._synced_at = time.monotonic()
+            self._pid = os.getpid()
+            self.resyncs += 1
+
+    def _maybe_resync(self):
+        # worker sau fork (gunicorn preload) không dùng lại top-K của process cha
+        if (self._synced_at is not None and self._pid == os.getpid()
+                and time.monotonic() - self._synced_at < self.resync_interval):
+            return
+        if not self._resync_lock.acquire(blocking=self._synced_at is None or self._pid != os.getpid()):
+            return  # thread khác đang nạp lại, dùng tạm bản hiện có
+        try:
+            self.resync()
+        finally:
+            self._resync_lock.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        age = time.monotonic() - self._synced_at if self._synced_at is not None else None
+        return {'entries': size, 'capacity': self.size, 'resyncs': self.resyncs,
+                'offers': self.offers, 'synced_seconds_ago': round(age, 1) if age is not None else None}
+
+
+trending = TrendingIndex()
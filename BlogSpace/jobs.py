@@ -0,0 +1,316 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue TEXT NOT NULL,
+    task TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    run_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL,
+    locked_by TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_claim ON jobs (queue, status, run_at);
+"""
+
+
+class Task:
+    def __init__(self, fn, name, queue, max_attempts):
+        self.fn = fn
+        self.name = name
+        self.queue = queue
+        self.max_attempts = max_attempts
+
+
+class JobQueue:
+    """Hàng đợi job bền vững lưu trong một file SQLite riêng (instance/jobs.db).
+
+    Handler gọi `enqueue()` để đẩy việc phụ ra khỏi request; job chỉ bị xóa khỏi
+    trạng thái chờ khi chạy xong, nên restart giữa chừng không làm mất việc. Job
+    đang chạy mà worker chết sẽ được nhận lại sau JOBS_LEASE_SECONDS (worker còn
+    sống thì gia hạn lease định kỳ, nên job chạy lâu không bị chạy song song lần
+    hai); job đã hết lượt thử mà vẫn hết lease (vd. làm chết worker) chuyển sang failed.
+
+    JOBS_MODE:
+      - 'threads'  : mỗi process app tự chạy thread worker (mặc định)
+      - 'external' : chỉ enqueue, job do `flask worker` xử lý
+      - 'inline'   : chạy ngay trong request (dev/test)
+    """
+
+    def __init__(self):
+        self.app = None
+        self.path = None
+        self.mode = 'threads'
+        self.queues = {'default': 2}
+        self.lease_seconds = 300
+        self.poll_interval = 1.0
+        self.backoff_base = 2.0
+        self.tasks = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._stopping = threading.Event()
+        self._wakeup = {}
+
+    def init_app(self, app):
+        self.app = app
+        self.path = app.config.get('JOBS_DATABASE') or os.path.join(app.instance_path, 'jobs.db')
+        self.mode = app.config.get('JOBS_MODE', self.mode)
+        self.queues = dict(app.config.get('JOBS_QUEUES', self.queues))
+        self.lease_seconds = app.config.get('JOBS_LEASE_SECONDS', self.lease_seconds)
+        self.poll_interval = app.config.get('JOBS_POLL_INTERVAL', self.poll_interval)
+        self.backoff_base = app.config.get('JOBS_BACKOFF_BASE', self.backoff_base)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        # jobs.db tạo trước khi có heartbeat_at
+        if 'heartbeat_at' not in {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}:
+            try:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+            except sqlite3.OperationalError:
+                pass  # process khác vừa thêm
+        app.extensions['job_queue'] = self
+
+        if self.mode == 'threads':
+            app.before_request(self.ensure_workers)
+
+    # ---- đăng ký và enqueue ----
+
+    def task(self, name=None, queue='default', max_attempts=5):
+        def decorator(fn):
+            task_name = name or f"{fn.__module__}.{fn.__name__}"
+            self.tasks[task_name] = Task(fn, task_name, queue, max_attempts)
+            return fn
+        return decorator
+
+    def enqueue(self, task_name, delay: float = 0, **kwargs):
+        task = self.tasks[task_name]
+        if self.mode == 'inline':
+            return task.fn(**kwargs)
+
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO jobs (queue, task, payload, max_attempts, run_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (task.queue, task.name, json.dumps(kwargs), task.max_attempts, now + delay, now)
+            )
+        if self.mode == 'threads':
+            self.ensure_workers()
+            event = self._wakeup.get(task.queue)
+            if event is not None:
+                event.set()
+        return cur.lastrowid
+
+    # ---- worker ----
+
+    def ensure_workers(self):
+        # Thread không sống qua fork (gunicorn preload) nên gắn với pid
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._threads = []
+            self._wakeup = {}
+            for queue, concurrency in self.queues.items():
+                self._wakeup[queue] = threading.Event()
+                for i in range(concurrency):
+                    thread = threading.Thread(target=self._work, args=(queue,),
+                                              name=f"jobs-{queue}-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        for event in self._wakeup.values():
+            event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._pid = None
+
+    def _work(self, queue):
+        worker_id = f"{os.getpid()}:{threading.current_thread().name}:{uuid.uuid4().hex[:6]}"
+        wakeup = self._wakeup[queue]
+        while not self._stopping.is_set():
+            try:
+                job = self.claim(queue, worker_id)
+            except sqlite3.Error:
+                logger.exception("Claiming job from queue %s failed", queue)
+                job = None
+            if job is None:
+                wakeup.wait(self.poll_interval)
+                wakeup.clear()
+                continue
+            self.run(job)
+
+    def claim(self, queue, worker_id):
+        now = time.time()
+        conn = self._connect()
+        expired = now - self.lease_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # hết lease mà đã dùng hết lượt thử: không chạy lại nữa
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, locked_by = NULL, "
+                "last_error = 'Lease expired on attempt ' || attempts || '/' || max_attempts "
+                "|| ' (worker ' || coalesce(locked_by, '?') || ' died?)' "
+                "WHERE queue = ? AND status = 'running' AND coalesce(heartbeat_at, started_at) < ? "
+                "AND attempts >= max_attempts",
+                (now, queue, expired)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE queue = ? AND ("
+                "(status = 'queued' AND run_at <= ?) OR "
+                "(status = 'running' AND coalesce(heartbeat_at, started_at) < ?)"
+                ") ORDER BY run_at, id LIMIT 1",
+                (queue, now, expired)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ?, locked_by = ?, "
+                "attempts = attempts + 1 WHERE id = ?",
+                (now, now, worker_id, row['id'])
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        job = dict(row)
+        job['attempts'] += 1
+        job['locked_by'] = worker_id
+        return job
+
+    def _renew_lease(self, job, finished):
+        # gia hạn nhiều lần trong một lease: một lần ghi chậm/lỗi không làm mất lease
+        interval = self.lease_seconds / 3
+        while not finished.wait(interval):
+            try:
+                with self._connect() as conn:
+                    conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND locked_by = ?",
+                                 (time.time(), job['id'], job['locked_by']))
+            except sqlite3.Error:
+                logger.exception("Renewing lease of job %s failed", job['id'])
+
+    def run(self, job):
+        task = self.tasks.get(job['task'])
+        finished = threading.Event()
+        heartbeat = threading.Thread(target=self._renew_lease, args=(job, finished),
+                                     name=f"jobs-lease-{job['id']}", daemon=True)
+        heartbeat.start()
+        try:
+            if task is None:
+                raise LookupError(f"Unknown task {job['task']!r}")
+            with self.app.app_context():
+                task.fn(**json.loads(job['payload']))
+        except Exception:
+            error = traceback.format_exc()
+            logger.warning("Job %s (%s) failed, attempt %s/%s", job['id'], job['task'],
+                           job['attempts'], job['max_attempts'])
+            self._fail(job, error)
+        else:
+            with self._connect() as conn:
+                conn.execute("UPDATE jobs SET status = 'done', finished_at = ?, locked_by = NULL "
+                             "WHERE id = ?", (time.time(), job['id']))
+        finally:
+            finished.set()
+
+    def _fail(self, job, error):
+        now = time.time()
+        with self._connect() as conn:
+            if job['attempts'] >= job['max_attempts']:
+                conn.execute("UPDATE jobs SET status = 'failed', finished_at = ?, last_error = ?, "
+                             "locked_by = NULL WHERE id = ?", (now, error, job['id']))
+            else:
+                # exponential backoff + jitter
+                delay = self.backoff_base ** job['attempts'] * (1 + random.random() / 2)
+                conn.execute("UPDATE jobs SET status = 'queued', run_at = ?, last_error = ?, "
+                             "locked_by = NULL WHERE id = ?", (now + delay, error, job['id']))
+
+    def work(self, queues=None, burst: bool = False):
+        """Chạy worker ở foreground (lệnh `flask worker`). burst=True: dừng khi hết job."""
+        queues = queues or list(self.queues)
+        if burst:
+            worker_id = f"{os.getpid()}:burst"
+            processed = 0
+            while True:
+                job = next((j for j in (self.claim(q, worker_id) for q in queues) if j), None)
+                if job is None:
+                    return processed
+                self.run(job)
+                processed += 1
+
+        self.queues = {q: self.queues.get(q, 1) for q in queues}
+        self._pid = None
+        self.ensure_workers()
+        try:
+            while any(t.is_alive() for t in self._threads):
+                time.sleep(self.poll_interval)
+        finally:
+            self.stop()
+
+    # ---- introspection ----
+
+    def stats(self) -> dict:
+        now = time.time()
+        conn = self._connect()
+        queues = {q: {'queued': 0, 'running': 0, 'done': 0, 'failed': 0,
+                      'concurrency': c, 'oldest_queued_seconds': 0.0}
+                  for q, c in self.queues.items()}
+        for row in conn.execute("SELECT queue, status, count(*) AS n, min(created_at) AS oldest "
+                                "FROM jobs GROUP BY queue, status"):
+            entry = queues.setdefault(row['queue'], {'queued': 0, 'running': 0, 'done': 0,
+                                                     'failed': 0, 'concurrency': 0,
+                                                     'oldest_queued_seconds': 0.0})
+            entry[row['status']] = row['n']
+            if row['status'] == 'queued':
+                entry['oldest_queued_seconds'] = round(now - row['oldest'], 3)
+        for row in conn.execute(
+            "SELECT queue, avg(started_at - created_at) AS wait, avg(finished_at - started_at) AS run "
+            "FROM jobs WHERE status = 'done' AND finished_at > ? GROUP BY queue", (now - 3600,)
+        ):
+            queues[row['queue']]['avg_wait_seconds'] = round(row['wait'], 4)
+            queues[row['queue']]['avg_run_seconds'] = round(row['run'], 4)
+        return {'mode': self.mode, 'queues': queues}
+
+    def purge(self, older_than_seconds: float = 7 * 24 * 3600) -> int:
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM jobs WHERE status = 'done' AND finished_at < ?",
+                                (time.time() - older_than_seconds,)).rowcount
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+job_queue = JobQueue()
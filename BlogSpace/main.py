@@ -1,5 +1,15 @@
-from flask import Blueprint, render_template, jsonify, abort, session, request
+from flask import Blueprint, render_template, jsonify, abort, session, request, current_app, json
 from .database.repository.blog_repo import BlogService
+from .database.pagination import InvalidCursor, clamp_page_size
+from .cache import feed_cache, page_cache
+from .jobs import job_queue
+from .streams import comment_broker
+from .database import db
+from .database.engine import pool_stats, pool_status
+from .database.replica import replica_router
+from .database.trending import trending
+from .database.likes import like_cache
+from .static.uploads import image_variant, upload_url
 
 
 blog_service = BlogService()
@@ -12,28 +22,41 @@ def homepage():
 
 @main_bp.route("/database/get_all_blogs", methods = ["GET"])
 def get_all_blogs():
-    list_all_from_db = blog_service.list_all()
-    output = []
+    limit = clamp_page_size(request.args.get('limit'),
+                            current_app.config.get('FEED_PAGE_SIZE', 12),
+                            current_app.config.get('FEED_MAX_PAGE_SIZE', 50))
+    cursor = request.args.get('cursor')
+    # lọc theo category phía server: client chỉ có các trang đã tải, lọc ở đó sẽ thiếu bài
+    category = request.args.get('category') or None
+
+    # Feed dựng lại khi content version đổi (bài viết) hoặc quá FEED_CACHE_MAX_AGE (counter);
+    # client còn bản cũ thì trả 304, không đụng DB
+    try:
+        return _cached_json((cursor, limit, category), lambda: _build_feed_page(limit, cursor, category))
+    except InvalidCursor:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+
 
-    # print(len(list_all_from_db))
+def _build_feed_page(limit, cursor, category=None):
+    page, next_cursor = blog_service.feed_page(limit, cursor, category)
+    return _feed_body(page, next_cursor)
 
-    for blog in list_all_from_db:
+
+def _feed_body(page, next_cursor):
+    output = []
+    for blog in page:
         views = blog.stats.total_views if blog.stats else 0
+        unique_viewers = blog.stats.unique_viewers if blog.stats else 0
         likes = blog.stats.total_likes if blog.stats else 0
         comments = blog.stats.total_comments if blog.stats else 0
         tags_list = blog.tags.split(',') if blog.tags else []
-        excerpt_text = blog.content[:150] + "..." if len(blog.content) > 150 else blog.content
-        image_path = blog.featured_image_path
-
-        if not image_path:
-            image_path = 'uploads/avata.jpg'
-        # print(image_path)
+        image_path = _card_image(blog.featured_image_path)
 
         blog_data = {
             'id': blog.id,
             'title': blog.title,
-            'excerpt': blog.seo_description,
-            'content': blog.content,
+            'excerpt': blog.seo_description or blog.excerpt,
+            'reading_time': blog.reading_time,
             'author': blog.author.username if blog.author else "Unknown", 
             
             'category': blog.category,
@@ -41,6 +64,7 @@ def get_all_blogs():
             'dateISO': blog.created_at.isoformat(),     
 
             'views': views,
+            'unique_viewers': unique_viewers,
             'likes': likes,
             'comments': comments, 
             'tags': tags_list,  
@@ -48,8 +72,137 @@ def get_all_blogs():
         }
         output.append(blog_data)
 
+    return json.dumps({'blogs': output, 'next_cursor': next_cursor}).encode()
+
+
+def _card_image(path):
+    return upload_url(image_variant(path or 'uploads/avata.jpg', 'card'))
+
+
+def _cached_json(key, builder):
+    """Trả body JSON từ feed cache, kèm ETag/304 như get_all_blogs."""
+    # ETag là hash của body đã cache: 304 vẫn không đụng DB khi cache còn trang
+    entry = feed_cache.get_or_build(feed_cache.current_version(), key, builder)
+    if entry is None:
+        return None
+    body, etag = entry
+    if request.if_none_match.contains(etag):
+        feed_cache.not_modified += 1
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@main_bp.route("/database/tags", methods = ["GET"])
+def tag_counts():
+    limit = clamp_page_size(request.args.get('limit'), 50, 200)
+    return _cached_json(('tags', limit),
+                        lambda: json.dumps({'tags': blog_service.top_tags(limit)}).encode())
+
+
+@main_bp.route("/database/tags/<tag>/blogs", methods = ["GET"])
+def blogs_by_tag(tag):
+    limit = clamp_page_size(request.args.get('limit'),
+                            current_app.config.get('FEED_PAGE_SIZE', 12),
+                            current_app.config.get('FEED_MAX_PAGE_SIZE', 50))
+    cursor = request.args.get('cursor')
+
+    def build():
+        page = blog_service.tag_page(tag, limit, cursor)
+        return _feed_body(*page) if page is not None else None
+
+    try:
+        response = _cached_json(('tag', tag.strip().lower(), cursor, limit), build)
+    except InvalidCursor:
+        return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+    if response is None:
+        return jsonify({'success': False, 'error': 'Tag not found'}), 404
+    return response
+
+
+@main_bp.route("/database/trending", methods = ["GET"])
+def trending_blogs():
+    # top-K nằm sẵn trong RAM của worker: không query DB
+    limit = clamp_page_size(request.args.get('limit'), 10, trending.size)
+    output = []
+    for entry in trending.top(limit):
+        output.append({
+            'id': entry['id'],
+            'title': entry['title'],
+            'excerpt': entry['seo_description'] or entry['excerpt'],
+            'reading_time': entry['reading_time'],
+            'author': entry['username'] or "Unknown",
+            'category': entry['category'],
+            'date': entry['created_at'].strftime('%d %b %Y'),
+            'dateISO': entry['created_at'].isoformat(),
+            'views': entry['total_views'] or 0,
+            'unique_viewers': entry['unique_viewers'] or 0,
+            'likes': entry['total_likes'] or 0,
+            'comments': entry['total_comments'] or 0,
+            'tags': entry['tags'].split(',') if entry['tags'] else [],
+            'featured_image': _card_image(entry['featured_image_path']),
+            'score': entry['score'],
+        })
+    return jsonify({'blogs': output})
+
+
+@main_bp.route("/database/trending/stats", methods = ["GET"])
+def trending_stats():
+    return jsonify(trending.stats())
+
+
+@main_bp.route("/database/like_cache/stats", methods = ["GET"])
+def like_cache_stats():
+    return jsonify(like_cache.stats())
+
+
+@main_bp.route("/database/streams/stats", methods = ["GET"])
+def comment_stream_stats():
+    return jsonify(comment_broker.stats())
+
+
+@main_bp.route("/database/search", methods = ["GET"])
+def search_blogs():
+    keyword = (request.args.get('q') or '').strip()
+    if not keyword:
+        return jsonify({'success': False, 'error': 'Missing search query'}), 400
+
+    per_page = clamp_page_size(request.args.get('per_page'),
+                               current_app.config.get('FEED_PAGE_SIZE', 12),
+                               current_app.config.get('FEED_MAX_PAGE_SIZE', 50))
+    page = max(request.args.get('page', 1, type=int), 1)
+
+    result = blog_service.search(keyword, page=page, per_page=per_page)
+    for hit in result['hits']:
+        hit['date'] = hit['created_at'].strftime('%d %b %Y')
+        hit['dateISO'] = hit.pop('created_at').isoformat()
+
+    return jsonify({'success': True, **result})
+
+
+@main_bp.route("/database/feed_cache/stats", methods = ["GET"])
+def feed_cache_stats():
+    return jsonify(feed_cache.stats())
+
+
+@main_bp.route("/database/page_cache/stats", methods = ["GET"])
+def page_cache_stats():
+    return jsonify(page_cache.stats())
+
+
+@main_bp.route("/database/jobs/stats", methods = ["GET"])
+def job_queue_stats():
+    return jsonify(job_queue.stats())
+
 
-    return jsonify(output); 
+@main_bp.route("/database/pool/stats", methods = ["GET"])
+def pool_stats_view():
+    return jsonify({**pool_stats.stats(),
+                    'engines': [pool_status(engine) for engine in db.engines.values()],
+                    'replica': replica_router.stats()})
 
 # GET (Lấy dữ liệu)	POST (Gửi dữ liệu)
 ## GET Lấy (đọc) dữ liệu từ server.	
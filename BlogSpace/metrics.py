@@ -0,0 +1,192 @@
+import bisect
+import logging
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from .cache import feed_cache, page_cache
+from .database import db
+from .database.engine import pool_stats, pool_status
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histogram kiểu Prometheus (bucket cộng dồn khi xuất) theo bộ label."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def collect(self):
+        with self._lock:
+            return [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+
+
+class Counter:
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, value: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def collect(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class RequestMetrics:
+    """Đo số query/thời gian DB của từng request và latency theo route.
+
+    Mỗi response có header `Server-Timing` (db, app); query chậm hơn SLOW_QUERY_MS
+    được log kèm endpoint; `/metrics` xuất mọi thứ theo định dạng text của
+    Prometheus. Số liệu nằm trong RAM của từng worker process.
+    """
+
+    def __init__(self):
+        self.slow_query_seconds = 0.2
+        self.server_timing = True
+        self.request_latency = Histogram()
+        self.requests = Counter()
+        self.sql_queries = Counter()
+        self.sql_seconds = Counter()
+        self.slow_queries = Counter()
+
+    def init_app(self, app):
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_MS', 200) / 1000
+        self.server_timing = app.config.get('SERVER_TIMING', True)
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(app.config.get('METRICS_PATH', '/metrics'), 'metrics', self.metrics_view)
+        app.extensions['request_metrics'] = self
+
+    # ---- SQLAlchemy ----
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        endpoint = None
+        if has_request_context():
+            endpoint = request.endpoint
+            g.sql_queries = g.get('sql_queries', 0) + 1
+            g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+        if elapsed >= self.slow_query_seconds:
+            self.slow_queries.inc((endpoint or '-',))
+            logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000, endpoint or '-',
+                           " ".join(statement.split())[:500])
+
+    # ---- Flask ----
+
+    def _before_request(self):
+        g.request_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        queries, sql_seconds = g.get('sql_queries', 0), g.get('sql_seconds', 0.0)
+        endpoint = request.endpoint or 'unmatched'
+
+        self.request_latency.observe((endpoint, request.method), elapsed)
+        self.requests.inc((endpoint, request.method, response.status_code))
+        self.sql_queries.inc((endpoint,), queries)
+        self.sql_seconds.inc((endpoint,), sql_seconds)
+
+        if self.server_timing:
+            response.headers.add('Server-Timing',
+                                 f'db;dur={sql_seconds * 1000:.2f};desc="{queries} queries", '
+                                 f'app;dur={(elapsed - sql_seconds) * 1000:.2f}')
+        return response
+
+    # ---- /metrics ----
+
+    def render(self) -> str:
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family('blogspace_request_duration_seconds', 'histogram', 'Request latency by endpoint.')
+        for labels, counts, total in sorted(self.request_latency.collect()):
+            base = _labels(('endpoint', 'method'), labels)
+            cumulative = 0
+            for bound, count in zip(self.request_latency.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'blogspace_request_duration_seconds_bucket{{{base},le="{le}"}} {cumulative}')
+            lines.append(f'blogspace_request_duration_seconds_sum{{{base}}} {total}')
+            lines.append(f'blogspace_request_duration_seconds_count{{{base}}} {cumulative}')
+
+        for name, counter, label_names, help_text in (
+            ('blogspace_requests_total', self.requests, ('endpoint', 'method', 'status'), 'Responses by status.'),
+            ('blogspace_sql_queries_total', self.sql_queries, ('endpoint',), 'SQL statements executed.'),
+            ('blogspace_sql_seconds_total', self.sql_seconds, ('endpoint',), 'Time spent in SQL.'),
+            ('blogspace_slow_queries_total', self.slow_queries, ('endpoint',), 'Queries slower than SLOW_QUERY_MS.'),
+        ):
+            family(name, 'counter', help_text)
+            for labels, value in sorted(counter.collect()):
+                lines.append(f'{name}{{{_labels(label_names, labels)}}} {value}')
+
+        caches = (('feed', feed_cache.pages.stats()), ('page', page_cache.pages.stats()))
+        for name, key, kind, help_text in (
+            ('blogspace_cache_hits_total', 'hits', 'counter', 'Cache lookups served from memory.'),
+            ('blogspace_cache_misses_total', 'misses', 'counter', 'Cache lookups that had to rebuild.'),
+            ('blogspace_cache_entries', 'size', 'gauge', 'Entries currently cached.'),
+        ):
+            family(name, kind, help_text)
+            for cache, stats in caches:
+                lines.append(f'{name}{{cache="{cache}"}} {stats[key]}')
+
+        checkout = pool_stats.stats()
+        family('blogspace_db_pool_checkouts_total', 'counter', 'Connections checked out of the pool.')
+        lines.append(f"blogspace_db_pool_checkouts_total {checkout['checkouts']}")
+        family('blogspace_db_pool_checkout_failures_total', 'counter', 'Checkouts that timed out or failed.')
+        lines.append(f"blogspace_db_pool_checkout_failures_total {checkout['failures']}")
+        family('blogspace_db_pool_checkout_wait_seconds', 'gauge', 'Checkout wait over the recent window.')
+        for key in ('avg', 'p95', 'p99', 'max'):
+            lines.append(f'blogspace_db_pool_checkout_wait_seconds{{stat="{key}"}} '
+                         f"{checkout[key + '_wait_ms'] / 1000}")
+
+        family('blogspace_db_pool_connections', 'gauge', 'Pool occupancy by state.')
+        for status in (pool_status(engine) for engine in db.engines.values()):
+            for state in ('size', 'checked_out', 'checked_in', 'overflow'):
+                if state in status:
+                    lines.append(f"blogspace_db_pool_connections{{{_labels(('engine', 'state'), (status['engine'], state))}}} "
+                                 f"{status[state]}")
+        return "\n".join(lines) + "\n"
+
+    def metrics_view(self):
+        return current_app.response_class(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+request_metrics = RequestMetrics()
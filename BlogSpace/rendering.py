@@ -0,0 +1,112 @@
+"""Render nội dung bài viết (Markdown) sang HTML an toàn, chạy một lần lúc ghi.
+
+Hỗ trợ cùng tập cú pháp với preview ở writezone.js: heading, **bold**, *italic*,
+`code`, link, ảnh, blockquote, list. Toàn bộ text được escape trước, chỉ các thẻ
+do renderer sinh ra mới xuất hiện trong output, và URL chỉ nhận http(s)/mailto
+hoặc đường dẫn tương đối, nên HTML lưu lại có thể in thẳng ra template.
+"""
+import re
+from markupsafe import escape
+
+_ALLOWED_SCHEMES = {"http", "https", "mailto"}
+_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.\-]*):")
+_CODE = re.compile(r"`([^`]+)`")
+_IMAGE = re.compile(r"!\[([^\]]*)\]\(([^)\s]+)\)")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC = re.compile(r"\*(.+?)\*")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^[-*]\s+(.*)$")
+_NUMBERED = re.compile(r"^\d+\.\s+(.*)$")
+# cú pháp Markdown bỏ đi khi lấy text thuần cho excerpt
+_MARKUP = re.compile(r"^\s*(#{1,6}|>|[-*]|\d+\.)\s+|[*`]", re.MULTILINE)
+# thẻ HTML gõ thẳng trong bài: render_markdown escape chúng, excerpt thì bỏ hẳn
+_TAG = re.compile(r"</?[a-zA-Z][^>]*>|<!--.*?-->", re.DOTALL)
+
+EXCERPT_LENGTH = 150
+WORDS_PER_MINUTE = 200
+
+
+def _safe_url(url: str) -> str:
+    # trình duyệt bỏ qua ký tự điều khiển/khoảng trắng trong scheme ("java\tscript:")
+    url = re.sub(r"[\x00-\x20]", "", url)
+    match = _SCHEME.match(url)
+    if match and match.group(1).lower() not in _ALLOWED_SCHEMES:
+        return "#"
+    return url
+
+
+def _inline(text: str) -> str:
+    text = str(escape(text.replace("\x00", "")))
+    # tách code span ra trước để ** / * bên trong không bị hiểu là định dạng
+    codes = []
+
+    def stash_code(match):
+        codes.append(f"<code>{match.group(1)}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+
+    text = _CODE.sub(stash_code, text)
+    text = _IMAGE.sub(lambda m: f'<img src="{_safe_url(m.group(2))}" alt="{m.group(1)}" loading="lazy">', text)
+    text = _LINK.sub(lambda m: f'<a href="{_safe_url(m.group(2))}" target="_blank" '
+                               f'rel="noopener noreferrer nofollow">{m.group(1)}</a>', text)
+    text = _BOLD.sub(r"<strong>\1</strong>", text)
+    text = _ITALIC.sub(r"<em>\1</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: codes[int(m.group(1))], text)
+
+
+def _list(tag, pattern, lines):
+    items = []
+    for line in lines:
+        match = pattern.match(line)
+        if match:
+            items.append(f"<li>{_inline(match.group(1))}</li>")
+        elif items:
+            # dòng tiếp nối của item trước
+            items[-1] = items[-1][:-5] + "<br>" + _inline(line) + "</li>"
+    return f"<{tag}>{''.join(items)}</{tag}>"
+
+
+def render_markdown(text: str | None) -> str:
+    if not text:
+        return ""
+    html = []
+    for block in re.split(r"\n\s*\n", text.replace("\r\n", "\n")):
+        lines = [line.strip() for line in block.strip().split("\n")]
+        if not lines[0]:
+            continue
+        if _HEADING.match(lines[0]):
+            for line in lines:
+                match = _HEADING.match(line)
+                if match:
+                    level = len(match.group(1))
+                    html.append(f"<h{level}>{_inline(match.group(2))}</h{level}>")
+                else:
+                    html.append(f"<p>{_inline(line)}</p>")
+        elif lines[0].startswith(">"):
+            quoted = [re.sub(r"^>\s?", "", line) for line in lines]
+            html.append(f"<blockquote>{'<br>'.join(_inline(line) for line in quoted)}</blockquote>")
+        elif _BULLET.match(lines[0]):
+            html.append(_list("ul", _BULLET, lines))
+        elif _NUMBERED.match(lines[0]):
+            html.append(_list("ol", _NUMBERED, lines))
+        else:
+            html.append(f"<p>{'<br>'.join(_inline(line) for line in lines)}</p>")
+    return "\n".join(html)
+
+
+def summarize(text: str | None) -> dict:
+    """excerpt (text thuần, cắt theo từ), word_count, reading_time (phút) của bài.
+
+    Tính lúc ghi cùng content_html để các trang danh sách không phải đọc content.
+    excerpt là text, không phải HTML: nơi hiển thị vẫn phải escape (feed JS, search).
+    """
+    plain = _IMAGE.sub("", text or "")
+    plain = _LINK.sub(r"\1", plain)
+    plain = _TAG.sub(" ", plain)
+    plain = " ".join(_MARKUP.sub("", plain).split())
+    words = len(plain.split())
+    excerpt = plain
+    if len(plain) > EXCERPT_LENGTH:
+        excerpt = plain[:EXCERPT_LENGTH].rsplit(" ", 1)[0].rstrip(".,;:") + "..."
+    return {'excerpt': excerpt, 'word_count': words,
+            'reading_time': max(1, -(-words // WORDS_PER_MINUTE))}
@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HashingBusy(RuntimeError):
+    """Hàng đợi hash mật khẩu đã đầy quá thời gian cho phép."""
+
+
+class PasswordHasher:
+    """Chạy hash/verify mật khẩu trong một thread pool có giới hạn.
+
+    PBKDF2/scrypt của hashlib nhả GIL, nên pool giới hạn số phép hash chạy cùng
+    lúc; request vượt quá `max_pending` chờ tối đa `queue_timeout` giây rồi nhận
+    HashingBusy (503) thay vì giữ worker đến khi cả loạt login xử lý xong.
+    """
+
+    def __init__(self, method: str = "scrypt:32768:8:1", workers: int = 2,
+                 max_pending: int = 16, queue_timeout: float = 2.0):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def init_app(self, app):
+        self.method = app.config.get("AUTH_PASSWORD_METHOD", self.method)
+        self.queue_timeout = app.config.get("AUTH_HASH_QUEUE_TIMEOUT", self.queue_timeout)
+        workers = app.config.get("AUTH_HASH_WORKERS", self.workers)
+        max_pending = app.config.get("AUTH_HASH_MAX_PENDING", self.max_pending)
+        if (workers, max_pending) != (self.workers, self.max_pending):
+            self._executor.shutdown(wait=False)
+            self.workers, self.max_pending = workers, max_pending
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+            self._slots = threading.BoundedSemaphore(max_pending)
+        app.extensions["password_hasher"] = self
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise HashingBusy()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        # werkzeug lưu "method$salt$hash"; method đổi (vd. tăng cost) thì hash lại khi login
+        return password_hash.split("$", 1)[0] != self.method
+
+
+class TokenBucket:
+    """Token bucket theo key (IP, email...), giữ tối đa `max_keys` key gần nhất trong RAM."""
+
+    def __init__(self, capacity: float = 5, refill_per_second: float = 5 / 60, max_keys: int = 10000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, tokens: float = 1) -> tuple[bool, float]:
+        """Trả về (được phép, số giây cần chờ nếu bị chặn)."""
+        now = time.monotonic()
+        with self._lock:
+            available, updated = self._buckets.pop(key, (self.capacity, now))
+            available = min(self.capacity, available + (now - updated) * self.refill_per_second)
+            allowed = available >= tokens
+            if allowed:
+                available -= tokens
+            self._buckets[key] = (available, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        if allowed:
+            return True, 0.0
+        return False, (tokens - available) / self.refill_per_second
+
+    def wait(self, key, tokens: float = 1) -> float:
+        """Số giây tới khi có đủ `tokens` cho key (0 = có ngay), không tiêu token."""
+        now = time.monotonic()
+        with self._lock:
+            available, updated = self._buckets.get(key, (self.capacity, now))
+        available = min(self.capacity, available + (now - updated) * self.refill_per_second)
+        return 0.0 if available >= tokens else (tokens - available) / self.refill_per_second
+
+
+class LoginThrottle:
+    def __init__(self):
+        self.by_ip = TokenBucket(capacity=20, refill_per_second=20 / 60)
+        self.by_email = TokenBucket(capacity=5, refill_per_second=5 / 60)
+
+    def init_app(self, app):
+        self.by_ip = TokenBucket(app.config.get("LOGIN_IP_BURST", 20),
+                                 app.config.get("LOGIN_IP_PER_MINUTE", 20) / 60)
+        self.by_email = TokenBucket(app.config.get("LOGIN_EMAIL_BURST", 5),
+                                    app.config.get("LOGIN_EMAIL_PER_MINUTE", 5) / 60)
+        app.extensions["login_throttle"] = self
+
+    def check(self, ip: str, email: str) -> float:
+        """0 nếu được phép thử đăng nhập, ngược lại là số giây phải chờ.
+
+        Mỗi lần thử tốn một token của IP; bucket theo email chỉ bị trừ khi sai
+        mật khẩu (`failed`), nên user đăng nhập đúng nhiều lần không tự khóa mình.
+        """
+        ok, wait = self.by_ip.consume(ip)
+        if not ok:
+            return wait
+        return self.by_email.wait(self._email_key(email))
+
+    def failed(self, email: str):
+        self.by_email.consume(self._email_key(email))
+
+    @staticmethod
+    def _email_key(email: str) -> str:
+        return (email or "").strip().lower()
+
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
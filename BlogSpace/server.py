@@ -0,0 +1,52 @@
+"""Hook chạy app dưới gunicorn (gọi từ gunicorn.conf.py).
+
+Với preload_app, master import và tạo app một lần, worker fork ra dùng chung
+bytecode, template đã compile và mapper đã configure (copy-on-write). Những thứ
+không được dùng chung qua fork là connection: `after_fork` bỏ connection pool kế
+thừa (dispose(close=False) không đóng socket của process cha). Các thread nền
+(counter flush, job worker, trending, comment poller) tự khởi động lại theo pid.
+"""
+import logging
+import time
+from sqlalchemy.orm import configure_mappers
+from .database import db
+from .streams import comment_broker
+
+logger = logging.getLogger(__name__)
+
+
+def prepare(app) -> dict:
+    """Việc không đụng DB, làm một lần ở master trước fork: compile template, configure mapper."""
+    started = time.perf_counter()
+    templates = 0
+    for name in app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html')):
+        app.jinja_env.get_template(name)
+        templates += 1
+    configure_mappers()
+    return {'templates': templates, 'ms': round((time.perf_counter() - started) * 1000, 1)}
+
+
+def after_fork(app):
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+
+def limit_streams(app, threads: int):
+    # gthread: mỗi SSE stream chiếm một thread, chừa một nửa cho request thường
+    comment_broker.max_streams = min(comment_broker.max_streams, max(1, threads // 2))
+
+
+def warmup(app) -> dict:
+    """Gọi thử WARMUP_PATHS trong worker: nạp pool connection, cache feed/trending, statement cache."""
+    report = {'prepare': prepare(app), 'paths': {}}
+    client = app.test_client()
+    for path in app.config.get('WARMUP_PATHS', ()):
+        started = time.perf_counter()
+        try:
+            status = client.get(path).status_code
+        except Exception:
+            logger.exception("Warmup request %s failed", path)
+            status = None
+        report['paths'][path] = {'status': status, 'ms': round((time.perf_counter() - started) * 1000, 1)}
+    return report
@@ -1,31 +1,240 @@
-from flask import Blueprint, request, current_app
-from werkzeug.utils import secure_filename
+from flask import Blueprint, request, current_app, abort, url_for
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename, send_from_directory
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import logging
+import mimetypes
 import os
+import re
+import threading
 import uuid
+from ...cache import feed_cache
+from ...jobs import job_queue
 
 upload_bp = Blueprint('upload', __name__)
 
 ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "gif", "webp"}
 
+# Tên variant -> chiều rộng tối đa (px)
+IMAGE_VARIANTS = {"thumbnail": 320, "card": 800, "full": 1600}
+VARIANT_FORMATS = ("webp", "jpg")
+
+CHUNK_SIZE = 64 * 1024
+
+# Tên file theo nội dung (save_image: đủ 64 hex của sha256) -> URL không bao giờ đổi
+# nội dung, cache vĩnh viễn được. Tên cũ uuid4().hex chỉ 32 hex nên không khớp.
+CONTENT_ADDRESSED = re.compile(r"(^|/)[0-9a-f]{64}(_(%s))?\.\w+$" % "|".join(IMAGE_VARIANTS))
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+logger = logging.getLogger(__name__)
+
 
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
 def save_image(file, user_id: int) -> str | None:
+    """Lưu ảnh upload theo nội dung (sha256) và đẩy việc tạo variant ra process pool.
+
+    File được stream xuống đĩa theo từng chunk đồng thời với việc hash, nên không
+    giữ cả file trong RAM. Ảnh trùng nội dung của cùng user dùng lại file cũ.
+    """
     if not file or file.filename == "":
         return None
 
     if not allowed_file(file.filename):
-        return None  
+        return None
 
     ext = file.filename.rsplit(".", 1)[1].lower()
-    unique_name = f"{uuid.uuid4().hex}.{ext}"
+    if ext == "jpeg":
+        ext = "jpg"
 
     user_folder = os.path.join(current_app.config["UPLOAD_FOLDER"], f"user_{user_id}")
     os.makedirs(user_folder, exist_ok=True)
 
-    path = os.path.join(user_folder, unique_name)
-    file.save(path)
-    
-    return f"uploads/user_{user_id}/{unique_name}"
+    tmp_path = os.path.join(user_folder, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+
+        name = digest.hexdigest()
+        path = os.path.join(user_folder, f"{name}.{ext}")
+        duplicate = os.path.exists(path)
+        if duplicate:
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if not duplicate:
+        image_pipeline.submit(path)
+    return f"uploads/user_{user_id}/{name}.{ext}"
+
+
+def variant_relpath(image_path: str, size: str, fmt: str = "webp") -> str:
+    stem = image_path.rsplit(".", 1)[0]
+    return f"{stem}_{size}.{fmt}"
+
+
+def image_variant(image_path: str | None, size: str, fmt: str = "webp") -> str | None:
+    """Đường dẫn (tương đối với /static) của variant `size`, hoặc ảnh gốc nếu variant chưa có."""
+    if not image_path or size not in IMAGE_VARIANTS or not image_path.startswith("uploads/"):
+        return image_path
+
+    relpath = variant_relpath(image_path, size, fmt)
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+    if os.path.exists(os.path.join(upload_folder, relpath[len("uploads/"):])):
+        return relpath
+    return image_path
+
+
+def upload_url(image_path: str | None) -> str | None:
+    """"uploads/user_1/x.webp" -> URL của route phục vụ upload ("/media/user_1/x.webp")."""
+    if not image_path or not image_path.startswith("uploads/"):
+        return image_path
+    return url_for("upload.serve_upload", filename=image_path[len("uploads/"):])
+
+
+@upload_bp.route("/media/<path:filename>")
+def serve_upload(filename):
+    """Phục vụ ảnh upload với cache header dài hạn.
+
+    Request có điều kiện (If-None-Match / If-Modified-Since) và Range do werkzeug xử lý.
+    Nếu UPLOAD_OFFLOAD được bật, chỉ trả header để proxy phía trước (nginx
+    X-Accel-Redirect hoặc X-Sendfile của Apache/lighttpd) tự gửi file, worker Python
+    không phải đọc byte nào.
+    """
+    upload_folder = current_app.config["UPLOAD_FOLDER"]
+    if not allowed_file(filename):
+        abort(404)
+
+    max_age = current_app.config.get("UPLOAD_MAX_AGE", 3600)
+    immutable = bool(CONTENT_ADDRESSED.search(filename))
+    if immutable:
+        max_age = IMMUTABLE_MAX_AGE
+
+    offload = current_app.config.get("UPLOAD_OFFLOAD")
+    if offload == "x-accel-redirect":
+        path = safe_join(upload_folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = current_app.response_class()
+        response.headers["X-Accel-Redirect"] = (
+            f"{current_app.config.get('UPLOAD_ACCEL_PREFIX', '/_uploads')}/{filename}"
+        )
+        response.content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    else:
+        response = send_from_directory(
+            upload_folder, filename, request.environ,
+            use_x_sendfile=(offload == "x-sendfile"), max_age=max_age, conditional=True,
+            response_class=current_app.response_class,
+        )
+
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def generate_variants(path: str, quality: int = 80) -> list[str]:
+    """Tạo các variant WebP/JPEG đã resize cho ảnh `path`; chạy trong process pool."""
+    from PIL import Image, ImageOps
+
+    stem = path.rsplit(".", 1)[0]
+    created = []
+    with Image.open(path) as source:
+        source = ImageOps.exif_transpose(source)
+        if source.mode not in ("RGB", "RGBA"):
+            source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+        for size, max_width in IMAGE_VARIANTS.items():
+            image = source.copy()
+            if image.width > max_width:
+                image.thumbnail((max_width, max_width * 4), Image.LANCZOS)
+
+            for fmt in VARIANT_FORMATS:
+                target = f"{stem}_{size}.{fmt}"
+                if os.path.exists(target):
+                    continue
+                tmp_target = f"{target}.{uuid.uuid4().hex}.part"
+                if fmt == "webp":
+                    image.save(tmp_target, "WEBP", quality=quality, method=4)
+                else:
+                    image.convert("RGB").save(tmp_target, "JPEG", quality=quality,
+                                              optimize=True, progressive=True)
+                os.replace(tmp_target, target)
+                created.append(target)
+    return created
+
+
+class ImagePipeline:
+    """Tạo variant ảnh ngoài request thread.
+
+    save_image chỉ enqueue một job bền vững ('images.generate_variants'); worker
+    của job queue chạy generate_variants trong process pool (tạo lazily theo
+    process, an toàn với gunicorn fork). IMAGE_PIPELINE_WORKERS = 0 thì tạo
+    variant ngay trong request (dùng khi test).
+    """
+
+    def __init__(self, workers: int = 2, quality: int = 80):
+        self.workers = workers
+        self.quality = quality
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.workers = app.config.get("IMAGE_PIPELINE_WORKERS", self.workers)
+        self.quality = app.config.get("IMAGE_QUALITY", self.quality)
+        app.extensions["image_pipeline"] = self
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, path: str):
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            logger.warning("Pillow is not installed; serving %s without variants", path)
+            return None
+
+        if self.workers <= 0:
+            try:
+                created = generate_variants(path, self.quality)
+            except Exception:
+                logger.exception("Generating image variants for %s failed", path)
+                return None
+            feed_cache.bump()
+            return created
+
+        return job_queue.enqueue("images.generate_variants", path=path)
+
+    def generate(self, path: str) -> list[str]:
+        """Chạy generate_variants trong process pool và chờ kết quả (gọi từ job worker)."""
+        if self.workers <= 0:
+            return generate_variants(path, self.quality)
+        return self._get_executor().submit(generate_variants, path, self.quality).result()
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+image_pipeline = ImagePipeline()
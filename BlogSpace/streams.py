@@ -0,0 +1,251 @@
+"""Pub/sub cho comment realtime (Server-Sent Events).
+
+Mỗi stream mở `/usr/blog/<id>/comments/stream` là một Subscriber có hàng đợi
+riêng; `CommentBroker.publish_comment` (gọi sau khi comment được commit) đọc
+comment một lần, format thành message SSE một lần rồi đẩy vào hàng đợi của mọi
+subscriber của blog đó. Event id là id comment: client nối lại với Last-Event-ID
+đọc các comment có id lớn hơn, cộng các comment tạo trong `lookback` giây gần
+nhất (id do sequence cấp lúc INSERT, transaction giữ id nhỏ có thể commit sau id
+lớn hơn). Giao ít nhất một lần: client bỏ comment trùng theo id.
+
+Comment ghi ở worker khác: publish còn bump file version (như feed cache), thread
+poll của mỗi worker có subscriber thấy version đổi thì đọc lại các comment tạo
+trong `lookback` giây của những blog đang được nghe; `_sent` bỏ các comment đã
+fan-out. Subscriber đọc chậm làm đầy hàng đợi thì bị đóng
+stream; EventSource tự nối lại và lấy phần thiếu qua Last-Event-ID.
+
+Mỗi stream giữ một thread (gthread) hoặc greenlet (gevent) suốt thời gian mở,
+nên số stream mỗi worker bị giới hạn bởi COMMENT_STREAM_MAX_PER_WORKER.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from .cache import ContentVersion, LRUCache
+from .database import db
+from .database.models.blog_model import BlogComment
+from .database.models.user_model import User
+
+
+class StreamLimitReached(Exception):
+    pass
+
+
+def _format(event_id, name, data) -> str:
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+def _comment_rows(where, limit=None):
+    parent = aliased(BlogComment)
+    query = (
+        select(BlogComment.id, BlogComment.blog_id, BlogComment.parent_id, BlogComment.content,
+               BlogComment.total_likes, BlogComment.reply_count, BlogComment.created_at,
+               User.username, parent.reply_count.label('parent_reply_count'))
+        .outerjoin(User, User.id == BlogComment.user_id)
+        .outerjoin(parent, parent.id == BlogComment.parent_id)
+        .where(where)
+        .order_by(BlogComment.id)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return db.session.execute(query).all()
+
+
+def _messages(row) -> str:
+    """Message SSE của một comment: 'comment', kèm 'reply_count' của comment cha nếu là reply."""
+    comment = {
+        'id': row.id,
+        'content': row.content,
+        'author': row.username or 'Unknown',
+        'total_likes': row.total_likes,
+        'created_at': row.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        'reply_count': row.reply_count,
+    }
+    if row.parent_id is None:
+        return _format(row.id, 'comment', comment)
+    comment['parent_id'] = row.parent_id
+    return (_format(row.id, 'comment', comment)
+            + _format(row.id, 'reply_count', {'id': row.parent_id, 'reply_count': row.parent_reply_count}))
+
+
+class Subscriber:
+    def __init__(self, blog_id: int, maxsize: int):
+        self.blog_id = blog_id
+        self.messages = queue.Queue(maxsize)
+        self.overflowed = False
+        self.opened_at = time.monotonic()
+
+
+class CommentBroker:
+    def __init__(self):
+        self.app = None
+        self.version = ContentVersion()
+        self.max_streams = 100
+        self.queue_size = 100
+        self.heartbeat = 15.0
+        self.max_seconds = 300.0
+        self.replay_limit = 100
+        self.poll_interval = 1.0
+        self.lookback = 30.0
+        self.published = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.polls = 0
+        self._subscribers = {}  # blog_id -> set[Subscriber]
+        self._count = 0
+        self._lock = threading.Lock()
+        self._sent = LRUCache(4096)  # id comment đã fan-out, tránh gửi lại khi poll
+        self._poller_pid = None
+        self._polled_version = None
+
+    def init_app(self, app):
+        self.app = app
+        os.makedirs(app.instance_path, exist_ok=True)
+        self.version = ContentVersion(os.path.join(app.instance_path, 'comments.version'))
+        self.max_streams = app.config.get('COMMENT_STREAM_MAX_PER_WORKER', self.max_streams)
+        self.queue_size = app.config.get('COMMENT_STREAM_QUEUE_SIZE', self.queue_size)
+        self.heartbeat = app.config.get('COMMENT_STREAM_HEARTBEAT', self.heartbeat)
+        self.max_seconds = app.config.get('COMMENT_STREAM_MAX_SECONDS', self.max_seconds)
+        self.replay_limit = app.config.get('COMMENT_STREAM_REPLAY_LIMIT', self.replay_limit)
+        self.poll_interval = app.config.get('COMMENT_STREAM_POLL_INTERVAL', self.poll_interval)
+        self.lookback = app.config.get('COMMENT_STREAM_LOOKBACK_SECONDS', self.lookback)
+        app.extensions['comment_broker'] = self
+
+    # ---- subscriber ----
+
+    def subscribe(self, blog_id: int) -> Subscriber:
+        with self._lock:
+            if self._count >= self.max_streams:
+                self.rejected += 1
+                raise StreamLimitReached(f"{self._count} comment streams open in this worker")
+            subscriber = Subscriber(blog_id, self.queue_size)
+            self._subscribers.setdefault(blog_id, set()).add(subscriber)
+            self._count += 1
+        self._ensure_poller()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.blog_id)
+            if subscribers is None or subscriber not in subscribers:
+                return
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.blog_id]
+            self._count -= 1
+
+    def _recent(self):
+        # created_at của comment là utcnow lúc INSERT (xem BlogComment)
+        return BlogComment.created_at >= datetime.utcnow() - timedelta(seconds=self.lookback)
+
+    def replay(self, blog_id: int, last_id: int) -> tuple[str, set, bool]:
+        """Message của các comment id > last_id (và comment mới tạo trong lookback), id của chúng,
+        và False nếu số comment id > last_id vượt replay_limit."""
+        rows = _comment_rows((BlogComment.blog_id == blog_id) & (BlogComment.id > last_id),
+                             limit=self.replay_limit + 1)
+        if len(rows) > self.replay_limit:
+            return '', set(), False
+        # id nhỏ hơn last_id nhưng commit muộn: best effort, không tính vào replay_limit
+        # (blog nhiều comment trong cửa sổ sẽ khiến client reset mãi)
+        late = _comment_rows((BlogComment.blog_id == blog_id) & (BlogComment.id <= last_id) & self._recent(),
+                             limit=self.replay_limit)
+        rows = late + rows
+        return ''.join(_messages(row) for row in rows), {row.id for row in rows}, True
+
+    def stream(self, subscriber: Subscriber, backlog: str = '', replayed: set = frozenset()):
+        """Generator message SSE cho một subscriber (không đụng DB)."""
+        yield f"retry: 3000\n\n{backlog}"
+        # id đã gửi trên stream này (backlog + live): comment có thể tới lẫn thứ tự id
+        sent = set(replayed)
+        deadline = subscriber.opened_at + self.max_seconds
+        while not subscriber.overflowed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return  # client tự nối lại, worker được nhả thread định kỳ
+            try:
+                event_id, message = subscriber.messages.get(timeout=min(self.heartbeat, remaining))
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            if event_id not in sent:
+                sent.add(event_id)
+                yield message
+
+    # ---- publish ----
+
+    def publish_comment(self, blog_id: int, comment_id: int):
+        """Gọi sau khi comment đã commit: fan-out trong worker, báo worker khác qua version."""
+        if self._listening(blog_id):
+            for row in _comment_rows(BlogComment.id == comment_id):
+                self._fan_out(row)
+        self.version.bump()
+
+    def _listening(self, blog_id=None) -> bool:
+        with self._lock:
+            return bool(self._subscribers if blog_id is None else self._subscribers.get(blog_id))
+
+    def _fan_out(self, row):
+        if self._sent.get(row.id) is not None:
+            return
+        self._sent.set(row.id, True)
+        message = (row.id, _messages(row))
+        with self._lock:
+            subscribers = list(self._subscribers.get(row.blog_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.messages.put_nowait(message)
+            except queue.Full:
+                subscriber.overflowed = True
+                self.dropped += 1
+        self.published += 1
+
+    # ---- comment từ worker khác ----
+
+    def _ensure_poller(self):
+        # thread không sống qua fork: mỗi worker tự khởi động poller của mình
+        if self.app is None or self._poller_pid == os.getpid():
+            return
+        with self._lock:
+            if self._poller_pid == os.getpid():
+                return
+            self._poller_pid = os.getpid()
+            self._polled_version = None  # poll đầu tiên luôn đọc cửa sổ lookback
+        threading.Thread(target=self._poll_loop, name='comment-broker', daemon=True).start()
+
+    def _poll_loop(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self._poll()
+            except Exception:
+                self.app.logger.exception("Comment stream poll failed")
+
+    def _poll(self):
+        if not self._listening():
+            return
+        version = self.version.get()
+        if version == self._polled_version:
+            return
+        with self._lock:
+            blog_ids = list(self._subscribers)
+        # theo created_at chứ không theo id lớn nhất đã thấy: comment commit muộn
+        # với id nhỏ hơn vẫn nằm trong cửa sổ; comment đã fan-out bị `_sent` bỏ qua
+        with self.app.app_context():
+            for row in _comment_rows(self._recent() & BlogComment.blog_id.in_(blog_ids)):
+                self._fan_out(row)
+        self._polled_version = version
+        self.polls += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            blogs, streams = len(self._subscribers), self._count
+        return {'streams': streams, 'blogs': blogs, 'max_streams': self.max_streams,
+                'published': self.published, 'dropped': self.dropped,
+                'rejected': self.rejected, 'polls': self.polls, 'version': self.version.get()}
+
+
+comment_broker = CommentBroker()
@@ -0,0 +1,41 @@
+import logging
+from sqlalchemy import func, select, update
+from .jobs import job_queue
+from .cache import feed_cache
+from .database import db
+from .database.models.blog_model import BlogComment, BlogStats
+from .database.reconcile import reconcile_stats
+from .database.trending import trending
+from .static.uploads import image_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Các side-effect chậm được đẩy ra khỏi request; handler chạy trong app context của worker
+
+
+@job_queue.task('images.generate_variants', queue='images', max_attempts=3)
+def generate_image_variants(path):
+    if image_pipeline.generate(path):
+        # Feed đã cache đường dẫn ảnh gốc -> build lại để dùng variant
+        feed_cache.bump()
+
+
+@job_queue.task('stats.comment_added', queue='stats')
+def comment_added(blog_id):
+    # Đếm lại thay vì +1: job chạy lại (retry) hay chạy sau reconcile cũng không lệch
+    db.session.execute(
+        update(BlogStats)
+        .where(BlogStats.blog_id == blog_id)
+        .values(total_comments=select(func.count()).select_from(BlogComment)
+                .where(BlogComment.blog_id == blog_id).scalar_subquery())
+        .execution_options(synchronize_session=False)
+    )
+    entries = trending.rescore(db.session.connection(), [blog_id])
+    db.session.commit()
+    trending.offer(entries)
+
+
+@job_queue.task('stats.reconcile', queue='stats', max_attempts=1)
+def reconcile(chunk_size=1000):
+    report = reconcile_stats(chunk_size=chunk_size)
+    logger.info("Reconciled blog stats: %s", report)
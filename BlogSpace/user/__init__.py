@@ -1,10 +1,21 @@
-from flask import Blueprint, render_template, session, redirect, url_for, request, current_app, jsonify, abort
-from ..database.repository.blog_repo import BlogService, BlogCommentService
-from ..static.uploads import save_image
+from flask import Blueprint, Response, render_template, session, redirect, url_for, request, current_app, jsonify, abort
+from ..database.repository.blog_repo import BlogService, BlogCommentService, BlogStatsService
+from ..database.pagination import InvalidCursor, clamp_page_size
+from ..static.uploads import save_image, image_variant, upload_url
+from ..cache import page_cache
+from ..streams import StreamLimitReached, comment_broker
+from ..rendering import render_markdown
+from markupsafe import Markup
+import time
 
 
 blog_service = BlogService()
 blog_comment_service = BlogCommentService()
+blog_stats_service = BlogStatsService()
+
+MAX_COMMENT_DEPTH = 10
+MAX_LIKED_LOOKUP = 100
+BLOG_STATUSES = ('published', 'draft')
 
 user_bp = Blueprint('user', __name__,  static_folder='static', template_folder='templates', url_prefix='/usr')
 
@@ -23,25 +34,88 @@ def read_zone():
 
 @user_bp.route('/blog/<int:blog_id>')
 def blog_detail(blog_id : int):
-    blog = blog_service.get(blog_id)
-    if not blog:
+    updated_at = blog_service.updated_at(blog_id)
+    if updated_at is None:
         abort(404)
 
+    blog_stats_service.increment_view(blog_id, _viewer_key())
+
+    # Trang chỉ đổi khi bài được sửa -> cache HTML theo (blog_id, updated_at, người xem)
+    viewer = session.get('username')
+    return page_cache.get_or_render((blog_id, updated_at, viewer), lambda: _render_blog_detail(blog_id, updated_at))
+
+
+def _viewer_key():
+    # user đăng nhập đếm theo tài khoản; khách theo IP + user agent (không cần cookie,
+    # bot không giữ session cũng chỉ tính một lần). Sau proxy cần TRUSTED_PROXY_HOPS,
+    # nếu không mọi khách có chung IP của proxy
+    user_id = session.get('user_id')
+    if user_id:
+        return f"u:{user_id}"
+    return f"a:{request.remote_addr}|{request.user_agent.string}"
+
+
+def _render_blog_detail(blog_id, updated_at=None):
+    blog = blog_service.get_detail(blog_id)
+    if not blog:
+        return None, False
+
+    featured_image = image_variant(blog.featured_image_path, 'full')
+    # Variant chưa tạo xong thì chưa cache, tránh giữ URL ảnh gốc cho tới lần sửa sau
+    cacheable = not blog.featured_image_path or featured_image != blog.featured_image_path
+    # get_detail có thể đọc từ replica còn trễ: bản cũ hơn key thì không cache
+    cacheable = cacheable and (updated_at is None or blog.updated_at == updated_at)
+
     # Prepare a lightweight dict to pass to template
     blog_data = {
         'id': blog.id,
         'title': blog.title,
-        'content': blog.content or '',
+        'content_html': Markup(blog.content_html if blog.content_html is not None
+                               else render_markdown(blog.content)),
         'excerpt': (blog.seo_description or '')[:200],
         'author_name': getattr(blog.author, 'username', 'Unknown'),
         'category': blog.category,
         'tags': (blog.tags.split(',') if blog.tags else []),
-        'featured_image': blog.featured_image_path,
+        'featured_image': upload_url(featured_image),
         'created_at': blog.created_at.strftime('%b %d, %Y') if getattr(blog, 'created_at', None) else '',
         'current_user': session.get('username')
     }
 
-    return render_template('blog_detail.html', blog_data=blog_data)
+    return render_template('blog_detail.html', blog_data=blog_data), cacheable
+
+@user_bp.route('/blog/<int:blog_id>/like', methods = ['POST', 'DELETE'])
+def blog_like(blog_id : int):
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'success': False, 'error': 'Login required'}), 401
+    if blog_service.updated_at(blog_id) is None:
+        return jsonify({'success': False, 'error': 'Post not found'}), 404
+
+    liked = request.method == 'POST'
+    new_stamp = time.time_ns()
+    changed, likes = blog_stats_service.set_liked(user_id, blog_id, liked,
+                                                  session.get('likes_stamp'), new_stamp)
+    if changed:
+        # stamp mới trong session: worker nào cũng biết set like đã cache của user này đã cũ
+        session['likes_stamp'] = new_stamp
+    return jsonify({'success': True, 'liked': liked, 'likes': likes or 0}), 200
+
+
+@user_bp.route('/blog/liked', methods = ['GET'])
+def blog_liked():
+    """?ids=1,2,3 -> các id user hiện tại đã like (một lookup cho cả trang feed)."""
+    try:
+        blog_ids = {int(i) for i in request.args.get('ids', '').split(',') if i.strip()}
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Invalid ids'}), 400
+    if len(blog_ids) > MAX_LIKED_LOOKUP:
+        return jsonify({'success': False, 'error': f'At most {MAX_LIKED_LOOKUP} ids'}), 400
+
+    user_id = session.get('user_id')
+    liked = (blog_stats_service.liked_among(user_id, blog_ids, session.get('likes_stamp'))
+             if user_id else set())
+    return jsonify({'success': True, 'liked': sorted(liked)}), 200
+
 
 @user_bp.route('/blog/<int:blog_id>/comments', methods = ['GET'])
 def blog_comment(blog_id : int):
@@ -50,22 +124,68 @@ def blog_comment(blog_id : int):
     if not blog:
         return jsonify({'success': False, 'error': 'Post not found'}), 404
 
-    root_comments = blog_comment_service.get_blog_comments(blog_id = blog_id)
+    depth = min(max(request.args.get('depth', 1, type=int), 1), MAX_COMMENT_DEPTH)
+    root_comments = blog_comment_service.get_comment_tree(blog_id = blog_id, depth = depth)
     
-    comments_data = []
-    for comment in root_comments:
-        comments_data.append({
-            'id': comment.id,
-            'content': comment.content,
-            'author': comment.user.username, # Lấy từ relationship user
-            'created_at': comment.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            'total_likes': comment.total_likes,
-            'reply_count': comment.replies.count() # Đếm số reply của comment này
-        })
+    comments_data = [_comment_to_dict(comment, children, depth > 1)
+                     for comment, children in root_comments]
 
     return jsonify({'success': True, 'comments': comments_data}), 200
 
 
+@user_bp.route('/blog/<int:blog_id>/comments/stream', methods = ['GET'])
+def blog_comment_stream(blog_id : int):
+    if blog_service.updated_at(blog_id) is None:
+        return jsonify({'success': False, 'error': 'Post not found'}), 404
+
+    # EventSource gửi Last-Event-ID khi nối lại; lần đầu client truyền id comment mới nhất đã tải
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = request.args.get('last_event_id', type=int)
+
+    try:
+        # subscribe trước khi replay để không lọt comment mới giữa hai bước
+        subscriber = comment_broker.subscribe(blog_id)
+    except StreamLimitReached:
+        return jsonify({'success': False, 'error': 'Too many open streams'}), 503, {'Retry-After': '5'}
+
+    backlog, replayed, complete = '', set(), True
+    if last_id is not None:
+        try:
+            backlog, replayed, complete = comment_broker.replay(blog_id, last_id)
+        except Exception:
+            # không để subscriber mồ côi chiếm chỗ trong giới hạn stream của worker
+            comment_broker.unsubscribe(subscriber)
+            raise
+    if not complete:
+        # lỡ quá nhiều comment: client tải lại /comments rồi mở stream mới
+        comment_broker.unsubscribe(subscriber)
+        return Response("retry: 3000\n\nevent: reset\ndata: {}\n\n", mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+
+    response = Response(comment_broker.stream(subscriber, backlog, replayed),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(lambda: comment_broker.unsubscribe(subscriber))
+    return response
+
+
+def _comment_to_dict(comment, children, nested):
+    data = {
+        'id': comment.id,
+        'content': comment.content,
+        'author': comment.user.username if comment.user else 'Unknown', # user đã được join sẵn
+        'total_likes': comment.total_likes,
+        'created_at': comment.created_at.strftime("%Y-%m-%d %H:%M:%S"),
+        'reply_count': comment.reply_count
+    }
+    if comment.parent_id is not None:
+        data['parent_id'] = comment.parent_id
+    if nested:
+        data['replies'] = [_comment_to_dict(c, sub, True) for c, sub in children]
+    return data
+
+
 
 @user_bp.route('/blog/<int:blog_id>/update_comment', methods = ['POST'])
 def comment_update(blog_id : int):
@@ -102,7 +222,7 @@ def comment_update(blog_id : int):
                 'parent_id': new_comment.parent_id,
                 'total_likes': new_comment.total_likes,
                 'created_at': new_comment.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                'reply_count' : new_comment.replies.count()
+                'reply_count' : new_comment.reply_count
 
             }
         }), 201
@@ -116,17 +236,10 @@ def get_replies(parent_id : int):
     if not parent:
         return jsonify({'success': False, 'error': 'Comment not found'}), 404
     
-    replies_data = []
-    for r in parent.replies: # parent.replies là dynamic query
-        replies_data.append({
-            'id': r.id,
-            'content': r.content,
-            'author': session.get('username', 'User'),
-            'parent_id': r.parent_id,
-            'total_likes': r.total_likes,
-            'created_at': r.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-            'reply_count' : r.replies.count()
-        })
+    depth = min(max(request.args.get('depth', 1, type=int), 1), MAX_COMMENT_DEPTH)
+    replies = blog_comment_service.get_reply_tree(parent_id = parent_id, depth = depth)
+
+    replies_data = [_comment_to_dict(reply, children, depth > 1) for reply, children in replies]
         
     return jsonify({'success': True, 'replies': replies_data})
 
@@ -169,50 +282,53 @@ from flask import session, jsonify, render_template
 
 @user_bp.route('/blog/personal', methods=['GET'])
 def personal_blog():
-    # 1. Kiểm tra login
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    user_id = session['user_id']
+
+    limit = clamp_page_size(request.args.get('limit'),
+                            current_app.config.get('DASHBOARD_PAGE_SIZE', 20),
+                            current_app.config.get('FEED_MAX_PAGE_SIZE', 50))
+    status = request.args.get('status')
+    if status is not None and status not in BLOG_STATUSES:
+        return jsonify({'success': False, 'error': 'Invalid status'}), 400
+
+    # ?status=...&cursor=... -> chỉ trang tiếp theo của một danh sách
+    if status is not None:
+        try:
+            rows, next_cursor = blog_service.author_page(user_id, status, limit, request.args.get('cursor'))
+        except InvalidCursor:
+            return jsonify({'success': False, 'error': 'Invalid cursor'}), 400
+        return jsonify({'success': True, 'status': status,
+                        'blogs': [_dashboard_item(row) for row in rows], 'next_cursor': next_cursor})
+
+    blogs, blogs_cursor = blog_service.author_page(user_id, 'published', limit)
+    drafts, drafts_cursor = blog_service.author_page(user_id, 'draft', limit)
+    totals = blog_service.author_totals(user_id)
+    empty = {'blogs': 0, 'views': 0, 'likes': 0, 'comments': 0}
 
-    # 2. Lấy danh sách blog của user từ database thông qua service
-    # Giả sử blog_service.list_by_author trả về list các object Blog
-    all_blogs = blog_service.list_by_author(user_id=session['user_id'])
-
-    # 3. Phân loại blog: Đã đăng và Bản nháp (nếu model có field is_published)
-    # Nếu model của bạn chưa có field này, chúng ta lấy tất cả vào 'posts'
-    blogs_data = []
-    drafts_data = []
-
-    for blog in all_blogs:
-        blog_dict = {
-            'id': blog.id,
-            'title': blog.title,
-            # Cắt ngắn nội dung làm excerpt (khoảng 150 ký tự)
-            'excerpt': (blog.content[:150] + '...') if len(blog.content) > 150 else blog.content,
-            'date': blog.created_at.strftime("%b %d, %Y"),
-            # Lấy stats từ relationship (nếu có)
-            'views': blog.stats.total_views if blog.stats else 0,
-            'likes': blog.stats.total_likes if blog.stats else 0,
-            'comments': blog.stats.total_comments if blog.stats else 0
-        }
-        
-        # Giả sử bạn có thuộc tính is_published trong model
-        if getattr(blog, 'is_published', True):
-            blogs_data.append(blog_dict)
-        else:
-            drafts_data.append(blog_dict)
-
-    # 4. Trả về JSON
     return jsonify({
         'success': True,
-        'blogs': blogs_data,
-        'drafts': drafts_data,
         'username': session.get('username'),
-        # Bạn có thể tính tổng stats ở đây để đổ vào các ô Quick Stats
-
-        'total_stats': {
-            'blogs': len(blogs_data),
-            'views': sum(p['views'] for p in blogs_data),
-            'likes': sum(p['likes'] for p in blogs_data),
-            'comments': sum(p['comments'] for p in blogs_data)
-        }
-    })
\ No newline at end of file
+        'blogs': [_dashboard_item(row) for row in blogs],
+        'drafts': [_dashboard_item(row) for row in drafts],
+        'next_cursor': {'published': blogs_cursor, 'draft': drafts_cursor},
+        # Quick Stats tính trên bài đã đăng, số bản nháp để riêng
+        'total_stats': {**totals.get('published', empty), 'drafts': totals.get('draft', empty)['blogs']},
+    })
+
+
+def _dashboard_item(row):
+    return {
+        'id': row.id,
+        'title': row.title,
+        'excerpt': row.excerpt or '',
+        'reading_time': row.reading_time,
+        'status': row.status,
+        'date': row.created_at.strftime("%b %d, %Y"),
+        'updated': row.updated_at.strftime("%b %d, %Y"),
+        'views': row.total_views or 0,
+        'unique_viewers': row.unique_viewers or 0,
+        'likes': row.total_likes or 0,
+        'comments': row.total_comments or 0,
+    }
@@ -32,6 +32,8 @@ function initializeBlogDetail() {
 // ===== MARKDOWN RENDERING (BLOG POST) =====
 function renderMarkdownContent() {
   const contentDiv = document.querySelector('#content-html');
+  // Nội dung đã được server render + sanitize sẵn
+  if (contentDiv && contentDiv.dataset.rendered === 'server') return;
   if (contentDiv && typeof marked !== 'undefined') {
     marked.setOptions({ breaks: true, gfm: true });
     const rawMarkdown = contentDiv.textContent.trim();
@@ -151,6 +153,30 @@ function loadBlogData() {
   if (likesCountElement) {
     blogData.likes = parseInt(likesCountElement.textContent) || 0;
   }
+  loadLikedState();
+}
+
+// Trang chi tiết được cache chung -> trạng thái "đã like" của user hỏi riêng
+async function loadLikedState() {
+  try {
+    const response = await fetch(`/usr/blog/liked?ids=${blogData.id}`);
+    const result = await response.json();
+    blogData.liked = (result.liked || []).includes(Number(blogData.id));
+    renderLikeButton();
+  } catch (error) {
+    console.error('Error loading like state:', error);
+  }
+}
+
+function renderLikeButton() {
+  const btn = document.getElementById('like-btn');
+  if (!btn) return;
+  const icon = btn.querySelector('i');
+  btn.classList.toggle('liked', blogData.liked);
+  icon.classList.toggle('fas', blogData.liked);
+  icon.classList.toggle('far', !blogData.liked);
+  const countSpan = document.getElementById('like-count');
+  if (countSpan) countSpan.textContent = blogData.likes;
 }
 
 async function loadComments() {
@@ -161,6 +187,7 @@ async function loadComments() {
     if (result.success) {
       blogData.comments = result.comments;
       renderComments();
+      subscribeComments();
     } else {
       console.log('Error to fetch comment');
     }
@@ -173,6 +200,41 @@ async function loadComments() {
 }
 
 // Mock data for testing
+// ===== LIVE COMMENTS (SSE) =====
+let commentStream = null;
+
+function subscribeComments() {
+  if (!window.EventSource) return;
+  if (commentStream) commentStream.close();
+
+  // Chỉ nhận comment mới hơn những gì đã tải; khi nối lại trình duyệt tự gửi Last-Event-ID
+  const lastId = blogData.comments.reduce((max, c) => Math.max(max, c.id), 0);
+  commentStream = new EventSource(`/usr/blog/${blogData.id}/comments/stream?last_event_id=${lastId}`);
+
+  commentStream.addEventListener('comment', function(e) {
+    const comment = JSON.parse(e.data);
+    // reply chỉ làm đổi reply_count của comment cha (event reply_count đi kèm)
+    if (comment.parent_id || blogData.comments.some(c => c.id === comment.id)) return;
+    blogData.comments.unshift(comment);
+    renderComments();
+  });
+
+  commentStream.addEventListener('reply_count', function(e) {
+    const data = JSON.parse(e.data);
+    const parent = blogData.comments.find(c => c.id === data.id);
+    if (parent && parent.reply_count !== data.reply_count) {
+      parent.reply_count = data.reply_count;
+      renderComments();
+    }
+  });
+
+  // Lỡ quá nhiều comment để replay: tải lại toàn bộ rồi mở stream mới
+  commentStream.addEventListener('reset', function() {
+    commentStream.close();
+    loadComments();
+  });
+}
+
 function getMockComments() {
   return [
     {
@@ -475,7 +537,7 @@ async function handlePostMainComment() {
     
     if (result.success) {
       const newComment = {
-        id: Date.now(),
+        id: result.comment.id,
         author: currentUser.name,
         avatar: currentUser.avatar,
         date: new Date(),
@@ -485,7 +547,8 @@ async function handlePostMainComment() {
         replies: []
       };
       
-      blogData.comments.unshift(newComment);
+      // stream có thể đã đẩy comment này về trước khi response tới
+      if (!blogData.comments.some(c => c.id === newComment.id)) blogData.comments.unshift(newComment);
       renderComments();
       
       input.value = '';
@@ -527,7 +590,7 @@ window.handleSubmitReply = async function(parentId, textareaId) {
 
       if (result.success) {
         const newReply = {
-          id: Date.now(),
+          id: result.comment.id,
           author: currentUser.name,
           avatar: currentUser.avatar,
           date: new Date(),
@@ -554,27 +617,22 @@ window.handleSubmitReply = async function(parentId, textareaId) {
 };
 
 // ===== ACTIONS (Like Main Post, Share) =====
-function handleLike() {
-  const btn = document.getElementById('like-btn');
-  const icon = btn.querySelector('i');
-  const countSpan = document.getElementById('like-count');
-  
-  blogData.liked = !blogData.liked;
-  
-  if (blogData.liked) {
-    btn.classList.add('liked');
-    icon.classList.remove('far');
-    icon.classList.add('fas');
-    blogData.likes++;
-    showNotification('You liked this post!');
-  } else {
-    btn.classList.remove('liked');
-    icon.classList.remove('fas');
-    icon.classList.add('far');
-    blogData.likes--;
+async function handleLike() {
+  try {
+    const response = await fetch(`/usr/blog/${blogData.id}/like`, { method: blogData.liked ? 'DELETE' : 'POST' });
+    const result = await response.json();
+    if (!result.success) {
+      showNotification(result.error || 'Error updating like', 'error');
+      return;
+    }
+    blogData.liked = result.liked;
+    blogData.likes = result.likes;
+    renderLikeButton();
+    if (result.liked) showNotification('You liked this post!');
+  } catch (error) {
+    console.log('Error in handleLike:', error);
+    showNotification('Error updating like', 'error');
   }
-  
-  if (countSpan) countSpan.textContent = blogData.likes;
 }
 
 function handleBookmark() {
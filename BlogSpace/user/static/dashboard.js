@@ -1,80 +1,41 @@
 document.addEventListener('DOMContentLoaded', function() {
-    // 1. Khai báo dữ liệu mẫu
-    const mockUserData = {
-        posts: [
-            { id: 101, title: "How to Build a Blog with Python", excerpt: "Learn step-by-step how to create a beautiful blog using Flask and SQLite...", date: "2 days ago", views: "125", likes: "45" },
-            { id: 102, title: "CSS Tips & Tricks for Beginners", excerpt: "Master the fundamentals of CSS with these practical examples...", date: "1 week ago", views: "320", likes: "112" },
-            { id: 103, title: "Deploying Flask Apps to Heroku", excerpt: "A complete guide to making your web app live for the world to see...", date: "2 weeks ago", views: "450", likes: "89" }
-        ],
-        drafts: [
-            { id: 201, title: "JavaScript Advanced Concepts", excerpt: "Exploring closures, async/await, and more...", date: "Last edited 3 hours ago" }
-        ],
-        stats: [
-            { label: "Total Posts", value: "0", icon: "fa-pen-fancy" },
-            { label: "Total Likes", value: "0", icon: "fa-heart" },
-            { label: "Total Views", value: "0", icon: "fa-eye" },
-            { label: "Comments", value: "0", icon: "fa-comment" }
-        ]
-    };
-
-    // 2. Hàm Render Stats (Các ô vuông chỉ số)
-    function renderStats() {
-        const container = document.getElementById('stats-container');
-        if (!container) return;
-        container.innerHTML = mockUserData.stats.map(s => `
-            <div class="stat-card">
-                <i class="fas ${s.icon}"></i>
-                <h4>${s.label}</h4>
-                <p class="big-number">${s.value}</p>
-            </div>
-        `).join('');
+    // title/excerpt là text thuần từ API: escape trước khi ghép vào innerHTML
+    function escapeHtml(value) {
+        return String(value ?? '').replace(/[&<>"']/g, ch => ({
+            '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+        })[ch]);
     }
 
-    // 3. Hàm Render Posts (Bài viết đã đăng)
-    async function renderMyPosts() {
-        const container = document.getElementById('my-posts-container');
-        if (!container) return;
-        
-        try{
-            const response = await fetch('/usr/blog/personal');
-            const result = await response.json();
-            if(result.success){
-                container.innerHTML = result.blogs.map(post => `
-                    <div class="post-item">
-                        <div class="post-info">
-                            <h3>${post.title}</h3>
-                            <p class="post-excerpt">${post.excerpt}</p>
-                            <div class="post-meta">
-                                <span><i class="fas fa-calendar"></i> ${post.date}</span>
-                                <span><i class="fas fa-eye"></i> ${post.views} views</span>
-                                <span><i class="fas fa-heart"></i> ${post.likes} likes</span>
-                            </div>
-                        </div>
-                        <div class="post-actions">
-                            <a href="/post/${post.id}" class="btn-icon" title="View"><i class="fas fa-eye"></i></a>
-                            <a href="/edit/${post.id}" class="btn-icon" title="Edit"><i class="fas fa-edit"></i></a>
-                            <button class="btn-icon btn-danger" onclick="deletePost(${post.id})" title="Delete"><i class="fas fa-trash"></i></button>
-                        </div>
+    // 1. Mẫu HTML cho một bài (đã đăng / nháp)
+    function postItem(post) {
+        return `
+            <div class="post-item">
+                <div class="post-info">
+                    <h3>${escapeHtml(post.title)}</h3>
+                    <p class="post-excerpt">${escapeHtml(post.excerpt)}</p>
+                    <div class="post-meta">
+                        <span><i class="fas fa-calendar"></i> ${post.date}</span>
+                        <span title="~${post.unique_viewers} unique viewers"><i class="fas fa-eye"></i> ${post.views} views</span>
+                        <span><i class="fas fa-heart"></i> ${post.likes} likes</span>
                     </div>
-                `).join('');
-            }
-        }catch(error){
-
-
-        }
+                </div>
+                <div class="post-actions">
+                    <a href="/usr/blog/${post.id}" class="btn-icon" title="View"><i class="fas fa-eye"></i></a>
+                    <a href="/edit/${post.id}" class="btn-icon" title="Edit"><i class="fas fa-edit"></i></a>
+                    <button class="btn-icon btn-danger" onclick="deletePost(${post.id})" title="Delete"><i class="fas fa-trash"></i></button>
+                </div>
+            </div>
+        `;
     }
 
-    // 4. Hàm Render Drafts (Bản nháp)
-    function renderDrafts() {
-        const container = document.getElementById('drafts-container');
-        if (!container) return;
-        container.innerHTML = mockUserData.drafts.map(draft => `
+    function draftItem(draft) {
+        return `
             <div class="post-item">
                 <div class="post-info">
-                    <h3>${draft.title}</h3>
-                    <p class="post-excerpt">${draft.excerpt}</p>
+                    <h3>${escapeHtml(draft.title)}</h3>
+                    <p class="post-excerpt">${escapeHtml(draft.excerpt)}</p>
                     <div class="post-meta">
-                        <span><i class="fas fa-calendar"></i> ${draft.date}</span>
+                        <span><i class="fas fa-calendar"></i> Last edited ${draft.updated}</span>
                         <span class="badge-draft">DRAFT</span>
                     </div>
                 </div>
@@ -84,7 +45,67 @@ document.addEventListener('DOMContentLoaded', function() {
                     <button class="btn-icon btn-danger" onclick="deletePost(${draft.id})" title="Delete"><i class="fas fa-trash"></i></button>
                 </div>
             </div>
-        `).join('');
+        `;
+    }
+
+    const lists = {
+        published: { container: 'my-posts-container', render: postItem },
+        draft: { container: 'drafts-container', render: draftItem }
+    };
+
+    // 2. Các ô Quick Stats (theo thứ tự trong template)
+    function renderStats(totals) {
+        const numbers = document.querySelectorAll('.stats-grid .big-number');
+        [totals.blogs, totals.likes, totals.views, totals.comments].forEach((value, i) => {
+            if (numbers[i]) numbers[i].textContent = value;
+        });
+    }
+
+    // 3. Thêm một trang vào danh sách, nút "Load more" nếu còn trang sau
+    function appendPage(status, items, nextCursor) {
+        const list = lists[status];
+        const container = document.getElementById(list.container);
+        if (!container) return;
+        container.insertAdjacentHTML('beforeend', items.map(list.render).join(''));
+
+        let button = container.parentElement.querySelector('.load-more');
+        if (!nextCursor) {
+            if (button) button.remove();
+            return;
+        }
+        if (!button) {
+            button = document.createElement('button');
+            button.className = 'btn btn-secondary btn-small load-more';
+            button.textContent = 'Load more';
+            container.after(button);
+        }
+        button.onclick = () => loadMore(status, nextCursor, button);
+    }
+
+    async function loadMore(status, cursor, button) {
+        button.disabled = true;
+        try {
+            const response = await fetch(`/usr/blog/personal?status=${status}&cursor=${encodeURIComponent(cursor)}`);
+            const result = await response.json();
+            if (result.success) appendPage(status, result.blogs, result.next_cursor);
+        } finally {
+            button.disabled = false;
+        }
+    }
+
+    // 4. Trang đầu của cả hai danh sách + tổng số liệu trong một request
+    async function loadDashboard() {
+        try {
+            const response = await fetch('/usr/blog/personal');
+            const result = await response.json();
+            if (!result.success) return;
+            document.getElementById(lists.published.container).innerHTML = '';
+            renderStats(result.total_stats);
+            appendPage('published', result.blogs, result.next_cursor.published);
+            appendPage('draft', result.drafts, result.next_cursor.draft);
+        } catch (error) {
+            console.error('Failed to load dashboard:', error);
+        }
     }
 
     // 5. Logic chuyển đổi Tab (Giữ nguyên từ code cũ của bạn)
@@ -104,9 +125,7 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // Khởi tạo tất cả
-    renderStats();
-    renderMyPosts();
-    renderDrafts();
+    loadDashboard();
     setupNavigation();
 });
 
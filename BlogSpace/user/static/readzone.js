@@ -7,17 +7,22 @@
 // 1. CONFIG & STATE
 // ==========================================
 const CONSTANTS = {
-    POSTS_PER_PAGE: 6,
-    DEFAULT_SORT: 'newest'
+    DEFAULT_SORT: 'newest',
+    TRENDING_LIMIT: 50,
+    SEARCH_DEBOUNCE_MS: 300
 };
 
+// Feed phân trang trên server: tìm kiếm, lọc category và sort trending đều hỏi server,
+// không lọc/sort trên các trang đã tải (sẽ thiếu bài mà không báo).
 const state = {
-    currentPage: 1,
-    allPosts: [],      // Dữ liệu gốc từ Server
-    filteredPosts: [], // Dữ liệu sau khi lọc/sort
-    selectedCategories: ['all'],
+    posts: [],          // Bài đang hiển thị (các trang đã tải của nguồn hiện tại)
+    selectedCategory: 'all',
     currentSort: CONSTANTS.DEFAULT_SORT,
-    displayedPostsCount: 0
+    searchTerm: '',
+    total: null,        // Tổng số kết quả nếu server trả về (search)
+    displayedPostsCount: 0,
+    next: null,         // Cursor/trang kế tiếp trên server (null = hết)
+    requestId: 0        // Bỏ response của lần lọc cũ về muộn
 };
 
 // ==========================================
@@ -30,7 +35,6 @@ const DOM = {
     // Filters & Controls
     searchInput: document.getElementById('search-input'),
     categoryFilters: document.querySelectorAll('.category-filter'),
-    categoryAllRadio: document.querySelector('input[value="all"]'),
     sortBtns: document.querySelectorAll('.sort-btn'),
     resetFiltersBtn: document.getElementById('reset-filters'),
     
@@ -65,6 +69,11 @@ const DOM = {
 };
 
 const Utils = {
+    // text từ API (title, excerpt, tag...) là text thuần: escape trước khi ghép vào innerHTML
+    escapeHtml: (value) => String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]),
+
     formatContent: (text) => {
         if (!text) return '';
         return text
@@ -81,44 +90,36 @@ const Utils = {
     // Hàm xử lý đường dẫn ảnh từ Flask trả về
     getImagePath: (path) => {
         if (!path) return 'https://via.placeholder.com/800x400?text=No+Image';
-        return path.startsWith('http') ? path : `/static/${path}`;
+        return (path.startsWith('http') || path.startsWith('/')) ? path : `/static/${path}`;
     }
 };
 
 
 const AppLogic = {
-    sortPosts: (posts) => {
-        const sorted = [...posts];
-        if (state.currentSort === 'newest') {
-            sorted.sort((a, b) => new Date(b.dateISO) - new Date(a.dateISO));
-        } else if (state.currentSort === 'trending') {
-            sorted.sort((a, b) => (b.likes + b.views) - (a.likes + a.views));
-        } else if (state.currentSort === 'popular') {
-            sorted.sort((a, b) => b.views - a.views);
-        }
-        return sorted;
+    // Nguồn dữ liệu theo bộ lọc hiện tại: search > trending > feed (theo category)
+    source: () => {
+        if (state.searchTerm) return API.fetchSearch;
+        if (state.currentSort === 'trending') return API.fetchTrending;
+        return API.fetchFeed;
     },
 
-    filterPosts: () => {
-        let filtered = [...state.allPosts];
-
-        if (!state.selectedCategories.includes('all')) {
-            filtered = filtered.filter(post => state.selectedCategories.includes(post.category));
-        }
-
-        const searchTerm = DOM.searchInput.value.toLowerCase();
-        if (searchTerm) {
-            filtered = filtered.filter(post =>
-                (post.title && post.title.toLowerCase().includes(searchTerm)) ||
-                (post.excerpt && post.excerpt.toLowerCase().includes(searchTerm)) ||
-                (post.tags && post.tags.some(tag => tag.toLowerCase().includes(searchTerm)))
-            );
-        }
+    loadPage: async (reset) => {
+        const requestId = reset ? ++state.requestId : state.requestId;
+        const page = await AppLogic.source()(reset ? null : state.next);
+        if (!page || requestId !== state.requestId) return;
+
+        await API.markLiked(page.posts);
+        if (requestId !== state.requestId) return;
+        state.posts = reset ? page.posts : state.posts.concat(page.posts);
+        state.next = page.next;
+        state.total = page.total ?? null;
+        UI.renderPosts(reset ? state.posts : page.posts, reset);
+    },
 
-        state.filteredPosts = AppLogic.sortPosts(filtered);
-        state.currentPage = 1;
-        
-        UI.renderPosts();
+    filterPosts: () => {
+        state.searchTerm = DOM.searchInput.value.trim();
+        UI.updateControls();
+        return AppLogic.loadPage(true);
     }
 };
 
@@ -127,7 +128,7 @@ const AppLogic = {
 // ==========================================
 const UI = {
     updateStats: () => {
-        DOM.totalPostsEl.textContent = state.allPosts.length;
+        DOM.totalPostsEl.textContent = state.total ?? state.posts.length;
         DOM.postsReadingEl.textContent = state.displayedPostsCount;
         DOM.showingCount.textContent = state.displayedPostsCount;
     },
@@ -149,19 +150,19 @@ const UI = {
 
         postEl.innerHTML = `
         <div class="post-featured">
-            <img src="${imageUrl}" alt="${post.title}" class="post-image">
+            <img src="${imageUrl}" alt="${Utils.escapeHtml(post.title)}" class="post-image">
             <span class="post-category-badge">
-                <i class="${categoryIcon}"></i> ${post.category || 'General'}
+                <i class="${categoryIcon}"></i> ${Utils.escapeHtml(post.category || 'General')}
             </span>
         </div>
         <div class="post-body">
-            <h2 class="post-title">${post.title}</h2>
-            <p class="post-excerpt">${post.excerpt || ''}</p>
+            <h2 class="post-title">${Utils.escapeHtml(post.title)}</h2>
+            <p class="post-excerpt">${Utils.escapeHtml(post.excerpt)}</p>
             
             <div class="post-meta">
-                <span class="meta-item"><i class="fas fa-user"></i> ${post.author}</span>
+                <span class="meta-item"><i class="fas fa-user"></i> ${Utils.escapeHtml(post.author)}</span>
                 <span class="meta-item"><i class="fas fa-calendar"></i> ${post.date}</span>
-                <span class="meta-item"><i class="fas fa-eye"></i> ${post.views} views</span>
+                <span class="meta-item" title="~${post.unique_viewers} unique viewers"><i class="fas fa-eye"></i> ${post.views} views</span>
             </div>
 
             <div class="post-actions">
@@ -184,31 +185,55 @@ const UI = {
         return postEl;
     },
 
-    renderPosts: () => {
-        const startIdx = (state.currentPage - 1) * CONSTANTS.POSTS_PER_PAGE;
-        const endIdx = startIdx + CONSTANTS.POSTS_PER_PAGE;
-        const postsToDisplay = state.filteredPosts.slice(startIdx, endIdx);
-        
-        state.displayedPostsCount = Math.min(endIdx, state.filteredPosts.length);
+    // Kết quả /database/search: title/snippet là HTML server đã escape, chỉ có thêm <mark>
+    createSearchHitElement: (hit) => {
+        const hitEl = document.createElement('div');
+        hitEl.className = 'post-card';
+        hitEl.innerHTML = `
+        <div class="post-body">
+            <h2 class="post-title">${hit.title}</h2>
+            <p class="post-excerpt">${hit.snippet}</p>
+            <div class="post-meta">
+                <span class="meta-item"><i class="fas fa-user"></i> ${Utils.escapeHtml(hit.author)}</span>
+                <span class="meta-item"><i class="fas fa-calendar"></i> ${hit.date}</span>
+            </div>
+            <div class="post-actions">
+                <button class="action-btn read-more-btn">
+                    <i class="fas fa-arrow-right"></i> Read More
+                </button>
+            </div>
+        </div>
+        `;
+        hitEl.querySelector('.read-more-btn').addEventListener('click', () => {
+            window.location.href = `/usr/blog/${hit.id}`;
+        });
+        return hitEl;
+    },
+
+    // Đang tìm kiếm thì category/sort không áp dụng: khóa lại cho rõ
+    updateControls: () => {
+        const searching = !!state.searchTerm;
+        DOM.categoryFilters.forEach(f => { f.disabled = searching; });
+        DOM.sortBtns.forEach(b => { b.disabled = searching; });
+    },
+
+    renderPosts: (posts, reset) => {
+        state.displayedPostsCount = state.posts.length;
 
-        // Clear nếu trang 1
-        if (state.currentPage === 1) {
+        if (reset) {
             DOM.container.innerHTML = '';
         }
 
-        // Xử lý hiển thị
-        if (postsToDisplay.length === 0 && state.currentPage === 1) {
+        if (state.posts.length === 0) {
             DOM.noResults.style.display = 'flex';
             DOM.loadMoreContainer.style.display = 'none';
         } else {
             DOM.noResults.style.display = 'none';
-            postsToDisplay.forEach(post => {
-                DOM.container.appendChild(UI.createPostElement(post));
+            posts.forEach(post => {
+                DOM.container.appendChild(state.searchTerm
+                    ? UI.createSearchHitElement(post) : UI.createPostElement(post));
             });
-
-            // Nút Load More
-            DOM.loadMoreContainer.style.display = 
-                (state.displayedPostsCount < state.filteredPosts.length) ? 'flex' : 'none';
+            DOM.loadMoreContainer.style.display = state.next ? 'flex' : 'none';
         }
 
         UI.updateStats();
@@ -236,7 +261,7 @@ const Modal = {
 
         if (post.tags && Array.isArray(post.tags)) {
             m.tags.innerHTML = post.tags.map(tag => 
-                `<span class="tag"><i class="fas fa-tag"></i> ${tag.trim()}</span>`
+                `<span class="tag"><i class="fas fa-tag"></i> ${Utils.escapeHtml(tag.trim())}</span>`
             ).join('');
         } else {
             m.tags.innerHTML = '';
@@ -244,7 +269,7 @@ const Modal = {
 
         // Reset Inputs
         m.commentInput.value = '';
-        m.likeBtn.classList.remove('liked');
+        m.likeBtn.classList.toggle('liked', !!post.liked);
         m.bookmarkBtn.classList.remove('bookmarked');
         m.commentsList.innerHTML = ''; 
 
@@ -262,23 +287,13 @@ const Modal = {
 // 7. API HANDLER
 // ==========================================
 const API = {
-    fetchAllPosts: async () => {
+    getJson: async (url) => {
         try {
-            // Dùng GET (Mặc định)
-            const response = await fetch('/database/get_all_blogs');
-
+            const response = await fetch(url);
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
-
-            const data = await response.json();
-            
-            // Cập nhật State và Render
-            state.allPosts = data;
-            AppLogic.filterPosts();
-            
-            // console.log(`Loaded ${data.length} posts successfully.`);
-
+            return await response.json();
         } catch (error) {
             console.error('Failed to fetch posts:', error);
             DOM.container.innerHTML = `
@@ -286,7 +301,50 @@ const API = {
                     <h3><i class="fas fa-exclamation-triangle"></i> Failed to load posts</h3>
                     <p>Please check your connection or server status.</p>
                 </div>`;
+            return null;
+        }
+    },
+
+    // Mỗi nguồn trả về {posts, next, total}; next truyền lại để lấy trang sau
+    fetchFeed: async (cursor) => {
+        const params = new URLSearchParams();
+        if (cursor) params.set('cursor', cursor);
+        if (state.selectedCategory !== 'all') params.set('category', state.selectedCategory);
+        const data = await API.getJson(`/database/get_all_blogs?${params}`);
+        return data && { posts: data.blogs, next: data.next_cursor };
+    },
+
+    fetchTrending: async () => {
+        // top-K xếp hạng trên server; lọc category trong top-K đầy đủ, không phải trang đã tải
+        const data = await API.getJson(`/database/trending?limit=${CONSTANTS.TRENDING_LIMIT}`);
+        if (!data) return null;
+        const posts = state.selectedCategory === 'all'
+            ? data.blogs : data.blogs.filter(post => post.category === state.selectedCategory);
+        return { posts, next: null };
+    },
+
+    fetchSearch: async (page) => {
+        page = page || 1;
+        const data = await API.getJson(`/database/search?q=${encodeURIComponent(state.searchTerm)}&page=${page}`);
+        if (!data) return null;
+        return { posts: data.hits, total: data.total,
+                 next: page * data.per_page < data.total ? page + 1 : null };
+    },
+
+    markLiked: async (posts) => {
+        if (!posts.length || state.searchTerm) return;
+        try {
+            const response = await fetch(`/usr/blog/liked?ids=${posts.map(p => p.id).join(',')}`);
+            const liked = new Set((await response.json()).liked || []);
+            posts.forEach(post => { post.liked = liked.has(post.id); });
+        } catch (error) {
+            console.error('Failed to fetch liked posts:', error);
         }
+    },
+
+    setLiked: async (postId, liked) => {
+        const response = await fetch(`/usr/blog/${postId}/like`, { method: liked ? 'POST' : 'DELETE' });
+        return response.ok ? response.json() : null;
     }
 };
 
@@ -294,31 +352,19 @@ const API = {
 // 8. EVENT BINDING
 // ==========================================
 function bindEventListeners() {
-    // Search
-    DOM.searchInput.addEventListener('input', AppLogic.filterPosts);
+    // Search (debounce: mỗi lần gõ không phải là một request)
+    let searchTimer = null;
+    DOM.searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(AppLogic.filterPosts, CONSTANTS.SEARCH_DEBOUNCE_MS);
+    });
 
-    // Category Filters
+    // Category Filters (một category: server lọc theo ix_blog_category_created_at)
     DOM.categoryFilters.forEach(filter => {
         filter.addEventListener('change', function () {
-            if (this.value === 'all') {
-                if (this.checked) {
-                    DOM.categoryFilters.forEach(f => f.checked = f.value === 'all');
-                    state.selectedCategories = ['all'];
-                } else {
-                    this.checked = true; 
-                }
-            } else {
-                if(DOM.categoryAllRadio) DOM.categoryAllRadio.checked = false;
-                
-                state.selectedCategories = Array.from(document.querySelectorAll('.category-filter:checked'))
-                    .map(f => f.value)
-                    .filter(v => v !== 'all');
-
-                if (state.selectedCategories.length === 0) {
-                    state.selectedCategories = ['all'];
-                    if(DOM.categoryAllRadio) DOM.categoryAllRadio.checked = true;
-                }
-            }
+            const value = this.checked ? this.value : 'all';
+            DOM.categoryFilters.forEach(f => f.checked = f.value === value);
+            state.selectedCategory = value;
             AppLogic.filterPosts();
         });
     });
@@ -333,10 +379,10 @@ function bindEventListeners() {
         });
     });
 
-    // Load More
-    DOM.loadMoreBtn.addEventListener('click', () => {
-        state.currentPage++;
-        UI.renderPosts();
+    // Load More: trang kế tiếp của nguồn hiện tại
+    DOM.loadMoreBtn.addEventListener('click', async () => {
+        if (!state.next) return;
+        await AppLogic.loadPage(false);
         DOM.loadMoreBtn.scrollIntoView({ behavior: 'smooth' });
     });
 
@@ -344,7 +390,7 @@ function bindEventListeners() {
     DOM.resetFiltersBtn.addEventListener('click', () => {
         DOM.searchInput.value = '';
         DOM.categoryFilters.forEach(f => f.checked = f.value === 'all');
-        state.selectedCategories = ['all'];
+        state.selectedCategory = 'all';
         state.currentSort = 'newest';
         
         DOM.sortBtns.forEach(b => b.classList.remove('active'));
@@ -357,10 +403,15 @@ function bindEventListeners() {
     DOM.modal.closeBtn.addEventListener('click', Modal.close);
     DOM.modal.overlay.addEventListener('click', Modal.close);
     
-    DOM.modal.likeBtn.addEventListener('click', function () {
-        this.classList.toggle('liked');
-        const currentLikes = parseInt(DOM.modal.likesCount.textContent);
-        DOM.modal.likesCount.textContent = this.classList.contains('liked') ? currentLikes + 1 : currentLikes - 1;
+    DOM.modal.likeBtn.addEventListener('click', async function () {
+        const post = state.posts.find(p => p.id === DOM.modal.blog_id);
+        if (!post) return;
+        const result = await API.setLiked(post.id, !post.liked);
+        if (!result) return; // chưa đăng nhập
+        post.liked = result.liked;
+        post.likes = result.likes;
+        this.classList.toggle('liked', post.liked);
+        DOM.modal.likesCount.textContent = post.likes;
     });
 
     DOM.modal.bookmarkBtn.addEventListener('click', function () {
@@ -380,7 +431,7 @@ function bindEventListeners() {
             newComment.className = 'comment';
             newComment.innerHTML = `
                 <div class="comment-header"><strong>You</strong><span class="comment-date">just now</span></div>
-                <p>${text}</p>
+                <p>${Utils.escapeHtml(text)}</p>
             `;
             DOM.modal.commentsList.prepend(newComment); 
             DOM.modal.commentInput.value = '';
@@ -395,7 +446,7 @@ async function main() {
     // console.log('ReadZone Initializing...');
 
     bindEventListeners();
-    await API.fetchAllPosts();
+    await AppLogic.filterPosts();
     // console.log('ReadZone Ready.');
 }
 
@@ -4,6 +4,7 @@ app = create_app()
 
 import os
 
+# Dev server; production chạy `gunicorn app:app` với gunicorn.conf.py
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port)
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""Tạo variant cho một thư mục ảnh mẫu: thời gian serial vs process pool, dung lượng trước/sau.
+
+    python benchmarks/bench_image_pipeline.py path/to/sample/images --workers 4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BlogSpace.static.uploads import IMAGE_VARIANTS, VARIANT_FORMATS, allowed_file, generate_variants
+
+
+def copy_samples(folder, target):
+    paths = []
+    for i, filename in enumerate(sorted(os.listdir(folder))):
+        if allowed_file(filename):
+            dst = os.path.join(target, f"{i:05d}.{filename.rsplit('.', 1)[1].lower()}")
+            shutil.copyfile(os.path.join(folder, filename), dst)
+            paths.append(dst)
+    return paths
+
+
+def run(folder, workers, quality):
+    tmp = tempfile.mkdtemp()
+    try:
+        paths = copy_samples(folder, tmp)
+        start = time.perf_counter()
+        if workers <= 1:
+            for path in paths:
+                generate_variants(path, quality)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(generate_variants, paths, [quality] * len(paths)))
+        elapsed = time.perf_counter() - start
+
+        sizes = {'original': sum(os.path.getsize(p) for p in paths)}
+        for size in IMAGE_VARIANTS:
+            for fmt in VARIANT_FORMATS:
+                sizes[f"{size}.{fmt}"] = sum(
+                    os.path.getsize(f"{p.rsplit('.', 1)[0]}_{size}.{fmt}") for p in paths
+                )
+        return len(paths), elapsed, sizes
+    finally:
+        shutil.rmtree(tmp)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('folder')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--quality', type=int, default=80)
+    args = parser.parse_args()
+
+    for workers in sorted({1, args.workers}):
+        count, elapsed, sizes = run(args.folder, workers, args.quality)
+        print(f"workers={workers}: {count} images in {elapsed:.2f}s "
+              f"({count / elapsed:.1f} images/sec)")
+
+    print(f"{'variant':16s} {'total bytes':>14s} {'vs original':>12s}")
+    for name, total in sizes.items():
+        print(f"{name:16s} {total:>14,d} {total / sizes['original']:>11.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+"""Latency/throughput/SQL count cho các kịch bản chính, xuất JSON để so sánh giữa các commit.
+
+    # Flask test client trên một SQLite tạm, tự seed dữ liệu (bỏ qua DATABASE_URL)
+    python benchmarks/bench_scenarios.py --blogs 2000 --requests 300 --output before.json
+
+    # seed vào DATABASE_URL (ghi dữ liệu seed_* vào database đó!) phải nói rõ
+    DATABASE_URL=postgresql://.../bench python benchmarks/bench_scenarios.py --seed-into-database-url
+
+    # gunicorn đang chạy trên cùng database (đã `flask blogspace seed`; nới LOGIN_* nếu đo login)
+    DATABASE_URL=postgresql://... python benchmarks/bench_scenarios.py --url http://127.0.0.1:8000 --no-seed
+
+    # so sánh với lần chạy trước
+    python benchmarks/bench_scenarios.py --compare before.json
+
+SQL count chỉ đo được ở chế độ test client (cùng process với app).
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, func, select
+
+from BlogSpace import create_app
+from BlogSpace.database import db
+from BlogSpace.database.models.blog_model import Blog, BlogComment, BlogStats
+from BlogSpace.database.models.user_model import User
+from BlogSpace.database.seed import SEED_PASSWORD, WORDS, seed_database
+
+SCENARIOS = ("feed", "detail", "comments", "replies", "search", "login", "submit", "views")
+
+
+class SqlCounter:
+    """Đếm số câu SQL của request đang chạy trên thread hiện tại."""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    def value(self):
+        return getattr(self._local, "count", 0)
+
+
+class TestClientDriver:
+    def __init__(self, app, sql_counter):
+        self.app = app
+        self.sql = sql_counter
+
+    def session(self):
+        return TestClientSession(self.app.test_client(), self.sql)
+
+
+class TestClientSession:
+    def __init__(self, client, sql):
+        self.client = client
+        self.sql = sql
+
+    def request(self, method, path, data=None):
+        self.sql.reset()
+        response = self.client.open(path, method=method, data=data)
+        body = response.get_data()
+        return response.status_code, body, self.sql.value()
+
+
+class HttpDriver:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def session(self):
+        return HttpSession(self.base_url)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                return response.status, response.read(), None
+        except urllib.error.HTTPError as error:
+            return error.code, error.read(), None
+
+
+def pick_targets(app, rng, sample=200):
+    """Chọn sẵn id blog/comment/user cho các kịch bản (trước khi bấm giờ)."""
+    with app.app_context():
+        blog_ids = db.session.scalars(select(Blog.id).order_by(func.random()).limit(sample)).all()
+        hot_blogs = db.session.scalars(
+            select(BlogStats.blog_id).order_by(BlogStats.total_comments.desc()).limit(20)).all()
+        parents = db.session.scalars(
+            select(BlogComment.id).where(BlogComment.reply_count > 0)
+            .order_by(func.random()).limit(sample)).all()
+        emails = db.session.scalars(
+            select(User.email).where(User.email.like("seed_%")).order_by(func.random()).limit(sample)).all()
+    if not blog_ids:
+        raise SystemExit("Database is empty: run `flask blogspace seed` or drop --no-seed.")
+    return {"blogs": blog_ids, "hot_blogs": hot_blogs or blog_ids, "parents": parents or [0],
+            "emails": emails, "words": WORDS, "rng": rng}
+
+
+def make_scenarios(targets, password):
+    rng = targets["rng"]
+    feed_cursor = {}
+
+    def call(session, method, path, data=None):
+        status, _, sql = session.request(method, path, data)
+        return status, sql
+
+    def feed(session):
+        # đi lần lượt các trang theo next_cursor, hết thì quay lại trang đầu
+        cursor = feed_cursor.get(id(session))
+        path = "/database/get_all_blogs?limit=12" + (f"&cursor={cursor}" if cursor else "")
+        status, body, sql = session.request("GET", path)
+        if status == 200:
+            feed_cursor[id(session)] = json.loads(body).get("next_cursor")
+        return status, sql
+
+    def detail(session):
+        return call(session, "GET", f"/usr/blog/{rng.choice(targets['blogs'])}")
+
+    def comments(session):
+        return call(session, "GET", f"/usr/blog/{rng.choice(targets['hot_blogs'])}/comments?depth=3")
+
+    def replies(session):
+        return call(session, "GET", f"/usr/blog/comment/{rng.choice(targets['parents'])}/replies?depth=3")
+
+    def search(session):
+        query = " ".join(rng.sample(targets["words"], rng.randint(1, 2)))
+        return call(session, "GET", f"/database/search?q={urllib.parse.quote(query)}")
+
+    def login(session):
+        session.request("GET", "/auth/logout")
+        return call(session, "POST", "/auth/login",
+                    {"email": rng.choice(targets["emails"]), "password": password})
+
+    def submit(session):
+        if not getattr(session, "logged_in", False):
+            session.request("POST", "/auth/login", {"email": targets["emails"][0], "password": password})
+            session.logged_in = True
+        words = rng.sample(targets["words"], 8)
+        return call(session, "POST", "/usr/writezone", {
+            "title": " ".join(words[:5]).capitalize(),
+            "content": " ".join(rng.choice(targets["words"]) for _ in range(300)),
+            "category": "technology", "tags": ",".join(words[5:]),
+            "seo_description": " ".join(words), "publish_option": "publish",
+        })
+
+    def views(session):
+        # cùng một bài hot: đo tranh chấp trên counter của một row
+        return call(session, "GET", f"/usr/blog/{targets['hot_blogs'][0]}")
+
+    return {"feed": feed, "detail": detail, "comments": comments, "replies": replies,
+            "search": search, "login": login, "submit": submit, "views": views}
+
+
+def run_scenario(driver, fn, requests, threads, warmup):
+    sessions = [driver.session() for _ in range(threads)]
+    for i in range(warmup):
+        fn(sessions[i % threads])
+
+    latencies, sql_counts, errors = [], [], []
+    lock = threading.Lock()
+
+    def worker(session, n):
+        for _ in range(n):
+            started = time.perf_counter()
+            try:
+                status, sql = fn(session)
+            except Exception as error:  # noqa: BLE001 - lỗi mạng cũng tính là request lỗi
+                status, sql = repr(error), None
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if sql is not None:
+                    sql_counts.append(sql)
+                if not isinstance(status, int) or status >= 400:
+                    errors.append(status)
+
+    per_thread = max(requests // threads, 1)
+    pool = [threading.Thread(target=worker, args=(s, per_thread)) for s in sessions]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    wall = time.perf_counter() - started
+    return summarize(latencies, sql_counts, errors, wall)
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def summarize(latencies, sql_counts, errors, wall):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_statuses": sorted({str(e) for e in errors})[:5],
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "sql_per_request": round(sum(sql_counts) / len(sql_counts), 2) if sql_counts else None,
+        "sql_max": max(sql_counts) if sql_counts else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    print(f"{'scenario':10s} {'p50 ms':>24s} {'p95 ms':>24s} {'rps':>24s} {'sql/req':>24s}")
+    for name, now in current["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before:
+            continue
+
+        def cell(key, width):
+            a, b = before.get(key), now.get(key)
+            if a is None or b is None:
+                return f"{'-':>{width}s}"
+            change = f"{(b - a) / a * 100:+.0f}%" if a else ""
+            return f"{a:>7} -> {b:<7}{change:>5s}"[:width].rjust(width)
+
+        print(f"{name:10s} {cell('p50_ms', 24)} {cell('p95_ms', 24)} "
+              f"{cell('throughput_rps', 24)} {cell('sql_per_request', 24)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--url", help="Drive a running server instead of the Flask test client.")
+    parser.add_argument("--no-seed", action="store_true", help="Use the existing DATABASE_URL data.")
+    parser.add_argument("--seed-into-database-url", action="store_true",
+                        help="Seed into DATABASE_URL instead of a temporary SQLite database.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--blogs", type=int, default=2000)
+    parser.add_argument("--comments-per-blog", type=float, default=8.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default=SEED_PASSWORD)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout).")
+    parser.add_argument("--compare", help="Previous JSON report to diff against.")
+    args = parser.parse_args()
+
+    config = {
+        # kịch bản login bắn liên tục -> nới throttle, không thì đo toàn 429
+        "LOGIN_IP_BURST": 10 ** 9, "LOGIN_EMAIL_BURST": 10 ** 9,
+        "IMAGE_PIPELINE_WORKERS": 0,
+    }
+    # mặc định seed vào SQLite tạm: DATABASE_URL có thể là database thật
+    if args.seed_into_database_url:
+        if args.no_seed:
+            parser.error("--seed-into-database-url and --no-seed are mutually exclusive")
+        if "DATABASE_URL" not in os.environ:
+            parser.error("--seed-into-database-url needs DATABASE_URL")
+    elif not args.no_seed:
+        if args.url:
+            parser.error("--url benchmarks a server on its own database: pass --no-seed "
+                         "(or --seed-into-database-url to seed that database first)")
+        config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    app = create_app(config)
+
+    dataset = None
+    if not args.no_seed:
+        with app.app_context():
+            dataset = seed_database(users=args.users, blogs=args.blogs,
+                                    comments_per_blog=args.comments_per_blog, seed=args.seed)
+        dataset.pop("password")
+
+    with app.app_context():
+        sql_counter = SqlCounter(db.engine)
+    driver = HttpDriver(args.url) if args.url else TestClientDriver(app, sql_counter)
+    scenarios = make_scenarios(pick_targets(app, random.Random(args.seed)), args.password)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "driver": args.url or "flask-test-client",
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split("@")[-1],
+            "python": platform.python_version(),
+            "threads": args.threads,
+            "dataset": dataset,
+        },
+        "scenarios": {},
+    }
+    for name in args.scenarios.split(","):
+        report["scenarios"][name] = run_scenario(driver, scenarios[name], args.requests,
+                                                 args.threads, args.warmup)
+        print(f"{name:10s} {json.dumps(report['scenarios'][name])}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Thời gian từ lúc khởi động tới request đầu tiên, profile default và production.
+
+    python benchmarks/bench_startup.py --blogs 2000 --runs 5 --output startup.json
+
+In-process: mỗi lần chạy là một process Python mới (import thật sự lạnh), đo
+import BlogSpace, create_app, warmup (chỉ production, như post_worker_init của
+gunicorn) và request đầu tiên tới từng trang. Nếu cài gunicorn, đo thêm thời
+gian từ lúc spawn tới response 200 đầu tiên của:
+  - default: `gunicorn app:app` không config (worker sync, không preload),
+  - production: gunicorn.conf.py (gthread, preload, warmup).
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PATHS = ("/database/get_all_blogs", "/usr/blog/1", "/database/trending")
+
+# chạy trong process con; in ra một dòng JSON
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+from BlogSpace import create_app
+imported = time.perf_counter()
+app = create_app({"IMAGE_PIPELINE_WORKERS": 0, "JOBS_MODE": "inline"})
+created = time.perf_counter()
+warmup_ms = None
+if app.config["PROFILE"] == "production":
+    from BlogSpace.server import warmup
+    warmup(app)
+    warmup_ms = round((time.perf_counter() - created) * 1000, 1)
+client = app.test_client()
+first = {}
+for path in sys.argv[1:]:
+    t = time.perf_counter()
+    status = client.get(path).status_code
+    first[path] = {"status": status, "ms": round((time.perf_counter() - t) * 1000, 2)}
+print(json.dumps({"import_ms": round((imported - started) * 1000, 1),
+                  "create_app_ms": round((created - imported) * 1000, 1),
+                  "warmup_ms": warmup_ms, "first_request": first,
+                  "total_ms": round((time.perf_counter() - started) * 1000, 1)}))
+"""
+
+
+def seed(path, blogs):
+    from BlogSpace import create_app
+    from BlogSpace.database.seed import seed_database
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "IMAGE_PIPELINE_WORKERS": 0,
+                      "JOBS_MODE": "inline"})
+    with app.app_context():
+        seed_database(users=max(1, blogs // 10), blogs=blogs, comments_per_blog=4)
+
+
+def in_process(profile, env):
+    output = subprocess.run([sys.executable, "-c", CHILD, *PATHS], cwd=ROOT, capture_output=True,
+                            text=True, check=True, env={**env, "BLOGSPACE_PROFILE": profile})
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def under_gunicorn(profile, env):
+    port = free_port()
+    command = [sys.executable, "-m", "gunicorn", "app:app", "--bind", f"127.0.0.1:{port}"]
+    if profile == "default":
+        command += ["--config", os.devnull]
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env={**env, "BLOGSPACE_PROFILE": profile, "PORT": str(port)},
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {process.returncode}")
+            try:
+                t = time.perf_counter()
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{PATHS[0]}", timeout=5) as response:
+                    if response.status == 200:
+                        done = time.perf_counter()
+                        return {"ready_ms": round((done - started) * 1000, 1),
+                                "first_request_ms": round((done - t) * 1000, 2)}
+            except OSError:
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+def summarize(runs):
+    """Median của từng số đo (giữ cấu trúc lồng nhau)."""
+    first = runs[0]
+    if isinstance(first, dict):
+        return {key: summarize([run[key] for run in runs]) for key in first}
+    if isinstance(first, (int, float)) and not isinstance(first, bool):
+        return round(statistics.median(runs), 2)
+    return first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blogs", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout).")
+    args = parser.parse_args()
+
+    try:
+        import gunicorn  # noqa: F401
+        has_gunicorn = True
+    except ImportError:
+        has_gunicorn = False
+
+    report = {"python": platform.python_version(), "blogs": args.blogs, "runs": args.runs, "profiles": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "startup.db")
+        seed(path, args.blogs)
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}", "WEB_CONCURRENCY": "1"}
+        for profile in ("default", "production"):
+            result = {"in_process": summarize([in_process(profile, env) for _ in range(args.runs)])}
+            if has_gunicorn:
+                result["gunicorn"] = summarize([under_gunicorn(profile, env) for _ in range(args.runs)])
+            report["profiles"][profile] = result
+            print(f"{profile:>10}: {json.dumps(result)}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Throughput và bộ nhớ đỉnh của `flask blogspace export` / `import` theo kích thước dữ liệu.
+
+    python benchmarks/bench_transfer.py --blogs 2000,20000 --output transfer.json
+
+Mỗi kích thước: seed một SQLite tạm, export ra NDJSON, import vào một SQLite rỗng
+khác rồi so số row và parent_id của comment. Throughput đo ở lần chạy thường; bộ
+nhớ đỉnh đo ở lần chạy thứ hai dưới tracemalloc (allocation của Python, chậm hơn
+vài lần): nếu streaming đúng thì con số này gần như không đổi khi dataset lớn lên.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+
+from BlogSpace import create_app
+from BlogSpace.database import db
+from BlogSpace.database.models.blog_model import BlogComment
+from BlogSpace.database.seed import seed_database
+from BlogSpace.database.transfer import MODELS, export_ndjson, import_ndjson, open_ndjson
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def snapshot(app):
+    with app.app_context():
+        counts = {m.__table__.name: db.session.execute(select(func.count()).select_from(m)).scalar()
+                  for m in MODELS}
+        parents = db.session.execute(
+            select(func.sum(BlogComment.id * func.coalesce(BlogComment.parent_id, 0)))).scalar()
+    return counts, parents
+
+
+def run(blogs, users, comments_per_blog, chunk_size, workdir):
+    config = {"IMAGE_PIPELINE_WORKERS": 0, "JOBS_MODE": "inline"}
+    source = create_app({**config, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir}/source.db"})
+    with source.app_context():
+        seed_database(users=users, blogs=blogs, comments_per_blog=comments_per_blog, chunk_size=chunk_size)
+
+    path = os.path.join(workdir, "export.ndjson")
+
+    def export():
+        with source.app_context(), open_ndjson(path, "w") as out:
+            return export_ndjson(out, chunk_size=chunk_size)
+
+    def load(name):
+        target = create_app({**config, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir}/{name}.db"})
+        with target.app_context(), open_ndjson(path, "r") as lines:
+            return target, import_ndjson(lines, chunk_size=chunk_size)
+
+    exported, export_seconds = timed(export)
+    (target, imported), import_seconds = timed(lambda: load("target"))
+    export_peak = peak_memory(export)
+    import_peak = peak_memory(lambda: load("traced"))
+
+    rows = sum(table["rows"] for table in exported.values())
+    return {
+        "blogs": blogs,
+        "rows": rows,
+        "file_mb": round(os.path.getsize(path) / 2 ** 20, 1),
+        "export_seconds": round(export_seconds, 2),
+        "export_rows_per_second": round(rows / export_seconds),
+        "export_peak_mb": round(export_peak / 2 ** 20, 2),
+        "import_seconds": round(import_seconds, 2),
+        "import_rows_per_second": round(rows / import_seconds),
+        "import_peak_mb": round(import_peak / 2 ** 20, 2),
+        "identical": snapshot(source) == snapshot(target),
+        "tables": {name: {"export": exported[name], "import": imported[name]} for name in exported},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blogs", default="2000,20000", help="Comma-separated dataset sizes.")
+    parser.add_argument("--users-per-blog", type=float, default=0.1)
+    parser.add_argument("--comments-per-blog", type=float, default=8.0)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout).")
+    args = parser.parse_args()
+
+    results = []
+    for blogs in (int(n) for n in args.blogs.split(",")):
+        with tempfile.TemporaryDirectory() as workdir:
+            result = run(blogs, max(1, int(blogs * args.users_per_blog)), args.comments_per_blog,
+                         args.chunk_size, workdir)
+        print(f"{blogs:>8} blogs  {result['rows']:>9} rows  export {result['export_rows_per_second']:>7} rows/s "
+              f"peak {result['export_peak_mb']:>6} MB  import {result['import_rows_per_second']:>7} rows/s "
+              f"peak {result['import_peak_mb']:>6} MB  identical={result['identical']}", file=sys.stderr)
+        results.append(result)
+
+    output = json.dumps({"python": platform.python_version(), "chunk_size": args.chunk_size,
+                         "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
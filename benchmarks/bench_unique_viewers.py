@@ -0,0 +1,112 @@
+"""Độ chính xác và bộ nhớ của HyperLogLog (database/hll.py) so với đếm chính xác bằng set.
+
+    python benchmarks/bench_unique_viewers.py --trials 10 --output unique_viewers.json
+
+Mỗi cardinality n: sinh n người xem khác nhau, mỗi người xem 1..`--repeat` lần
+(lượt xem lặp không được làm tăng ước lượng), chia ngẫu nhiên cho `--workers`
+sketch như nhiều worker gunicorn rồi gộp lại như lúc flush. Báo cáo:
+  - sai số tương đối (trung bình, độ lệch chuẩn, lớn nhất) qua `--trials` lần,
+  - sketch gộp có bằng đúng sketch của một worker duy nhất không,
+  - bộ nhớ: set Python các hash (sys.getsizeof set + int), 4096 register,
+    và blob zlib lưu trong blog_viewer_sketch,
+  - tốc độ add và count.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from BlogSpace.database.hll import REGISTERS, HyperLogLog, hash64  # noqa: E402
+
+CARDINALITIES = (10, 100, 1000, 10_000, 100_000, 1_000_000)
+
+
+def exact_bytes(hashes: set) -> int:
+    # set + các object int (hash 64 bit), không tính chuỗi định danh gốc
+    return sys.getsizeof(hashes) + sum(sys.getsizeof(h) for h in hashes)
+
+
+def trial(n: int, repeat: int, workers: int, rng: random.Random) -> dict:
+    viewers = [hash64(f"u:{rng.getrandbits(64)}") for _ in range(n)]
+    views = [h for h in viewers for _ in range(rng.randint(1, repeat))]
+    rng.shuffle(views)
+
+    single, shards, exact = HyperLogLog(), [HyperLogLog() for _ in range(workers)], set()
+    started = time.perf_counter()
+    for h in views:
+        single.add_hash(h)
+    add_seconds = time.perf_counter() - started
+    for h in views:
+        shards[rng.randrange(workers)].add_hash(h)
+        exact.add(h)
+
+    merged = HyperLogLog()
+    for shard in shards:
+        merged.merge(shard)
+    started = time.perf_counter()
+    estimate = single.count()
+    count_seconds = time.perf_counter() - started
+    return {
+        'views': len(views),
+        'exact': len(exact),
+        'estimate': estimate,
+        'error': (estimate - len(exact)) / len(exact),
+        'merge_equal': merged.registers == single.registers,
+        'exact_bytes': exact_bytes(exact),
+        'blob_bytes': len(single.to_bytes()),
+        'adds_per_second': len(views) / add_seconds,
+        'count_ms': count_seconds * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3, help="Max views per viewer.")
+    parser.add_argument("--workers", type=int, default=4, help="Sketches merged per blog.")
+    parser.add_argument("--max", type=int, default=CARDINALITIES[-1], help="Largest cardinality.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout).")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    report = {"python": platform.python_version(), "registers": REGISTERS,
+              "standard_error": round(1.04 / REGISTERS ** 0.5, 4), "trials": args.trials,
+              "repeat": args.repeat, "workers": args.workers, "results": []}
+    for n in (c for c in CARDINALITIES if c <= args.max):
+        runs = [trial(n, args.repeat, args.workers, rng) for _ in range(args.trials)]
+        errors = [run['error'] for run in runs]
+        result = {
+            "viewers": n,
+            "views": round(statistics.mean(run['views'] for run in runs)),
+            "estimate": round(statistics.mean(run['estimate'] for run in runs)),
+            "error_mean_pct": round(statistics.mean(errors) * 100, 2),
+            "error_stdev_pct": round(statistics.pstdev(errors) * 100, 2),
+            "error_max_pct": round(max(abs(e) for e in errors) * 100, 2),
+            "merge_equal": all(run['merge_equal'] for run in runs),
+            "exact_set_bytes": round(statistics.mean(run['exact_bytes'] for run in runs)),
+            "registers_bytes": REGISTERS,
+            "blob_bytes": round(statistics.mean(run['blob_bytes'] for run in runs)),
+            "adds_per_second": round(statistics.median(run['adds_per_second'] for run in runs)),
+            "count_ms": round(statistics.median(run['count_ms'] for run in runs), 3),
+        }
+        report["results"].append(result)
+        print(f"{n:>9}: {json.dumps(result)}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
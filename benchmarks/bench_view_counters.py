@@ -0,0 +1,93 @@
+"""Views/sec của increment_view: SELECT + commit mỗi lượt (cũ) so với counter buffer.
+
+    python benchmarks/bench_view_counters.py --views 5000 --threads 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BlogSpace import create_app
+from BlogSpace.database import db
+from BlogSpace.database.models.blog_model import Blog, BlogStats
+from BlogSpace.database.models.user_model import User
+from BlogSpace.database.repository.blog_repo import BlogStatsService
+
+
+def legacy_increment_view(blog_id):
+    # Cách cũ: đọc row, cộng trong Python, commit từng lượt
+    stats = BlogStats.query.filter_by(blog_id=blog_id).first()
+    stats.total_views += 1
+    db.session.commit()
+
+
+def run(app, fn, views, threads, blogs):
+    def worker(n):
+        with app.app_context():
+            for i in range(n):
+                fn(blogs[i % len(blogs)])
+
+    per_thread = views // threads
+    pool = [threading.Thread(target=worker, args=(per_thread,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return per_thread * threads, time.perf_counter() - start
+
+
+def total_views(app):
+    with app.app_context():
+        return db.session.query(db.func.sum(BlogStats.total_views)).scalar() or 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--views', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--blogs', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'STATS_FLUSH_INTERVAL': 1.0,
+    })
+    with app.app_context():
+        user = User('bench', 'bench@example.com', 'x')
+        db.session.add(user)
+        db.session.commit()
+        blog_ids = []
+        for i in range(args.blogs):
+            blog = Blog(user_id=user.id, title=f'post {i}', content='...', status='published')
+            db.session.add(blog)
+            db.session.flush()
+            db.session.add(BlogStats(blog_id=blog.id, total_views=0, total_likes=0, total_comments=0))
+            blog_ids.append(blog.id)
+        db.session.commit()
+
+    service = BlogStatsService()
+    results = {}
+
+    before = total_views(app)
+    n, elapsed = run(app, legacy_increment_view, args.views, args.threads, blog_ids)
+    results['legacy'] = (n, elapsed, total_views(app) - before)
+
+    before = total_views(app)
+    n, elapsed = run(app, service.increment_view, args.views, args.threads, blog_ids)
+    start = time.perf_counter()
+    service.flush()  # tính cả lần flush cuối vào thời gian
+    elapsed += time.perf_counter() - start
+    results['buffered'] = (n, elapsed, total_views(app) - before)
+
+    for name, (n, elapsed, stored) in results.items():
+        print(f"{name:9s} {n / elapsed:>12,.0f} views/sec   stored {stored}/{n}")
+
+
+if __name__ == '__main__':
+    main()
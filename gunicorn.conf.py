@@ -0,0 +1,60 @@
+"""Cấu hình gunicorn cho production (gunicorn tự đọc file này khi chạy ở thư mục gốc).
+
+    flask db upgrade
+    gunicorn app:app
+
+`flask db upgrade` cũng nâng cấp DB tạo từ trước khi có migration (create_all),
+không cần stamp. Profile production không tự tạo bảng và từ chối khởi động
+(SchemaOutOfDate) nếu DB chưa ở revision mới nhất: luôn upgrade trước khi deploy.
+Chạy sau nginx / load balancer: đặt TRUSTED_PROXY_HOPS (số proxy phía trước) để
+IP client lấy từ X-Forwarded-For (throttle đăng nhập, unique viewers).
+
+Mặc định worker gthread: SSE comment stream giữ một thread suốt thời gian mở, nên
+worker sync không dùng được. GUNICORN_WORKER_CLASS=gevent (cần cài gevent) cho
+nhiều stream hơn trên mỗi worker.
+"""
+import multiprocessing
+import os
+
+# production profile: không create_all, schema do migration quản lý
+os.environ.setdefault("BLOGSPACE_PROFILE", "production")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+# gthread/gevent xử lý đồng thời trong worker: số process ~ số core là đủ
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 500))
+
+# import + create_app một lần ở master, worker fork ra dùng chung bộ nhớ
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1").lower() not in ("0", "false", "no")
+
+# thay worker định kỳ (rò rỉ bộ nhớ, cache phình); jitter để các worker không restart cùng lúc
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 500))
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")  # None = tắt, "-" = stdout
+errorlog = "-"
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from BlogSpace.server import prepare
+        server.log.info("App prepared in master: %s", prepare(server.app.wsgi()))
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from BlogSpace.server import after_fork
+        after_fork(server.app.wsgi())
+
+
+def post_worker_init(worker):
+    from BlogSpace.server import limit_streams, warmup
+    app = worker.wsgi
+    if worker.cfg.worker_class_str == "gthread":
+        limit_streams(app, worker.cfg.threads)
+    worker.log.info("Worker %s warmed up: %s", worker.pid, warmup(app))
@@ -0,0 +1,32 @@
+"""add blog_comment.reply_count
+
+Revision ID: 3c1d8e2a9b47
+Revises: feb14971f400
+Create Date: 2026-10-18 09:20:41.512093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1d8e2a9b47'
+down_revision = 'feb14971f400'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blog_comment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reply_count', sa.Integer(), server_default='0', nullable=False))
+
+    # backfill từ dữ liệu hiện có
+    op.execute(
+        "UPDATE blog_comment SET reply_count = ("
+        "SELECT count(*) FROM blog_comment AS child WHERE child.parent_id = blog_comment.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('blog_comment', schema=None) as batch_op:
+        batch_op.drop_column('reply_count')
@@ -0,0 +1,26 @@
+"""index blog (user_id, status, created_at, id) for the author dashboard
+
+Revision ID: 5e0b8d4a7c21
+Revises: c52e7b9d1f08
+Create Date: 2026-10-18 15:12:09.581734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0b8d4a7c21'
+down_revision = 'c52e7b9d1f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blog', schema=None) as batch_op:
+        batch_op.create_index('ix_blog_user_status_created', ['user_id', 'status', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('blog', schema=None) as batch_op:
+        batch_op.drop_index('ix_blog_user_status_created')
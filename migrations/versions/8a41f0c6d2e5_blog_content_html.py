@@ -0,0 +1,130 @@
+"""add blog.content_html (pre-rendered post body)
+
+Revision ID: 8a41f0c6d2e5
+Revises: 3d7fc3192ca1
+Create Date: 2026-10-18 09:31:12.204417
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+from markupsafe import escape
+
+
+# revision identifiers, used by Alembic.
+revision = '8a41f0c6d2e5'
+down_revision = '3d7fc3192ca1'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+# bản sao cố định của BlogSpace/rendering.py lúc tạo revision này: sửa renderer
+# của app về sau không được làm đổi HTML mà migration này backfill
+_ALLOWED_SCHEMES = {"http", "https", "mailto"}
+_SCHEME = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.\-]*):")
+_CODE = re.compile(r"`([^`]+)`")
+_IMAGE = re.compile(r"!\[([^\]]*)\]\(([^)\s]+)\)")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC = re.compile(r"\*(.+?)\*")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^[-*]\s+(.*)$")
+_NUMBERED = re.compile(r"^\d+\.\s+(.*)$")
+
+
+def _safe_url(url: str) -> str:
+    # trình duyệt bỏ qua ký tự điều khiển/khoảng trắng trong scheme ("java\tscript:")
+    url = re.sub(r"[\x00-\x20]", "", url)
+    match = _SCHEME.match(url)
+    if match and match.group(1).lower() not in _ALLOWED_SCHEMES:
+        return "#"
+    return url
+
+
+def _inline(text: str) -> str:
+    text = str(escape(text.replace("\x00", "")))
+    # tách code span ra trước để ** / * bên trong không bị hiểu là định dạng
+    codes = []
+
+    def stash_code(match):
+        codes.append(f"<code>{match.group(1)}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+
+    text = _CODE.sub(stash_code, text)
+    text = _IMAGE.sub(lambda m: f'<img src="{_safe_url(m.group(2))}" alt="{m.group(1)}" loading="lazy">', text)
+    text = _LINK.sub(lambda m: f'<a href="{_safe_url(m.group(2))}" target="_blank" '
+                               f'rel="noopener noreferrer nofollow">{m.group(1)}</a>', text)
+    text = _BOLD.sub(r"<strong>\1</strong>", text)
+    text = _ITALIC.sub(r"<em>\1</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: codes[int(m.group(1))], text)
+
+
+def _list(tag, pattern, lines):
+    items = []
+    for line in lines:
+        match = pattern.match(line)
+        if match:
+            items.append(f"<li>{_inline(match.group(1))}</li>")
+        elif items:
+            # dòng tiếp nối của item trước
+            items[-1] = items[-1][:-5] + "<br>" + _inline(line) + "</li>"
+    return f"<{tag}>{''.join(items)}</{tag}>"
+
+
+def render_markdown(text: str | None) -> str:
+    if not text:
+        return ""
+    html = []
+    for block in re.split(r"\n\s*\n", text.replace("\r\n", "\n")):
+        lines = [line.strip() for line in block.strip().split("\n")]
+        if not lines[0]:
+            continue
+        if _HEADING.match(lines[0]):
+            for line in lines:
+                match = _HEADING.match(line)
+                if match:
+                    level = len(match.group(1))
+                    html.append(f"<h{level}>{_inline(match.group(2))}</h{level}>")
+                else:
+                    html.append(f"<p>{_inline(line)}</p>")
+        elif lines[0].startswith(">"):
+            quoted = [re.sub(r"^>\s?", "", line) for line in lines]
+            html.append(f"<blockquote>{'<br>'.join(_inline(line) for line in quoted)}</blockquote>")
+        elif _BULLET.match(lines[0]):
+            html.append(_list("ul", _BULLET, lines))
+        elif _NUMBERED.match(lines[0]):
+            html.append(_list("ol", _NUMBERED, lines))
+        else:
+            html.append(f"<p>{'<br>'.join(_inline(line) for line in lines)}</p>")
+    return "\n".join(html)
+
+
+def upgrade():
+    with op.batch_alter_table('blog', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_html', sa.Text(), nullable=True))
+
+    # backfill theo lô id
+    blog = sa.table('blog', sa.column('id', sa.Integer), sa.column('content', sa.Text),
+                    sa.column('content_html', sa.Text))
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(blog.c.id, blog.c.content).where(blog.c.id > last_id)
+            .order_by(blog.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            blog.update().where(blog.c.id == sa.bindparam('b_id'))
+            .values(content_html=sa.bindparam('b_html')),
+            [{'b_id': row.id, 'b_html': render_markdown(row.content)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('blog', schema=None) as batch_op:
+        batch_op.drop_column('content_html')
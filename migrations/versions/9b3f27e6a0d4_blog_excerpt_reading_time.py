@@ -0,0 +1,83 @@
+"""add blog.excerpt, word_count, reading_time (list pages stop reading content)
+
+Revision ID: 9b3f27e6a0d4
+Revises: 5e0b8d4a7c21
+Create Date: 2026-10-18 16:02:33.774120
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3f27e6a0d4'
+down_revision = '5e0b8d4a7c21'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+# bản sao cố định của BlogSpace.rendering.summarize lúc tạo revision này: đổi cách
+# tính excerpt/reading time của app về sau không được làm đổi kết quả migration
+_IMAGE = re.compile(r"!\[([^\]]*)\]\(([^)\s]+)\)")
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+_MARKUP = re.compile(r"^\s*(#{1,6}|>|[-*]|\d+\.)\s+|[*`]", re.MULTILINE)
+_TAG = re.compile(r"</?[a-zA-Z][^>]*>|<!--.*?-->", re.DOTALL)
+
+EXCERPT_LENGTH = 150
+WORDS_PER_MINUTE = 200
+
+
+def summarize(text):
+    plain = _IMAGE.sub("", text or "")
+    plain = _LINK.sub(r"\1", plain)
+    plain = _TAG.sub(" ", plain)
+    plain = " ".join(_MARKUP.sub("", plain).split())
+    words = len(plain.split())
+    excerpt = plain
+    if len(plain) > EXCERPT_LENGTH:
+        excerpt = plain[:EXCERPT_LENGTH].rsplit(" ", 1)[0].rstrip(".,;:") + "..."
+    return {'excerpt': excerpt, 'word_count': words,
+            'reading_time': max(1, -(-words // WORDS_PER_MINUTE))}
+
+
+def upgrade():
+    with op.batch_alter_table('blog', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('excerpt', sa.String(length=300), nullable=True))
+        batch_op.add_column(sa.Column('word_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('reading_time', sa.Integer(), server_default='1', nullable=False))
+
+    # backfill theo lô id
+    blog = sa.table('blog', sa.column('id', sa.Integer), sa.column('content', sa.Text),
+                    sa.column('excerpt', sa.String), sa.column('word_count', sa.Integer),
+                    sa.column('reading_time', sa.Integer))
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(blog.c.id, blog.c.content).where(blog.c.id > last_id)
+            .order_by(blog.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            summary = summarize(row.content)
+            params.append({'b_id': row.id, 'b_excerpt': summary['excerpt'],
+                           'b_word_count': summary['word_count'], 'b_reading_time': summary['reading_time']})
+        connection.execute(
+            blog.update().where(blog.c.id == sa.bindparam('b_id'))
+            .values(excerpt=sa.bindparam('b_excerpt'), word_count=sa.bindparam('b_word_count'),
+                    reading_time=sa.bindparam('b_reading_time')),
+            params
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('blog', schema=None) as batch_op:
+        batch_op.drop_column('reading_time')
+        batch_op.drop_column('word_count')
+        batch_op.drop_column('excerpt')
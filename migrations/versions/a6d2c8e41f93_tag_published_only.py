@@ -0,0 +1,36 @@
+"""blog_tag only holds published blogs
+
+Revision ID: a6d2c8e41f93
+Revises: e3b85f0c19a7
+Create Date: 2026-10-18 21:04:37.512908
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2c8e41f93'
+down_revision = 'e3b85f0c19a7'
+branch_labels = None
+depends_on = None
+
+blog = sa.table('blog', sa.column('id', sa.Integer), sa.column('status', sa.String))
+tag = sa.table('tag', sa.column('id', sa.Integer), sa.column('blog_count', sa.Integer))
+blog_tag = sa.table('blog_tag', sa.column('blog_id', sa.Integer), sa.column('tag_id', sa.Integer))
+
+
+def upgrade():
+    # bản nháp không được xuất hiện ở trang tag / số đếm tag
+    op.execute(blog_tag.delete().where(blog_tag.c.blog_id.in_(
+        sa.select(blog.c.id).where(blog.c.status != 'published')
+    )))
+    op.execute(tag.update().values(blog_count=(
+        sa.select(sa.func.count()).select_from(blog_tag)
+        .where(blog_tag.c.tag_id == tag.c.id).scalar_subquery()
+    )))
+
+
+def downgrade():
+    # schema không đổi; không gắn lại tag cho bản nháp
+    pass
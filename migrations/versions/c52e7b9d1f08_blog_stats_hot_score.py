@@ -0,0 +1,72 @@
+"""add blog_stats.hot_score (trending)
+
+Revision ID: c52e7b9d1f08
+Revises: f4ac6a169c9f
+Create Date: 2026-10-18 14:05:47.318260
+
+"""
+import math
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e7b9d1f08'
+down_revision = 'f4ac6a169c9f'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# bản sao cố định của trending.hot_score lúc tạo revision này: chỉnh trọng số /
+# decay của app về sau không được làm đổi giá trị migration này ghi
+HOT_WEIGHTS = {'total_views': 1, 'total_likes': 5, 'total_comments': 10}
+HOT_EPOCH = datetime(2024, 1, 1)
+HOT_DECAY_SECONDS = 45000
+
+
+def hot_score(views, likes, comments, created_at):
+    engagement = (HOT_WEIGHTS['total_views'] * (views or 0)
+                  + HOT_WEIGHTS['total_likes'] * (likes or 0)
+                  + HOT_WEIGHTS['total_comments'] * (comments or 0))
+    age = (created_at - HOT_EPOCH).total_seconds()
+    return round(math.log10(max(engagement, 1)) + age / HOT_DECAY_SECONDS, 7)
+
+
+def upgrade():
+    with op.batch_alter_table('blog_stats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('hot_score', sa.Float(), server_default='0', nullable=False))
+        batch_op.create_index('ix_blog_stats_hot_score', ['hot_score'], unique=False)
+
+    # backfill theo lô id
+    stats = sa.table('blog_stats', sa.column('id', sa.Integer), sa.column('blog_id', sa.Integer),
+                     sa.column('total_views', sa.Integer), sa.column('total_likes', sa.Integer),
+                     sa.column('total_comments', sa.Integer), sa.column('hot_score', sa.Float))
+    blog = sa.table('blog', sa.column('id', sa.Integer), sa.column('created_at', sa.DateTime))
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(stats.c.id, stats.c.total_views, stats.c.total_likes, stats.c.total_comments,
+                      blog.c.created_at)
+            .join(blog, blog.c.id == stats.c.blog_id)
+            .where(stats.c.id > last_id).order_by(stats.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            stats.update().where(stats.c.id == sa.bindparam('b_id'))
+            .values(hot_score=sa.bindparam('b_score')),
+            [{'b_id': row.id,
+              'b_score': hot_score(row.total_views, row.total_likes, row.total_comments, row.created_at)}
+             for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('blog_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_blog_stats_hot_score')
+        batch_op.drop_column('hot_score')
@@ -0,0 +1,113 @@
+"""normalized tag / blog_tag tables with maintained counts
+
+Revision ID: f4ac6a169c9f
+Revises: 8a41f0c6d2e5
+Create Date: 2026-10-18 09:23:24.139007
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4ac6a169c9f'
+down_revision = '8a41f0c6d2e5'
+branch_labels = None
+depends_on = None
+
+# bản sao cố định của BlogSpace.database.tags lúc tạo revision này: code app đổi
+# về sau không được làm đổi kết quả của migration
+MAX_TAG_LENGTH = 50
+MAX_TAGS_PER_BLOG = 20
+BATCH_SIZE = 1000
+
+blog = sa.table('blog', sa.column('id', sa.Integer), sa.column('tags', sa.String),
+                sa.column('created_at', sa.DateTime))
+tag = sa.table('tag', sa.column('id', sa.Integer), sa.column('name', sa.String),
+               sa.column('blog_count', sa.Integer))
+blog_tag = sa.table('blog_tag', sa.column('blog_id', sa.Integer), sa.column('tag_id', sa.Integer),
+                    sa.column('created_at', sa.DateTime))
+
+
+def normalize_tags(raw):
+    names = []
+    for part in (raw or '').split(','):
+        name = re.sub(r'\s+', ' ', part).strip().lstrip('#').strip().lower()[:MAX_TAG_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names[:MAX_TAGS_PER_BLOG]
+
+
+def backfill_tags(connection):
+    tag_ids = dict(connection.execute(sa.select(tag.c.name, tag.c.id)).all())
+    last_id = -1
+    while True:
+        rows = connection.execute(
+            sa.select(blog.c.id, blog.c.tags, blog.c.created_at)
+            .where(blog.c.id > last_id, blog.c.tags.is_not(None))
+            .order_by(blog.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        parsed = [(row, normalize_tags(row.tags)) for row in rows]
+        new_names = sorted({name for _, names in parsed for name in names} - tag_ids.keys())
+        if new_names:
+            connection.execute(sa.insert(tag), [{'name': name, 'blog_count': 0} for name in new_names])
+            tag_ids.update(connection.execute(
+                sa.select(tag.c.name, tag.c.id).where(tag.c.name.in_(new_names))).all())
+
+        values = [{'blog_id': row.id, 'tag_id': tag_ids[name], 'created_at': row.created_at}
+                  for row, names in parsed for name in names]
+        if values:
+            connection.execute(sa.insert(blog_tag), values)
+
+    connection.execute(tag.update().values(blog_count=(
+        sa.select(sa.func.count()).select_from(blog_tag)
+        .where(blog_tag.c.tag_id == tag.c.id).scalar_subquery()
+    )))
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('tag',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('blog_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    with op.batch_alter_table('tag', schema=None) as batch_op:
+        batch_op.create_index('ix_tag_blog_count', ['blog_count', 'id'], unique=False)
+
+    op.create_table('blog_tag',
+    sa.Column('blog_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['blog_id'], ['blog.id'], ),
+    sa.ForeignKeyConstraint(['tag_id'], ['tag.id'], ),
+    sa.PrimaryKeyConstraint('blog_id', 'tag_id')
+    )
+    with op.batch_alter_table('blog_tag', schema=None) as batch_op:
+        batch_op.create_index('ix_blog_tag_tag_created', ['tag_id', 'created_at', 'blog_id'], unique=False)
+
+    # ### end Alembic commands ###
+
+    # backfill từ chuỗi blog.tags hiện có
+    backfill_tags(op.get_bind())
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('blog_tag', schema=None) as batch_op:
+        batch_op.drop_index('ix_blog_tag_tag_created')
+
+    op.drop_table('blog_tag')
+    with op.batch_alter_table('tag', schema=None) as batch_op:
+        batch_op.drop_index('ix_tag_blog_count')
+
+    op.drop_table('tag')
+    # ### end Alembic commands ###
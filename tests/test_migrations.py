@@ -0,0 +1,100 @@
+"""DB tạo bằng create_all trước khi có migration (chưa có alembic_version) phải
+nâng cấp được: tự upgrade khi khởi động ở profile default, còn profile
+production từ chối khởi động cho tới khi chạy `flask db upgrade`.
+"""
+import sqlite3
+import pytest
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask_migrate import upgrade
+from BlogSpace import create_app
+from BlogSpace.database import MIGRATIONS_DIR, SchemaOutOfDate, db
+from BlogSpace.database.models.blog_model import Blog
+
+# schema của baseline (db.create_all() trước khi có migrations/)
+BASELINE_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER NOT NULL, username VARCHAR(50) NOT NULL, email VARCHAR(120) NOT NULL,
+    password_hash VARCHAR(200) NOT NULL,
+    PRIMARY KEY (id), UNIQUE (username), UNIQUE (email)
+);
+CREATE TABLE blog (
+    id INTEGER NOT NULL, user_id INTEGER NOT NULL, title VARCHAR(255) NOT NULL, content TEXT NOT NULL,
+    category VARCHAR(100), tags VARCHAR(255), featured_image_path VARCHAR(255),
+    seo_description VARCHAR(300), status VARCHAR(20) NOT NULL,
+    created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL,
+    PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE blog_stats (
+    id INTEGER NOT NULL, blog_id INTEGER NOT NULL, total_views INTEGER, total_likes INTEGER,
+    total_comments INTEGER,
+    PRIMARY KEY (id), UNIQUE (blog_id), FOREIGN KEY(blog_id) REFERENCES blog (id)
+);
+CREATE TABLE blog_comment (
+    id INTEGER NOT NULL, blog_id INTEGER NOT NULL, user_id INTEGER NOT NULL, parent_id INTEGER,
+    content TEXT NOT NULL, created_at DATETIME, total_likes INTEGER NOT NULL,
+    PRIMARY KEY (id), FOREIGN KEY(blog_id) REFERENCES blog (id),
+    FOREIGN KEY(user_id) REFERENCES user (id), FOREIGN KEY(parent_id) REFERENCES blog_comment (id)
+);
+INSERT INTO user VALUES (1, 'ann', 'ann@example.com', 'x');
+INSERT INTO blog VALUES
+    (1, 1, 'Hello', 'Some **markdown** body.', 'Tech', 'Python, flask', NULL, NULL, 'published',
+     '2026-01-01 10:00:00', '2026-01-01 10:00:00'),
+    (2, 1, 'Draft', 'Not yet.', 'Tech', 'python', NULL, NULL, 'draft',
+     '2026-01-02 10:00:00', '2026-01-02 10:00:00');
+INSERT INTO blog_stats VALUES (1, 1, 7, 1, 1), (2, 2, 0, 0, 0);
+INSERT INTO blog_comment VALUES (1, 1, 1, NULL, 'Nice', '2026-01-01 11:00:00', 0);
+"""
+
+CONFIG = {"IMAGE_PIPELINE_WORKERS": 0, "JOBS_MODE": "inline"}
+
+
+@pytest.fixture
+def baseline_url(tmp_path):
+    path = tmp_path / "users.db"
+    with sqlite3.connect(path) as connection:
+        connection.executescript(BASELINE_SCHEMA)
+    return f"sqlite:///{path}"
+
+
+def current_heads(app):
+    with app.app_context(), db.engine.connect() as connection:
+        return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def assert_upgraded(app):
+    assert current_heads(app) == set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+    client = app.test_client()
+    response = client.get("/database/get_all_blogs")
+    assert response.status_code == 200
+    blogs = {blog["id"]: blog for blog in response.get_json()["blogs"]}
+    assert "markdown body" in blogs[1]["excerpt"]
+    with app.app_context():
+        blog = db.session.get(Blog, 1)
+        assert blog.content_html == "<p>Some <strong>markdown</strong> body.</p>"
+        assert (blog.excerpt, blog.reading_time) == ("Some markdown body.", 1)
+    tags = {tag["name"]: tag["count"] for tag in client.get("/database/tags").get_json()["tags"]}
+    assert tags == {"python": 1, "flask": 1}
+
+
+def test_default_profile_upgrades_baseline_database(baseline_url):
+    app = create_app({**CONFIG, "SQLALCHEMY_DATABASE_URI": baseline_url})
+    assert_upgraded(app)
+    # `flask db upgrade` sau đó không còn gì để chạy
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+    assert_upgraded(app)
+    # khởi động lại trên DB đã ở head
+    assert_upgraded(create_app({**CONFIG, "SQLALCHEMY_DATABASE_URI": baseline_url}))
+
+
+def test_production_profile_requires_upgrade(baseline_url):
+    production = {**CONFIG, "SQLALCHEMY_DATABASE_URI": baseline_url,
+                  "DATABASE_CREATE_ALL": False, "DATABASE_REQUIRE_HEAD": True}
+    with pytest.raises(SchemaOutOfDate):
+        create_app(production)
+
+    migrator = create_app({**production, "DATABASE_REQUIRE_HEAD": False})
+    with migrator.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+    assert_upgraded(create_app(production))
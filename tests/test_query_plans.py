@@ -0,0 +1,31 @@
+"""Query plan của các query repository không được regress về full scan / sort tạm.
+
+DB tạm dựng bằng migrations (như production), seed dữ liệu nhỏ, rồi mỗi
+PlanCase là một test. Cùng logic với `flask blogspace check-query-plans`.
+"""
+import pytest
+from flask_migrate import upgrade
+from BlogSpace import create_app
+from BlogSpace.database import MIGRATIONS_DIR
+from BlogSpace.database.query_plans import PLAN_CASES, check_case
+from BlogSpace.database.seed import seed_database
+
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", "DATABASE_CREATE_ALL": False,
+                      "DATABASE_REQUIRE_HEAD": False, "IMAGE_PIPELINE_WORKERS": 0, "JOBS_MODE": "inline"})
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+        seed_database(users=20, blogs=200, comments_per_blog=4)
+    return app
+
+
+@pytest.mark.parametrize("case", PLAN_CASES, ids=[case.name for case in PLAN_CASES])
+def test_query_plan_uses_indexes(app, case):
+    with app.app_context():
+        results = check_case(case)
+    assert results, f"{case.name} issued no SQL"
+    for plan, problems in results:
+        assert not problems, f"{case.name}: {'; '.join(problems)}\n" + "\n".join(plan)